@@ -0,0 +1 @@
+"""性能基准：合成小说生成器、mock LLM 与按阶段的基准套件。"""
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from chapter_splitter.llm import DeepSeekClient
+from chapter_splitter.llm.client import RetryPolicy
+
+from .mock_openai_server import MockOpenAIServer
+
+
+def _run(base_url: str, calls: int, *, reuse: bool) -> dict[str, float | int]:
+    retry = RetryPolicy(max_attempts=1, delay_seconds=0)
+    client = DeepSeekClient(api_key="bench-key", base_url=base_url, retry_policy=retry)
+    started = time.perf_counter()
+    for idx in range(calls):
+        if not reuse:
+            # 模拟旧实现：每次调用都新建 OpenAI 客户端与连接池。
+            client.close()
+        client.detect_language(f"sample {idx}")
+    elapsed = time.perf_counter() - started
+    client.close()
+
+    summary = client.stats.summary()
+    summary["wall_seconds"] = elapsed
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比复用 / 不复用 LLM 客户端的单次调用延迟")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="mock 服务端每次响应的额外延迟（秒）")
+    args = parser.parse_args()
+
+    with MockOpenAIServer(latency=args.latency) as server:
+        fresh = _run(server.base_url, args.calls, reuse=False)
+        fresh_connections = len(server.connections)
+        server.connections.clear()
+        reused = _run(server.base_url, args.calls, reuse=True)
+        reused_connections = len(server.connections)
+
+    fresh["connections"] = fresh_connections
+    reused["connections"] = reused_connections
+    print(json.dumps({"fresh_client_per_call": fresh, "reused_client": reused}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
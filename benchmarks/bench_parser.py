@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from chapter_splitter.parser import DEFAULT_CHAPTER_PATTERNS, _extract_chapters_and_leading_text
+
+from .generator import LANGUAGES, generate_novel
+
+
+def _time(text: str, patterns: tuple) -> tuple[float, int]:
+    started = time.perf_counter()
+    chapters, _ = _extract_chapters_and_leading_text(text, patterns)
+    return time.perf_counter() - started, len(chapters)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比合并正则与逐个正则的章节标题扫描耗时")
+    parser.add_argument("--size-mb", type=float, default=50.0)
+    parser.add_argument("--language", choices=LANGUAGES, default="mixed")
+    args = parser.parse_args()
+
+    text = generate_novel(args.size_mb, language=args.language)
+    # 新建一个元组对象即可走逐个正则匹配的旧路径，用作对照。
+    sequential_patterns = tuple(list(DEFAULT_CHAPTER_PATTERNS))
+
+    sequential_seconds, sequential_count = _time(text, sequential_patterns)
+    combined_seconds, combined_count = _time(text, DEFAULT_CHAPTER_PATTERNS)
+    assert sequential_count == combined_count
+
+    print(
+        json.dumps(
+            {
+                "lines": text.count("\n"),
+                "chapters": combined_count,
+                "sequential_seconds": round(sequential_seconds, 3),
+                "combined_seconds": round(combined_seconds, 3),
+                "speedup": round(sequential_seconds / combined_seconds, 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from chapter_splitter.utils.text import CLOSING_MARKS, normalize_newlines, split_by_sentence
+
+from .generator import generate_novel
+
+
+def _legacy_split_by_sentence(text: str, target_chars: int = 1000) -> list[str]:
+    # 旧实现：逐字符追加到列表，每句再 join 一次。
+    normalized = normalize_newlines(text).strip()
+    if not normalized:
+        return []
+
+    sentence_tokens: list[str] = []
+    cursor = 0
+    token: list[str] = []
+    while cursor < len(normalized):
+        char = normalized[cursor]
+        token.append(char)
+        cursor += 1
+        if char in "。.!?！？":
+            while cursor < len(normalized) and normalized[cursor] in CLOSING_MARKS:
+                token.append(normalized[cursor])
+                cursor += 1
+            sentence = "".join(token).strip()
+            if sentence:
+                sentence_tokens.append(sentence)
+            token = []
+    if token:
+        tail = "".join(token).strip()
+        if tail:
+            sentence_tokens.append(tail)
+    if not sentence_tokens:
+        return [normalized]
+
+    target_chars = max(200, target_chars)
+    chunks: list[str] = []
+    current: list[str] = []
+    current_len = 0
+    for sentence in sentence_tokens:
+        if current and current_len + len(sentence) > target_chars:
+            chunks.append("".join(current).strip())
+            current, current_len = [sentence], len(sentence)
+            continue
+        current.append(sentence)
+        current_len += len(sentence)
+    if current:
+        chunks.append("".join(current).strip())
+    return [chunk for chunk in chunks if chunk]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比下标扫描与旧版逐字符分句在无标题整本书上的吞吐")
+    parser.add_argument("--size-mb", type=float, default=100.0)
+    parser.add_argument("--languages", nargs="+", default=["zh", "en"])
+    parser.add_argument("--target-chars", type=int, default=1000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    report = []
+    for language in args.languages:
+        text = generate_novel(args.size_mb, language=language)
+        source_mb = len(text.encode("utf-8")) / (1024 * 1024)
+        started = time.perf_counter()
+        chunks = split_by_sentence(text, args.target_chars)
+        seconds = time.perf_counter() - started
+        row = {
+            "language": language,
+            "size_mb": round(source_mb, 2),
+            "chunks": len(chunks),
+            "mb_per_s": round(source_mb / seconds, 2),
+        }
+
+        if not args.skip_legacy:
+            started = time.perf_counter()
+            legacy_chunks = _legacy_split_by_sentence(text, args.target_chars)
+            legacy_seconds = time.perf_counter() - started
+            assert legacy_chunks == chunks
+            row["legacy_mb_per_s"] = round(source_mb / legacy_seconds, 2)
+            row["speedup"] = round(legacy_seconds / seconds, 2)
+        report.append(row)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
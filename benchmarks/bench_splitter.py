@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+
+from chapter_splitter.splitter import CLOSING_MARKS, calculate_split_count, split_content
+
+from .generator import generate_novel
+
+
+def _legacy_find_split_point(text: str, target_pos: int, search_range: int) -> int:
+    start = max(0, target_pos - search_range)
+    end = min(len(text), target_pos + search_range)
+    window = text[start:end]
+    for pattern, extend in ((r"\n\n+", False), (r"[。.!?！？]", True), (r"[,，]", True)):
+        if extend:
+            points = [start + match.end() for match in re.finditer(pattern, window)]
+        else:
+            points = [start + match.start() + 2 for match in re.finditer(pattern, window)]
+        if points:
+            point = min(points, key=lambda value: abs(value - target_pos))
+            while extend and point < len(text) and text[point] in CLOSING_MARKS:
+                point += 1
+            return point
+    return max(1, min(len(text) - 1, target_pos))
+
+
+def _legacy_split_content(content: str, target_chars: int, search_range: int) -> list[str]:
+    # 旧实现：每切一刀都复制一次剩余文本。
+    normalized = content.strip()
+    count = calculate_split_count(len(normalized), target_chars, 0.7, 1.3)
+    pieces, remaining = [], normalized
+    while count > 1:
+        point = _legacy_find_split_point(remaining, max(1, len(remaining) // count), search_range)
+        left, right = remaining[:point].strip(), remaining[point:].strip()
+        if not left or not right:
+            point = max(1, len(remaining) // count)
+            left, right = remaining[:point].strip(), remaining[point:].strip()
+        cursor = 0
+        while cursor < len(right) and right[cursor] in CLOSING_MARKS:
+            cursor += 1
+        if cursor:
+            left, right = left + right[:cursor], right[cursor:].lstrip()
+        if not left or not right:
+            point = max(1, len(remaining) // count)
+            left, right = remaining[:point].strip(), remaining[point:].strip()
+        pieces.append(left)
+        remaining = right
+        count -= 1
+    pieces.append(remaining.strip())
+    return [piece for piece in pieces if piece]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比下标切分与旧版切片切分在超长章节上的耗时")
+    parser.add_argument("--chars", type=int, default=1_000_000)
+    parser.add_argument("--target-chars", type=int, nargs="+", default=[200, 1000])
+    parser.add_argument("--search-range", type=int, default=200)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    # 整本合成小说当作一个超长章节。
+    content = generate_novel(args.chars * 3 / (1024 * 1024), language="mixed")[: args.chars]
+    report = []
+    for target_chars in args.target_chars:
+        started = time.perf_counter()
+        pieces = split_content(content, target_chars, 0.7, 1.3, args.search_range)
+        indexed_seconds = time.perf_counter() - started
+        row = {
+            "chars": len(content),
+            "target_chars": target_chars,
+            "pieces": len(pieces),
+            "indexed_seconds": round(indexed_seconds, 3),
+        }
+
+        if not args.skip_legacy:
+            started = time.perf_counter()
+            legacy_pieces = _legacy_split_content(content, target_chars, args.search_range)
+            legacy_seconds = time.perf_counter() - started
+            assert legacy_pieces == pieces
+            row["legacy_seconds"] = round(legacy_seconds, 3)
+            row["speedup"] = round(legacy_seconds / indexed_seconds, 2)
+        report.append(row)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+import io
+import random
+from typing import TextIO
+
+
+LANGUAGES = ("zh", "en", "mixed")
+
+_ZH_DIGITS = "零一二三四五六七八九"
+
+_ZH_SENTENCES = (
+    "少年背起行囊，踏上旅途。",
+    "江风猎猎，远山如黛。",
+    "“你来了。”掌柜放下算盘，抬头看了他一眼。",
+    "雨夜的客栈里，众人低声交谈，谁也没有注意到门外的人影！",
+    "他握紧剑柄，心里却一片平静。",
+    "三年之约已到，可那人还会来吗？",
+    "灯火摇曳，照出满墙斑驳的字迹……",
+    "师父说过，剑在人在，剑亡人亡。",
+)
+_ZH_TITLES = ("风起", "夜雨客栈", "剑意初成", "旧约", "山门", "故人来", "雪落无声", "归途")
+
+_EN_SENTENCES = (
+    "He left home with a worn backpack and an old map.",
+    "Rain hit the windows while travelers traded rumors.",
+    "\"You came,\" the innkeeper said, without looking up.",
+    "Nobody noticed the shadow waiting by the door!",
+    "She counted the steps twice, just to be sure.",
+    "Was the promise still worth keeping after three years?",
+    "The lamp flickered, and the old letters seemed to move...",
+    "Far away, the bells of the harbor began to ring.",
+)
+_EN_TITLES = ("The Road", "Rising Wind", "An Old Promise", "Harbor Lights", "The Inn", "First Snow")
+
+
+def _zh_number(value: int) -> str:
+    if value < 10:
+        return _ZH_DIGITS[value]
+    if value < 20:
+        return "十" + (_ZH_DIGITS[value % 10] if value % 10 else "")
+    if value < 100:
+        return _ZH_DIGITS[value // 10] + "十" + (_ZH_DIGITS[value % 10] if value % 10 else "")
+    return "".join(_ZH_DIGITS[int(digit)] for digit in str(value))
+
+
+def _generic_number(chapter: int) -> int:
+    # 通用编号标题只认 1~4 位数字，超大文件里循环使用编号。
+    return (chapter - 1) % 9999 + 1
+
+
+_ZH_HEADINGS: tuple[Callable[[int, str], str], ...] = (
+    lambda num, title: f"第{num}章 {title}",
+    lambda num, title: f"第{_zh_number(num)}章 {title}",
+    lambda num, title: f"{_generic_number(num)}、{title}",
+    lambda num, title: f"{_generic_number(num)}. {title}",
+)
+_EN_HEADINGS: tuple[Callable[[int, str], str], ...] = (
+    lambda num, title: f"Chapter {num}: {title}",
+    lambda num, title: f"CHAPTER {num}",
+    lambda num, title: f"{_generic_number(num)}. {title}",
+    lambda num, title: f"Part {num} {title}",
+)
+
+
+def _paragraph(rng: random.Random, sentences: tuple[str, ...], indent: str, separator: str) -> str:
+    count = rng.randint(2, 6)
+    return indent + separator.join(rng.choice(sentences) for _ in range(count)) + "\n"
+
+
+def _chapter(rng: random.Random, language: str, chapter: int, paragraphs: int) -> str:
+    chapter_language = language if language != "mixed" else rng.choice(("zh", "en"))
+    if chapter_language == "zh":
+        heading = rng.choice(_ZH_HEADINGS)(chapter, rng.choice(_ZH_TITLES))
+    else:
+        heading = rng.choice(_EN_HEADINGS)(chapter, rng.choice(_EN_TITLES))
+
+    lines = [heading + "\n"]
+    for _ in range(paragraphs):
+        paragraph_language = chapter_language if language != "mixed" or rng.random() < 0.8 else rng.choice(("zh", "en"))
+        if paragraph_language == "zh":
+            lines.append(_paragraph(rng, _ZH_SENTENCES, "　　", ""))
+        else:
+            lines.append(_paragraph(rng, _EN_SENTENCES, "", " "))
+        if rng.random() < 0.3:
+            lines.append("\n")
+    return "".join(lines)
+
+
+def write_novel(handle: TextIO, size_bytes: int, *, language: str = "zh", seed: int = 7) -> int:
+    """按章写入合成小说，直到 UTF-8 字节数达到 size_bytes；相同参数生成的内容完全一致。"""
+    if language not in LANGUAGES:
+        raise ValueError(f"unsupported language: {language}")
+
+    rng = random.Random(f"{language}:{seed}")
+    written = 0
+    prologue = "序章 缘起\n" if language != "en" else "Prologue\n"
+    handle.write(prologue)
+    written += len(prologue.encode("utf-8"))
+
+    chapter = 1
+    while written < size_bytes:
+        # 大多数章节几 KB，偶尔出现超长章节，覆盖切分的长尾。
+        paragraphs = rng.randint(20, 60) if rng.random() < 0.95 else rng.randint(300, 600)
+        text = _chapter(rng, language, chapter, paragraphs)
+        handle.write(text)
+        written += len(text.encode("utf-8"))
+        chapter += 1
+    return written
+
+
+def generate_novel(size_mb: float, *, language: str = "zh", seed: int = 7) -> str:
+    buffer = io.StringIO()
+    write_novel(buffer, int(size_mb * 1024 * 1024), language=language, seed=seed)
+    return buffer.getvalue()
+
+
+def generate_novel_file(path: Path, size_mb: float, *, language: str = "zh", seed: int = 7) -> Path:
+    """流式写文件，1 GB 级别的样本也不需要在内存里拼出全文。"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="\n") as handle:
+        write_novel(handle, int(size_mb * 1024 * 1024), language=language, seed=seed)
+    return path
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="生成确定性的合成小说 TXT，用于基准测试")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--language", choices=LANGUAGES, default="zh")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    generate_novel_file(args.output, args.size_mb, language=args.language, seed=args.seed)
+    print(f"{args.output} ({args.output.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
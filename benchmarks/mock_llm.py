@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+
+DEFAULT_TEMPLATES = {"single": "第{num}章：{title}", "split": "第{num}章：{title} ({part}/{total})"}
+
+
+def mock_titles(items: list[dict[str, Any]], templates: dict[str, str] | None) -> list[str]:
+    """像守规矩的 LLM 一样按模板填标题，正文用原标题。"""
+    templates = templates or DEFAULT_TEMPLATES
+    titles = []
+    for item in items:
+        total = int(item.get("total", 1))
+        template = templates["split" if total > 1 else "single"]
+        fields = {"num": item.get("chapter_num"), "part": item.get("part", 1), "total": total}
+        titles.append(template.format(title=str(item.get("original_title", "")), **fields))
+    return titles
+
+
+class MockLLM:
+    """进程内的假 LLM：接口与 LLMClient 一致，每次调用固定 sleep latency 秒，标题按请求给的模板填写。"""
+
+    enabled = True
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _call(self) -> None:
+        with self._lock:
+            self.calls += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def detect_language(self, sample_text: str) -> dict[str, Any]:
+        self._call()
+        return {"language": "zh", "confidence": 0.9}
+
+    def detect_chapter_pattern(self, sample_text: str) -> dict[str, Any]:
+        self._call()
+        return {"pattern": ""}
+
+    def format_titles(
+        self, items: list[dict[str, Any]], language: str, templates: dict[str, str] | None = None
+    ) -> list[str]:
+        self._call()
+        return mock_titles(items, templates)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import re
+import threading
+import time
+from typing import Any
+
+from .mock_llm import mock_titles
+
+
+_TEMPLATES = re.compile(r"标题格式: 未拆分章节 (?P<single>.+?)；拆分章节 (?P<split>.+?)。")
+
+
+def _default_reply(request: dict[str, Any]) -> dict[str, Any]:
+    user_prompt = request.get("messages", [{}])[-1].get("content", "")
+    if "formatted" in user_prompt:
+        items = json.loads(user_prompt.split("输入: ", 1)[1])
+        templates = _TEMPLATES.search(user_prompt)
+        return {"formatted": mock_titles(items, templates.groupdict() if templates else None)}
+    if "pattern" in user_prompt:
+        return {"pattern": ""}
+    return {"language": "zh", "confidence": 0.9}
+
+
+class MockOpenAIServer:
+    """本地 OpenAI 兼容 /chat/completions 服务，支持固定延迟，用于基准和联调。"""
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        reply: Callable[[dict[str, Any]], dict[str, Any]] = _default_reply,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.reply = reply
+        self.requests = 0
+        self.connections: set[tuple[str, int]] = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with owner._lock:
+                    owner.requests += 1
+                    owner.connections.add(self.client_address)
+                if owner.latency > 0:
+                    time.sleep(owner.latency)
+
+                content = json.dumps(owner.reply(request), ensure_ascii=False)
+                body = json.dumps(
+                    {
+                        "id": "chatcmpl-mock",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": request.get("model", ""),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": content},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                    },
+                    ensure_ascii=False,
+                ).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def __enter__(self) -> MockOpenAIServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
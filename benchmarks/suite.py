@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from chapter_splitter.config import AppConfig
+from chapter_splitter.formatter import TitleFormatInput, format_titles_batch
+from chapter_splitter.parser import parse_chapters
+from chapter_splitter.renderer import RenderChapter, render_text
+from chapter_splitter.splitter import split_chapter, split_content
+from chapter_splitter.utils.text import split_by_sentence
+
+from .generator import LANGUAGES, generate_novel
+from .mock_llm import MockLLM
+
+
+STAGES = ("parse_chapters", "split_content", "split_by_sentence", "format_titles_batch", "render_text")
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+
+@dataclass(slots=True)
+class StageResult:
+    stage: str
+    language: str
+    size_mb: float
+    seconds: float
+    mb_per_s: float
+    items: int
+    peak_mb: float | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.language}/{self.size_mb:g}MB/{self.stage}"
+
+
+def _prepare(text: str, config: AppConfig, latency: float) -> dict[str, Callable[[], int]]:
+    # 各阶段的输入提前准备好，计时只覆盖阶段本身。
+    splitter = config.splitter
+    chapters = parse_chapters(text, llm_client=None).chapters
+    contents = [chapter.content for chapter in chapters]
+
+    title_inputs: list[TitleFormatInput] = []
+    render_chapters: list[RenderChapter] = []
+    for chapter in chapters:
+        for piece in split_chapter(
+            chapter,
+            target_chars=splitter.target_chars,
+            min_ratio=splitter.min_ratio,
+            max_ratio=splitter.max_ratio,
+            split_search_range=splitter.split_search_range,
+        ):
+            title_inputs.append(TitleFormatInput(piece.original_title, len(title_inputs) + 1, piece.part, piece.total))
+            render_chapters.append(RenderChapter(title=piece.original_title, content=piece.content))
+
+    title_config = config.llm.title_formatting
+
+    def run_parse() -> int:
+        return len(parse_chapters(text, llm_client=None).chapters)
+
+    def run_split_content() -> int:
+        return sum(
+            len(
+                split_content(
+                    content,
+                    splitter.target_chars,
+                    splitter.min_ratio,
+                    splitter.max_ratio,
+                    splitter.split_search_range,
+                )
+            )
+            for content in contents
+        )
+
+    def run_split_by_sentence() -> int:
+        return sum(len(split_by_sentence(content, splitter.target_chars)) for content in contents)
+
+    def run_format_titles() -> int:
+        return len(
+            format_titles_batch(
+                title_inputs,
+                language="zh",
+                formats=config.formats,
+                batch_size=title_config.batch_size,
+                llm_client=MockLLM(latency),
+                max_concurrency=title_config.max_concurrency,
+                token_budget=title_config.token_budget,
+            )
+        )
+
+    def run_render() -> int:
+        rendered = render_text(
+            render_chapters,
+            separator=splitter.separator,
+            blank_lines=config.output.blank_lines_between_chapters,
+        )
+        return len(render_chapters) if rendered else 0
+
+    return {
+        "parse_chapters": run_parse,
+        "split_content": run_split_content,
+        "split_by_sentence": run_split_by_sentence,
+        "format_titles_batch": run_format_titles,
+        "render_text": run_render,
+    }
+
+
+def _measure(runner: Callable[[], int], repeat: int, memory: bool) -> tuple[float, int, float | None]:
+    best = float("inf")
+    items = 0
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        items = runner()
+        best = min(best, time.perf_counter() - started)
+
+    peak_mb = None
+    if memory:
+        # tracemalloc 会拖慢执行，峰值内存单独再跑一遍统计，不影响计时。
+        tracemalloc.start()
+        try:
+            runner()
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    return best, items, peak_mb
+
+
+def run_suite(
+    *,
+    sizes_mb: list[float],
+    languages: list[str],
+    stages: list[str] | None = None,
+    latency: float = 0.0,
+    repeat: int = 1,
+    memory: bool = True,
+    seed: int = 7,
+) -> list[StageResult]:
+    config = AppConfig()
+    results: list[StageResult] = []
+    for language in languages:
+        for size_mb in sizes_mb:
+            text = generate_novel(size_mb, language=language, seed=seed)
+            source_mb = len(text.encode("utf-8")) / (1024 * 1024)
+            runners = _prepare(text, config, latency)
+            for stage in stages or STAGES:
+                seconds, items, peak_mb = _measure(runners[stage], repeat, memory)
+                results.append(
+                    StageResult(
+                        stage=stage,
+                        language=language,
+                        size_mb=size_mb,
+                        seconds=round(seconds, 4),
+                        mb_per_s=round(source_mb / seconds, 2) if seconds > 0 else 0.0,
+                        items=items,
+                        peak_mb=round(peak_mb, 2) if peak_mb is not None else None,
+                    )
+                )
+    return results
+
+
+def compare_with_baseline(
+    results: list[StageResult],
+    baseline: dict[str, Any],
+    tolerance: float,
+) -> list[dict[str, Any]]:
+    reference = baseline.get("results", {})
+    rows: list[dict[str, Any]] = []
+    for result in results:
+        expected = reference.get(result.key)
+        if not expected:
+            continue
+        ratio = result.mb_per_s / expected["mb_per_s"] if expected["mb_per_s"] else 0.0
+        rows.append(
+            {
+                "key": result.key,
+                "baseline_mb_per_s": expected["mb_per_s"],
+                "mb_per_s": result.mb_per_s,
+                "ratio": round(ratio, 2),
+                "regression": ratio < 1 - tolerance,
+            }
+        )
+    return rows
+
+
+def _baseline_payload(results: list[StageResult]) -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {result.key: {"mb_per_s": result.mb_per_s, "peak_mb": result.peak_mb} for result in results},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="按阶段测量吞吐（MB/s）与峰值内存，并与基线对比")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1.0], help="样本大小（MB），可到 1024")
+    parser.add_argument("--languages", nargs="+", choices=LANGUAGES, default=list(LANGUAGES))
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=None)
+    parser.add_argument("--latency", type=float, default=0.0, help="mock LLM 每次调用的延迟（秒）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段重复次数，取最快一次")
+    parser.add_argument("--no-memory", action="store_true", help="跳过峰值内存统计")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--write-baseline", action="store_true", help="用本次结果覆盖基线文件")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="吞吐低于基线多少比例算回退")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    results = run_suite(
+        sizes_mb=args.sizes,
+        languages=args.languages,
+        stages=args.stages,
+        latency=args.latency,
+        repeat=args.repeat,
+        memory=not args.no_memory,
+    )
+    report: dict[str, Any] = {"results": [asdict(result) for result in results]}
+
+    if args.write_baseline:
+        args.baseline.write_text(json.dumps(_baseline_payload(results), indent=2) + "\n", encoding="utf-8")
+        report["baseline_written"] = str(args.baseline)
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        report["comparison"] = compare_with_baseline(results, baseline, args.tolerance)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.fail_on_regression and any(row["regression"] for row in report.get("comparison", [])):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
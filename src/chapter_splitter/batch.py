@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+import copy
+import glob
+import json
+import os
+import time
+from typing import Any
+
+from .config import AppConfig
+from .pipeline import ChapterSplitterPipeline
+from .renderer import default_output_path, output_target
+
+
+SPLIT_OUTPUT_SUFFIX = "_split.txt"
+
+
+@dataclass(slots=True)
+class BatchItem:
+    input_path: Path
+    output_path: Path
+
+    def is_up_to_date(self, output_mode: str = "single") -> bool:
+        target = output_target(self.output_path, output_mode)
+        if not target.exists():
+            return False
+        return target.stat().st_mtime >= self.input_path.stat().st_mtime
+
+
+def collect_batch_items(source: str, pattern: str = "*.txt", output_dir: Path | None = None) -> list[BatchItem]:
+    source_path = Path(source)
+    if source_path.is_dir():
+        candidates = sorted(source_path.glob(pattern))
+    else:
+        candidates = sorted(Path(path) for path in glob.glob(source, recursive=True))
+
+    items: list[BatchItem] = []
+    for input_path in candidates:
+        if not input_path.is_file() or input_path.name.endswith(SPLIT_OUTPUT_SUFFIX):
+            continue
+        if output_dir is not None:
+            output_path = output_dir / f"{input_path.stem}{SPLIT_OUTPUT_SUFFIX}"
+        else:
+            output_path = default_output_path(input_path)
+        items.append(BatchItem(input_path=input_path, output_path=output_path))
+    return items
+
+
+_WORKER_PIPELINE: ChapterSplitterPipeline | None = None
+
+
+def _init_worker(config: AppConfig) -> None:
+    global _WORKER_PIPELINE
+    _WORKER_PIPELINE = ChapterSplitterPipeline(config)
+
+
+def _init_pool_worker(config: AppConfig) -> None:
+    from multiprocessing.util import Finalize
+
+    _init_worker(config)
+    # 进程池的子进程退出时不跑 atexit（fork 出来的子进程直接 os._exit），
+    # 用 multiprocessing 的退出钩子关闭 LLM 连接池、响应缓存和正则库。
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker() -> None:
+    global _WORKER_PIPELINE
+    pipeline, _WORKER_PIPELINE = _WORKER_PIPELINE, None
+    if pipeline is not None:
+        pipeline.close()
+
+
+def _per_worker_config(config: AppConfig, workers: int) -> AppConfig:
+    # 每个工作进程各有一个限速调度器，把每分钟额度平分，合起来不超过配置值。
+    scaled = copy.deepcopy(config)
+    scaled.llm.rate_limit.requests_per_minute = config.llm.rate_limit.requests_per_minute / workers
+    scaled.llm.rate_limit.tokens_per_minute = config.llm.rate_limit.tokens_per_minute / workers
+    # 批量模式已按文件占满各核，单本书内不再起切分进程池。
+    scaled.pipeline.split_workers = 1
+    return scaled
+
+
+def _process_item(item: BatchItem) -> dict[str, Any]:
+    record: dict[str, Any] = {"input_path": str(item.input_path), "output_path": str(item.output_path)}
+    started = time.perf_counter()
+    try:
+        item.output_path.parent.mkdir(parents=True, exist_ok=True)
+        result = _WORKER_PIPELINE.process(input_path=item.input_path, output_path=item.output_path)
+    except Exception as exc:
+        record.update(status="error", error=f"{type(exc).__name__}: {exc}")
+    else:
+        record.update(status="ok", **result.to_dict())
+    record["seconds"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+def _iter_results(config: AppConfig, items: list[BatchItem], workers: int) -> Iterator[dict[str, Any]]:
+    if workers <= 1 or len(items) <= 1:
+        _init_worker(config)
+        try:
+            for item in items:
+                yield _process_item(item)
+        finally:
+            _close_worker()
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_pool_worker, initargs=(_per_worker_config(config, workers),)
+    ) as executor:
+        futures = [executor.submit(_process_item, item) for item in items]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_batch(
+    config: AppConfig,
+    items: list[BatchItem],
+    *,
+    summary_path: Path,
+    workers: int = 0,
+    force: bool = False,
+) -> list[dict[str, Any]]:
+    worker_count = workers if workers > 0 else (os.cpu_count() or 1)
+
+    pending: list[BatchItem] = []
+    records: list[dict[str, Any]] = []
+    for item in items:
+        if not force and config.batch.skip_up_to_date and item.is_up_to_date(config.output.mode):
+            records.append(
+                {"input_path": str(item.input_path), "output_path": str(item.output_path), "status": "skipped"}
+            )
+        else:
+            pending.append(item)
+
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    with summary_path.open("w", encoding="utf-8") as handle:
+        for record in records:
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        for record in _iter_results(config, pending, min(worker_count, max(1, len(pending)))):
+            records.append(record)
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+            handle.flush()
+
+    return records
@@ -4,6 +4,7 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 import os
+import re
 
 import yaml
 from dotenv import load_dotenv
@@ -13,6 +14,19 @@ from dotenv import load_dotenv
 class RetryConfig:
     max_attempts: int = 3
     delay_seconds: int = 2
+    max_delay_seconds: int = 30
+
+
+@dataclass(slots=True)
+class RateLimitConfig:
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+
+
+@dataclass(slots=True)
+class CircuitBreakerConfig:
+    failure_threshold: int = 5
+    reset_seconds: float = 60
 
 
 @dataclass(slots=True)
@@ -20,11 +34,38 @@ class ChapterDetectionConfig:
     enable_llm_fallback: bool = True
     sample_size: int = 2000
     sample_count: int = 3
+    library_enabled: bool = True
+    library_path: str = ".cache/chapter_patterns.sqlite3"
+    library_candidates: int = 20
+
+
+@dataclass(slots=True)
+class LanguageDetectionConfig:
+    sample_size: int = 2000
+    sample_count: int = 8
+    skip_llm_confidence: float = 0.9
 
 
 @dataclass(slots=True)
 class TitleFormattingConfig:
     batch_size: int = 20
+    token_budget: int = 2000
+    max_concurrency: int = 4
+
+
+@dataclass(slots=True)
+class CacheConfig:
+    enabled: bool = True
+    path: str = ".cache/llm_responses.sqlite3"
+    max_size_mb: int = 256
+    max_age_days: int = 30
+
+
+@dataclass(slots=True)
+class ConnectionConfig:
+    max_connections: int = 10
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
 
 
 @dataclass(slots=True)
@@ -35,8 +76,13 @@ class LLMConfig:
     model: str = "deepseek-chat"
     timeout: int = 30
     retry: RetryConfig = field(default_factory=RetryConfig)
+    rate_limit: RateLimitConfig = field(default_factory=RateLimitConfig)
+    circuit_breaker: CircuitBreakerConfig = field(default_factory=CircuitBreakerConfig)
     chapter_detection: ChapterDetectionConfig = field(default_factory=ChapterDetectionConfig)
+    language_detection: LanguageDetectionConfig = field(default_factory=LanguageDetectionConfig)
     title_formatting: TitleFormattingConfig = field(default_factory=TitleFormattingConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    connection: ConnectionConfig = field(default_factory=ConnectionConfig)
 
 
 @dataclass(slots=True)
@@ -52,6 +98,47 @@ class SplitterConfig:
 class OutputConfig:
     encoding: str = "utf-8"
     blank_lines_between_chapters: int = 2
+    incremental: bool = False
+    index: bool = False
+    mode: str = "single"
+    shard_size: int = 100
+    write_workers: int = 1
+
+
+@dataclass(slots=True)
+class InputConfig:
+    reader: str = "full"
+    encoding: str = "auto"
+
+
+@dataclass(slots=True)
+class BatchConfig:
+    workers: int = 0
+    pattern: str = "*.txt"
+    skip_up_to_date: bool = True
+
+
+@dataclass(slots=True)
+class ServeConfig:
+    host: str = "127.0.0.1"
+    port: int = 8765
+    socket: str = ""
+    workers: int = 2
+    queue_size: int = 16
+    # 请求体上限，超出返回 413；0 表示不限。
+    max_body_mb: int = 64
+
+
+@dataclass(slots=True)
+class PipelineConfig:
+    async_mode: bool = False
+    columnar: bool = False
+    split_workers: int = 1
+
+
+@dataclass(slots=True)
+class StatsConfig:
+    enabled: bool = False
 
 
 @dataclass(slots=True)
@@ -65,7 +152,12 @@ class AppConfig:
     llm: LLMConfig = field(default_factory=LLMConfig)
     splitter: SplitterConfig = field(default_factory=SplitterConfig)
     output: OutputConfig = field(default_factory=OutputConfig)
+    input: InputConfig = field(default_factory=InputConfig)
+    batch: BatchConfig = field(default_factory=BatchConfig)
     fallback: FallbackConfig = field(default_factory=FallbackConfig)
+    stats: StatsConfig = field(default_factory=StatsConfig)
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    serve: ServeConfig = field(default_factory=ServeConfig)
     formats: dict[str, str] = field(
         default_factory=lambda: {
             "zh": "第{num}章：{title} ({part}/{total})",
@@ -85,13 +177,22 @@ def _deep_update(base: dict[str, Any], patch: dict[str, Any]) -> dict[str, Any]:
     return base
 
 
+_BRACED_VAR = re.compile(r"\$\{(\w+)\}")
+
+
+def _expand_env(value: str) -> str:
+    # 未设置的 ${VAR} 视为空串：否则 api_key 会是字面量 "${DEEPSEEK_API_KEY}"，LLM 被误判为已启用。
+    value = _BRACED_VAR.sub(lambda matched: os.environ.get(matched.group(1), ""), value)
+    return os.path.expandvars(value)
+
+
 def _resolve_env(data: Any) -> Any:
     if isinstance(data, dict):
         return {key: _resolve_env(value) for key, value in data.items()}
     if isinstance(data, list):
         return [_resolve_env(item) for item in data]
     if isinstance(data, str):
-        return os.path.expandvars(data)
+        return _expand_env(data)
     return data
 
 
@@ -120,8 +221,13 @@ def load_config(config_path: str | None = None, overrides: dict[str, Any] | None
 
     llm_data = merged.get("llm", {})
     retry = RetryConfig(**llm_data.get("retry", {}))
+    rate_limit = RateLimitConfig(**llm_data.get("rate_limit", {}))
+    circuit_breaker = CircuitBreakerConfig(**llm_data.get("circuit_breaker", {}))
     chapter_detection = ChapterDetectionConfig(**llm_data.get("chapter_detection", {}))
+    language_detection = LanguageDetectionConfig(**llm_data.get("language_detection", {}))
     title_formatting = TitleFormattingConfig(**llm_data.get("title_formatting", {}))
+    cache = CacheConfig(**llm_data.get("cache", {}))
+    connection = ConnectionConfig(**llm_data.get("connection", {}))
 
     llm_config = LLMConfig(
         provider=llm_data.get("provider", "deepseek"),
@@ -130,25 +236,67 @@ def load_config(config_path: str | None = None, overrides: dict[str, Any] | None
         model=llm_data.get("model", "deepseek-chat"),
         timeout=llm_data.get("timeout", 30),
         retry=retry,
+        rate_limit=rate_limit,
+        circuit_breaker=circuit_breaker,
         chapter_detection=chapter_detection,
+        language_detection=language_detection,
         title_formatting=title_formatting,
+        cache=cache,
+        connection=connection,
     )
 
     splitter_config = SplitterConfig(**merged.get("splitter", {}))
     output_config = OutputConfig(**merged.get("output", {}))
+    input_config = InputConfig(**merged.get("input", {}))
+    batch_config = BatchConfig(**merged.get("batch", {}))
     fallback_config = FallbackConfig(**merged.get("fallback", {}))
+    stats_config = StatsConfig(**merged.get("stats", {}))
+    pipeline_config = PipelineConfig(**merged.get("pipeline", {}))
+    serve_config = ServeConfig(**merged.get("serve", {}))
     formats = merged.get("formats", {})
 
     return AppConfig(
         llm=llm_config,
         splitter=splitter_config,
         output=output_config,
+        input=input_config,
+        batch=batch_config,
         fallback=fallback_config,
+        stats=stats_config,
+        pipeline=pipeline_config,
+        serve=serve_config,
         formats=formats,
     )
 
 
-def apply_cli_overrides(config: AppConfig, target_chars: int | None = None) -> AppConfig:
+def apply_cli_overrides(
+    config: AppConfig,
+    target_chars: int | None = None,
+    reader: str | None = None,
+    incremental: bool | None = None,
+    stats: bool | None = None,
+    async_mode: bool | None = None,
+    split_workers: int | None = None,
+    encoding: str | None = None,
+    index: bool | None = None,
+    output_mode: str | None = None,
+) -> AppConfig:
     if target_chars is not None and target_chars > 0:
         config.splitter.target_chars = target_chars
+    if reader:
+        config.input.reader = reader
+    if incremental is not None:
+        config.output.incremental = incremental
+    if stats:
+        config.stats.enabled = True
+    if async_mode is not None:
+        config.pipeline.async_mode = async_mode
+    if split_workers is not None and split_workers >= 0:
+        config.pipeline.split_workers = split_workers
+    if encoding:
+        config.input.encoding = encoding
+    if index is not None:
+        config.output.index = index
+    if output_mode:
+        config.output.mode = output_mode
     return config
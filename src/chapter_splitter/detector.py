@@ -1,10 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
 
+from .encoding import offset_decoding
 from .utils.text import sample_text_chunks
 
 
+# 多段检测样本之间的分隔行。
+SAMPLE_BREAK = "--- SAMPLE BREAK ---"
+
+
 @dataclass(slots=True)
 class LanguageDetectionResult:
     language: str
@@ -12,12 +19,29 @@ class LanguageDetectionResult:
     source: str
 
 
+# U+4E00..U+9FFF 的 UTF-8 编码：E4 B8..BF 开头，或首字节为 E5..E9。
+_CJK_LEAD_BYTES = bytes(range(0xE5, 0xEA))
+_CJK_E4_PREFIXES = tuple(bytes((0xE4, second)) for second in range(0xB8, 0xC0))
+_NOT_ASCII_LETTERS = bytes(value for value in range(256) if not chr(value).isascii() or not chr(value).isalpha())
+# 除 ASCII 字母外，只有这两个字符满足 "a" <= ch.lower() <= "z"。
+_LATIN_EXTRA = ("\u0130".encode("utf-8"), "\u212a".encode("utf-8"))
+
+
+def _count_scripts(sample_text: str) -> tuple[int, int]:
+    # 编码成 UTF-8 后用 bytes.translate / bytes.count 在 C 层计数，避免逐字符的 Python 循环。
+    data = sample_text.encode("utf-8", errors="surrogatepass")
+    zh_chars = len(data) - len(data.translate(None, _CJK_LEAD_BYTES))
+    zh_chars += sum(data.count(prefix) for prefix in _CJK_E4_PREFIXES)
+    latin_chars = len(data.translate(None, _NOT_ASCII_LETTERS))
+    latin_chars += sum(data.count(extra) for extra in _LATIN_EXTRA)
+    return zh_chars, latin_chars
+
+
 def _heuristic_detect_language(sample_text: str) -> LanguageDetectionResult:
     if not sample_text.strip():
         return LanguageDetectionResult(language="unknown", confidence=0.0, source="heuristic")
 
-    zh_chars = sum(1 for ch in sample_text if "\u4e00" <= ch <= "\u9fff")
-    latin_chars = sum(1 for ch in sample_text if ("a" <= ch.lower() <= "z"))
+    zh_chars, latin_chars = _count_scripts(sample_text)
 
     if zh_chars == 0 and latin_chars == 0:
         return LanguageDetectionResult(language="unknown", confidence=0.1, source="heuristic")
@@ -34,22 +58,78 @@ def _heuristic_detect_language(sample_text: str) -> LanguageDetectionResult:
     return LanguageDetectionResult(language="mixed", confidence=max(zh_ratio, latin_ratio), source="heuristic")
 
 
-def detect_language(text: str, llm_client: object | None = None, sample_chars: int = 500) -> LanguageDetectionResult:
-    sample = text[:sample_chars]
-    heuristic = _heuristic_detect_language(sample)
-
-    if llm_client is None:
-        return heuristic
-
-    detector = getattr(llm_client, "detect_language", None)
-    if detector is None:
-        return heuristic
-
-    try:
-        result = detector(sample)
-    except Exception:
-        return heuristic
-
+def _spread_offsets(length: int, sample_size: int, sample_count: int) -> list[int]:
+    if length <= sample_size or sample_count <= 1:
+        return [0]
+    max_start = length - sample_size
+    return sorted({round(max_start * i / (sample_count - 1)) for i in range(sample_count)})
+
+
+def language_samples(text: str, sample_size: int = 500, sample_count: int = 1) -> list[str]:
+    """从全文均匀取 sample_count 段样本（首段从开头取），不复制全文。"""
+    sample_size = max(1, sample_size)
+    return [text[pos : pos + sample_size] for pos in _spread_offsets(len(text), sample_size, sample_count)]
+
+
+def read_language_samples(
+    path: Path,
+    sample_size: int = 500,
+    sample_count: int = 1,
+    encoding: str = "utf-8",
+) -> list[str]:
+    """按字节偏移从文件各处读取样本，流式 / mmap 读取时无需读入全文；UTF-16/32 的偏移按码元对齐。"""
+    # 样本按字符计，读取时按每字符最多 4 字节多读；首尾被截断的半个字符直接忽略。
+    byte_size = max(1, sample_size) * 4
+    samples: list[str] = []
+    with path.open("rb") as handle:
+        codec, start, unit = offset_decoding(encoding, handle.read(4))
+        for pos in _spread_offsets(path.stat().st_size - start, byte_size, sample_count):
+            handle.seek(start + pos - pos % unit)
+            chunk = handle.read(byte_size)
+            if pos and unit == 1 and codec != "utf-8":
+                # GB18030 等双字节编码的后半字节可能落在 ASCII 区，从中间读会错位成乱码；
+                # 换行字节不会出现在多字节字符里，跳到下一行开头再解码。
+                newline = chunk.find(b"\n")
+                if newline >= 0:
+                    chunk = chunk[newline + 1 :]
+            samples.append(chunk.decode(codec, errors="ignore")[:sample_size])
+    return samples
+
+
+def _llm_language_sample(samples: list[str], sample_chars: int) -> str:
+    if len(samples) == 1:
+        return samples[0][:sample_chars]
+    per_sample = max(100, sample_chars // len(samples))
+    return "\n".join(sample[:per_sample] for sample in samples)
+
+
+def detect_language(
+    text: str,
+    llm_client: object | None = None,
+    sample_chars: int = 500,
+    *,
+    sample_count: int = 1,
+    skip_llm_confidence: float | None = None,
+) -> LanguageDetectionResult:
+    samples = language_samples(text, sample_size=sample_chars, sample_count=sample_count)
+    return detect_language_from_samples(
+        samples,
+        llm_client=llm_client,
+        llm_sample_chars=sample_chars,
+        skip_llm_confidence=skip_llm_confidence,
+    )
+
+
+def _needs_llm(heuristic: LanguageDetectionResult, skip_llm_confidence: float | None) -> bool:
+    # 启发式足够确定时不再调用 LLM。
+    return not (
+        skip_llm_confidence is not None
+        and heuristic.language in {"zh", "en"}
+        and heuristic.confidence >= skip_llm_confidence
+    )
+
+
+def _from_llm_result(result: Any, heuristic: LanguageDetectionResult) -> LanguageDetectionResult:
     if not result:
         return heuristic
 
@@ -66,6 +146,56 @@ def detect_language(text: str, llm_client: object | None = None, sample_chars: i
     return heuristic
 
 
+def detect_language_from_samples(
+    samples: list[str],
+    llm_client: object | None = None,
+    *,
+    llm_sample_chars: int = 500,
+    skip_llm_confidence: float | None = None,
+) -> LanguageDetectionResult:
+    heuristic = _heuristic_detect_language("".join(samples))
+    if llm_client is None or not _needs_llm(heuristic, skip_llm_confidence):
+        return heuristic
+
+    detector = getattr(llm_client, "detect_language", None)
+    if detector is None:
+        return heuristic
+
+    try:
+        result = detector(_llm_language_sample(samples, llm_sample_chars))
+    except Exception:
+        return heuristic
+    return _from_llm_result(result, heuristic)
+
+
+async def adetect_language_from_samples(
+    samples: list[str],
+    llm_client: object | None = None,
+    *,
+    llm_sample_chars: int = 500,
+    skip_llm_confidence: float | None = None,
+) -> LanguageDetectionResult:
+    heuristic = _heuristic_detect_language("".join(samples))
+    if llm_client is None or not _needs_llm(heuristic, skip_llm_confidence):
+        return heuristic
+
+    sample = _llm_language_sample(samples, llm_sample_chars)
+    adetector = getattr(llm_client, "adetect_language", None)
+    detector = getattr(llm_client, "detect_language", None)
+    try:
+        if adetector is not None:
+            result = await adetector(sample)
+        elif detector is not None:
+            import asyncio
+
+            result = await asyncio.to_thread(detector, sample)
+        else:
+            return heuristic
+    except Exception:
+        return heuristic
+    return _from_llm_result(result, heuristic)
+
+
 def build_detection_samples(text: str, sample_size: int = 2000, sample_count: int = 3) -> str:
     chunks = sample_text_chunks(text, sample_size=sample_size, sample_count=sample_count)
-    return "\n\n--- SAMPLE BREAK ---\n\n".join(chunks)
+    return f"\n\n{SAMPLE_BREAK}\n\n".join(chunks)
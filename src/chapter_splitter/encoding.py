@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from pathlib import Path
+import codecs
+
+
+# 嗅探只读文件开头这么多字节，再大的书也不用整读一遍。
+SNIFF_BYTES = 64 * 1024
+
+# UTF-32-LE 的 BOM 以 UTF-16-LE 的 BOM 开头，必须先比 UTF-32。
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32", "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32", "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8-sig", "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16", "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16", "utf-16-be"),
+)
+_CODE_UNITS = {"utf-16-le": 2, "utf-16-be": 2, "utf-32-le": 4, "utf-32-be": 4}
+# 无 BOM 的 UTF-16：ASCII 字符的高字节是 0，NUL 会集中在奇数位（LE）或偶数位（BE）。
+_UTF16_NUL_RATIO = 0.3
+# 中文为主的无 BOM UTF-16 很少有 NUL，改看解码后常见文本字符的占比。
+_UTF16_TEXT_RATIO = 0.9
+_UTF16_TEXT_BYTES = 4096
+_TEXT_RANGES = ((0x2000, 0x206F), (0x3000, 0x303F), (0x4E00, 0x9FFF), (0xFF00, 0xFFEF))
+
+
+def _decode_prefix(prefix: bytes, encoding: str) -> str | None:
+    # 增量解码且不收尾：前缀末尾被截断的半个字符不算错。
+    try:
+        return codecs.getincrementaldecoder(encoding)().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return None
+
+
+def _is_common_text_char(char: str) -> bool:
+    code = ord(char)
+    if code < 0x80:
+        return char.isprintable() or char in "\r\n\t"
+    return any(low <= code <= high for low, high in _TEXT_RANGES)
+
+
+def _utf16_by_nuls(prefix: bytes) -> str | None:
+    pairs = len(prefix) // 2
+    if not pairs:
+        return None
+    even_nuls = prefix[0 : pairs * 2 : 2].count(0)
+    odd_nuls = prefix[1 : pairs * 2 : 2].count(0)
+    if odd_nuls >= pairs * _UTF16_NUL_RATIO and even_nuls < odd_nuls // 4:
+        return "utf-16-le" if _decode_prefix(prefix, "utf-16-le") is not None else None
+    if even_nuls >= pairs * _UTF16_NUL_RATIO and odd_nuls < even_nuls // 4:
+        return "utf-16-be" if _decode_prefix(prefix, "utf-16-be") is not None else None
+    return None
+
+
+def _utf16_by_text(prefix: bytes) -> str | None:
+    for encoding in ("utf-16-le", "utf-16-be"):
+        decoded = _decode_prefix(prefix[:_UTF16_TEXT_BYTES], encoding)
+        if decoded and sum(map(_is_common_text_char, decoded)) >= len(decoded) * _UTF16_TEXT_RATIO:
+            return encoding
+    return None
+
+
+def sniff_encoding(prefix: bytes) -> str:
+    """按文件开头的字节猜编码：先认 BOM，再试 UTF-8 与无 BOM 的 UTF-16，最后是 GB18030；都不像时按 UTF-8 处理。"""
+    for bom, encoding, _ in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    # NUL 也是合法的 UTF-8，以 ASCII 为主的无 BOM UTF-16 要先于 UTF-8 判断。
+    utf16 = _utf16_by_nuls(prefix)
+    if utf16 is not None:
+        return utf16
+    if _decode_prefix(prefix, "utf-8") is not None:
+        return "utf-8"
+    # 反过来，纯 ASCII 的 UTF-8 按 UTF-16 解码也全是汉字，按字符占比判断只能放在 UTF-8 之后。
+    utf16 = _utf16_by_text(prefix)
+    if utf16 is not None:
+        return utf16
+    # GB18030 覆盖 GB2312 / GBK，是中文 TXT 除 UTF-8 外最常见的编码。
+    if _decode_prefix(prefix, "gb18030") is not None:
+        return "gb18030"
+    return "utf-8"
+
+
+def detect_encoding(path: Path, encoding: str = "auto") -> str:
+    """配置为 auto 时嗅探文件编码，否则原样返回配置的编码。"""
+    if encoding.lower() != "auto":
+        return encoding
+    with path.open("rb") as handle:
+        return sniff_encoding(handle.read(SNIFF_BYTES))
+
+
+def offset_decoding(encoding: str, head: bytes) -> tuple[str, int, int]:
+    """按字节偏移解码文件片段时用的 (编码, BOM 字节数, 码元字节数)：片段里不再有 BOM，偏移要按码元对齐。"""
+    name = codecs.lookup(encoding).name
+    for bom, bom_encoding, body_encoding in _BOMS:
+        if name == bom_encoding and head.startswith(bom):
+            return body_encoding, len(bom), _CODE_UNITS.get(body_encoding, 1)
+    if name in {"utf-16", "utf-32"}:
+        # 没有 BOM 时 Python 按小端解码。
+        name = f"{name}-le"
+    elif name == "utf-8-sig":
+        name = "utf-8"
+    return name, 0, _CODE_UNITS.get(name, 1)
@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 import itertools
 import re
-from typing import Any
+import string
+from typing import TYPE_CHECKING, Any
+
+from .utils.text import estimate_tokens
+
+
+if TYPE_CHECKING:
+    import asyncio
 
 
 CHAPTER_NO_PATTERNS = (
@@ -44,39 +54,196 @@ def _normalize_title_text(title: str) -> str:
     return normalized.strip() or title.strip()
 
 
-def _format_local(entry: TitleFormatInput, chapter_num: int, language: str, formats: dict[str, str]) -> str:
+_DEFAULT_FORMATS = {
+    "zh": "第{num}章：{title} ({part}/{total})",
+    "zh_no_split": "第{num}章：{title}",
+    "en": "Chapter {num}: {title} (part {part})",
+    "en_no_split": "Chapter {num}: {title}",
+}
+
+
+def title_templates(language: str, formats: dict[str, str]) -> dict[str, str]:
+    """该语言下未拆分（single）与拆分（split）章节的标题模板，配置里没有的取默认值。"""
+    prefix = "zh" if language == "zh" else "en"
+    return {
+        "single": formats.get(f"{prefix}_no_split", _DEFAULT_FORMATS[f"{prefix}_no_split"]),
+        "split": formats.get(prefix, _DEFAULT_FORMATS[prefix]),
+    }
+
+
+def _template_for(entry: TitleFormatInput, templates: dict[str, str]) -> str:
+    return templates["split" if entry.total > 1 else "single"]
+
+
+def _format_local(entry: TitleFormatInput, chapter_num: int, templates: dict[str, str]) -> str:
     title_body = _normalize_title_text(entry.original_title)
-    is_split = entry.total > 1
-
-    if language == "zh":
-        if is_split:
-            template = formats.get("zh", "第{num}章：{title} ({part}/{total})")
-            return template.format(num=chapter_num, title=title_body, part=entry.part, total=entry.total)
-        template = formats.get("zh_no_split", "第{num}章：{title}")
-        return template.format(num=chapter_num, title=title_body, part=entry.part, total=entry.total)
-
-    template_key = "en" if is_split else "en_no_split"
-    template_default = "Chapter {num}: {title} (part {part})" if is_split else "Chapter {num}: {title}"
-    template = formats.get(template_key, template_default)
+    template = _template_for(entry, templates)
     return template.format(num=chapter_num, title=title_body, part=entry.part, total=entry.total)
 
 
-def _build_llm_payload(entries: list[TitleFormatInput], fallback_titles: list[str]) -> list[dict[str, Any]]:
+def _template_regex(template: str) -> re.Pattern[str]:
+    # 模板里的字面文字原样匹配，{title} 匹配任意非空正文，编号字段匹配数字并在校验时比对取值。
+    parts: list[str] = []
+    seen: set[str] = set()
+    for literal, field_name, _, _ in string.Formatter().parse(template):
+        parts.append(re.escape(literal))
+        if field_name is None:
+            continue
+        if field_name in seen:
+            parts.append(f"(?P={field_name})")
+        elif field_name == "title":
+            parts.append(r"(?P<title>\S.*?)")
+        else:
+            parts.append(rf"(?P<{field_name}>\d+)")
+        seen.add(field_name)
+    return re.compile("".join(parts))
+
+
+class _TitleChecker:
+    """校验 LLM 返回的标题是否符合配置的模板，且章节号、分段号与输入一致。"""
+
+    def __init__(self, templates: dict[str, str]) -> None:
+        self.templates = templates
+        self._patterns = {key: _template_regex(template) for key, template in templates.items()}
+
+    def accepts(self, title: str, entry: TitleFormatInput, chapter_num: int) -> bool:
+        matched = self._patterns["split" if entry.total > 1 else "single"].fullmatch(title)
+        if matched is None:
+            return False
+        expected = {"num": chapter_num, "part": entry.part, "total": entry.total}
+        groups = matched.groupdict()
+        return all(int(groups[key]) == value for key, value in expected.items() if key in groups)
+
+
+def _build_llm_payload(entries: list[TitleFormatInput], nums: list[int]) -> list[dict[str, Any]]:
+    # 顺序即下标，不再单独传 index；未拆分的章节不传 part/total；标题模板只在 prompt 开头给一次。
     payload: list[dict[str, Any]] = []
-    for idx, (entry, fallback_title) in enumerate(zip(entries, fallback_titles, strict=True)):
-        payload.append(
-            {
-                "index": idx,
-                "original_title": entry.original_title,
-                "chapter_num": entry.chapter_num,
-                "part": entry.part,
-                "total": entry.total,
-                "fallback_title": fallback_title,
-            }
-        )
+    for entry, chapter_num in zip(entries, nums, strict=True):
+        item: dict[str, Any] = {"original_title": entry.original_title, "chapter_num": chapter_num}
+        if entry.total > 1:
+            item["part"] = entry.part
+            item["total"] = entry.total
+        payload.append(item)
     return payload
 
 
+# 单条标题在 prompt 里除标题正文外的固定开销（键名、章节号、标点），按 token 估算。
+_ITEM_OVERHEAD_TOKENS = 10
+_SPLIT_OVERHEAD_TOKENS = 6
+
+
+def estimate_title_tokens(entry: TitleFormatInput) -> int:
+    """估算一条标题在格式化请求里占用的 token：标题正文加上键名、章节号等固定开销。"""
+    overhead = _ITEM_OVERHEAD_TOKENS + (_SPLIT_OVERHEAD_TOKENS if entry.total > 1 else 0)
+    return estimate_tokens(entry.original_title) + overhead
+
+
+@dataclass(slots=True)
+class TitleBatchPacker:
+    """按条数上限与 token 预算贪心装批；从任一批次起点重新装，得到的批次边界不变。"""
+
+    batch_size: int = 20
+    token_budget: int = 0
+    items: int = 0
+    tokens: int = 0
+
+    def push(self, entry: TitleFormatInput) -> bool:
+        """放入一条标题；返回 True 表示它开启了新的一批（前一批已满）。"""
+        cost = estimate_title_tokens(entry) if self.token_budget > 0 else 0
+        over_budget = self.token_budget > 0 and self.tokens + cost > self.token_budget
+        starts_new = self.items > 0 and (self.items >= max(1, self.batch_size) or over_budget)
+        if starts_new:
+            self.items = self.tokens = 0
+        self.items += 1
+        self.tokens += cost
+        return starts_new
+
+
+def pack_title_batches(entries: list[TitleFormatInput], batch_size: int, token_budget: int = 0) -> list[range]:
+    packer = TitleBatchPacker(batch_size=batch_size, token_budget=token_budget)
+    starts = [idx for idx, entry in enumerate(entries) if packer.push(entry)]
+    bounds = [0, *starts, len(entries)] if entries else []
+    return [range(start, end) for start, end in zip(bounds, bounds[1:])]
+
+
+def _local_results(fallback_titles: list[str]) -> list[TitleFormatResult]:
+    return [TitleFormatResult(title=title, source="local") for title in fallback_titles]
+
+
+def _accept_formatted_chunk(
+    formatted_chunk: Any,
+    entry_chunk: list[TitleFormatInput],
+    nums: list[int],
+    fallback_chunk: list[str],
+    checker: _TitleChecker,
+) -> list[TitleFormatResult]:
+    if not isinstance(formatted_chunk, list) or len(formatted_chunk) != len(fallback_chunk):
+        return _local_results(fallback_chunk)
+
+    # 不符合模板或编号对不上的标题逐条换成兜底标题；符合的即使与兜底相同也算 LLM 的结果。
+    results = []
+    for title, entry, chapter_num, fallback in zip(formatted_chunk, entry_chunk, nums, fallback_chunk, strict=True):
+        cleaned = str(title).strip()
+        if cleaned and checker.accepts(cleaned, entry, chapter_num):
+            results.append(TitleFormatResult(title=cleaned, source="llm"))
+        else:
+            results.append(TitleFormatResult(title=fallback, source="local"))
+    return results
+
+
+def _chapter_nums(entries: list[TitleFormatInput]) -> list[int]:
+    # 没有章节号的标题按前一章顺延编号。
+    nums = []
+    serial = 1
+    for entry in entries:
+        chapter_num = entry.chapter_num if entry.chapter_num is not None else serial
+        nums.append(chapter_num)
+        serial = max(serial + 1, chapter_num + 1)
+    return nums
+
+
+@dataclass(slots=True)
+class _TitleJob:
+    entries: list[TitleFormatInput]
+    nums: list[int]
+    fallback_titles: list[str]
+    checker: _TitleChecker
+
+    @classmethod
+    def build(cls, entries: list[TitleFormatInput], language: str, formats: dict[str, str]) -> _TitleJob:
+        templates = title_templates(language, formats)
+        nums = _chapter_nums(entries)
+        fallback_titles = [_format_local(entry, num, templates) for entry, num in zip(entries, nums, strict=True)]
+        return cls(entries, nums, fallback_titles, _TitleChecker(templates))
+
+    def payload(self, batch: range) -> list[dict[str, Any]]:
+        return _build_llm_payload(self.entries[batch.start : batch.stop], self.nums[batch.start : batch.stop])
+
+    def accept(self, batch: range, formatted_chunk: Any) -> list[TitleFormatResult]:
+        return _accept_formatted_chunk(
+            formatted_chunk,
+            self.entries[batch.start : batch.stop],
+            self.nums[batch.start : batch.stop],
+            self.fallback_titles[batch.start : batch.stop],
+            self.checker,
+        )
+
+
+def _format_llm_chunk(
+    formatter: Callable[..., Any],
+    language: str,
+    job: _TitleJob,
+    batch: range,
+) -> list[TitleFormatResult]:
+    formatted_chunk = None
+    try:
+        formatted_chunk = formatter(job.payload(batch), language, templates=job.checker.templates)
+    except Exception:
+        formatted_chunk = None
+
+    return job.accept(batch, formatted_chunk)
+
+
 def format_titles_batch(
     entries: list[TitleFormatInput],
     *,
@@ -84,55 +251,75 @@ def format_titles_batch(
     formats: dict[str, str],
     batch_size: int = 20,
     llm_client: object | None = None,
+    max_concurrency: int = 1,
+    token_budget: int = 0,
 ) -> list[TitleFormatResult]:
     if not entries:
         return []
 
-    numbered = []
-    serial = 1
-    for entry in entries:
-        chapter_num = entry.chapter_num if entry.chapter_num is not None else serial
-        numbered.append((entry, chapter_num))
-        serial = max(serial + 1, chapter_num + 1)
-
-    fallback_titles = [
-        _format_local(entry, chapter_num=chapter_num, language=language, formats=formats)
-        for entry, chapter_num in numbered
-    ]
+    job = _TitleJob.build(entries, language, formats)
 
     if llm_client is None:
-        return [TitleFormatResult(title=title, source="local") for title in fallback_titles]
+        return _local_results(job.fallback_titles)
 
     formatter = getattr(llm_client, "format_titles", None)
     if formatter is None:
-        return [TitleFormatResult(title=title, source="local") for title in fallback_titles]
+        return _local_results(job.fallback_titles)
 
-    results: list[str] = []
-    size = max(1, batch_size)
+    batches = pack_title_batches(entries, batch_size, token_budget)
+    format_chunk = partial(_format_llm_chunk, formatter, language, job)
 
-    for start in range(0, len(entries), size):
-        end = start + size
-        entry_chunk = entries[start:end]
-        fallback_chunk = fallback_titles[start:end]
+    workers = min(max(1, max_concurrency), len(batches))
+    if workers == 1:
+        chunk_results = list(map(format_chunk, batches))
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="title-format") as executor:
+            chunk_results = list(executor.map(format_chunk, batches))
 
-        payload = _build_llm_payload(entry_chunk, fallback_chunk)
-        formatted_chunk = None
-        try:
-            formatted_chunk = formatter(payload, language)
-        except Exception:
-            formatted_chunk = None
+    return list(itertools.chain.from_iterable(chunk_results))
 
-        if not isinstance(formatted_chunk, list) or len(formatted_chunk) != len(entry_chunk):
-            results.extend(fallback_chunk)
-            continue
 
-        safe_chunk = [str(title).strip() or fallback for title, fallback in zip(formatted_chunk, fallback_chunk, strict=True)]
-        results.extend(safe_chunk)
+async def format_titles_batch_async(
+    entries: list[TitleFormatInput],
+    *,
+    language: str,
+    formats: dict[str, str],
+    batch_size: int = 20,
+    llm_client: object | None = None,
+    max_concurrency: int = 1,
+    semaphore: asyncio.Semaphore | None = None,
+    token_budget: int = 0,
+) -> list[TitleFormatResult]:
+    """format_titles_batch 的协程版；传入共享的 semaphore 可让多次调用共用同一个并发上限。"""
+    import asyncio
+
+    if not entries:
+        return []
+
+    job = _TitleJob.build(entries, language, formats)
+    aformatter = getattr(llm_client, "aformat_titles", None)
+    formatter = getattr(llm_client, "format_titles", None)
+    if llm_client is None or (aformatter is None and formatter is None):
+        return _local_results(job.fallback_titles)
+
+    limit = semaphore or asyncio.Semaphore(max(1, max_concurrency))
+    templates = job.checker.templates
+
+    async def format_chunk(batch: range) -> list[TitleFormatResult]:
+        payload = job.payload(batch)
+        async with limit:
+            try:
+                if aformatter is not None:
+                    formatted_chunk = await aformatter(payload, language, templates=templates)
+                else:
+                    formatted_chunk = await asyncio.to_thread(formatter, payload, language, templates=templates)
+            except Exception:
+                formatted_chunk = None
+        return job.accept(batch, formatted_chunk)
 
-    return [
-        TitleFormatResult(title=title, source="llm" if title != fallback else "local")
-        for title, fallback in zip(results, fallback_titles, strict=True)
-    ]
+    batches = pack_title_batches(entries, batch_size, token_budget)
+    chunk_results = await asyncio.gather(*(format_chunk(batch) for batch in batches))
+    return list(itertools.chain.from_iterable(chunk_results))
 
 
 def build_title_inputs(items: list[dict[str, Any]]) -> list[TitleFormatInput]:
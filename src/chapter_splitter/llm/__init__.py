@@ -1,5 +1,6 @@
+from .cache import ResponseCache
 from .client import LLMClient
 from .deepseek import DeepSeekClient
 from .grok import GrokClient
 
-__all__ = ["LLMClient", "DeepSeekClient", "GrokClient"]
+__all__ = ["LLMClient", "DeepSeekClient", "GrokClient", "ResponseCache"]
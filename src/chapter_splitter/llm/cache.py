@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+def make_cache_key(provider: str, model: str, system_prompt: str, user_prompt: str) -> str:
+    material = json.dumps([provider, model, system_prompt, user_prompt], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """按 provider/model/prompt 内容寻址的 LLM 响应缓存（SQLite 单文件，离线可用）。"""
+
+    def __init__(self, path: Path, *, max_size_bytes: int, max_age_seconds: float) -> None:
+        self.path = path
+        self.max_size_bytes = max(0, max_size_bytes)
+        self.max_age_seconds = max(0.0, max_age_seconds)
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._total_size = 0
+        self.prune()
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.max_age_seconds > 0 and now - created_at > self.max_age_seconds
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value, size, created_at FROM responses WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                value, size, created_at = row
+                if self._is_expired(created_at, now):
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._total_size -= size
+                    return None
+
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            except sqlite3.Error:
+                return None
+
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+
+        with self._lock:
+            try:
+                previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, size, now, now),
+                )
+            except sqlite3.Error:
+                return
+
+            self._total_size += size - (previous[0] if previous else 0)
+            if self.max_size_bytes and self._total_size > self.max_size_bytes:
+                self._prune_locked(now)
+
+    def prune(self) -> None:
+        with self._lock:
+            self._prune_locked(time.time())
+
+    def _prune_locked(self, now: float) -> None:
+        try:
+            if self.max_age_seconds > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?",
+                    (now - self.max_age_seconds,),
+                )
+
+            self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if not self.max_size_bytes or self._total_size <= self.max_size_bytes:
+                return
+
+            # 按最近访问时间淘汰，留出 10% 余量，避免每次写入都触发淘汰。
+            budget = int(self.max_size_bytes * 0.9)
+            evict: list[tuple[str]] = []
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+            for key, size in rows:
+                if self._total_size <= budget:
+                    break
+                evict.append((key,))
+                self._total_size -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", evict)
+        except sqlite3.Error:
+            return
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,15 +1,142 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass, field
+import asyncio
 import json
+import threading
 import time
 from typing import Any
 
+from ..utils.text import estimate_tokens
+from .cache import ResponseCache, make_cache_key
+from .scheduler import LLMScheduler
+
+
+LANGUAGE_SYSTEM_PROMPT = "You are a language classifier."
+CHAPTER_PATTERN_SYSTEM_PROMPT = "You are a chapter pattern detector."
+TITLE_FORMAT_SYSTEM_PROMPT = "You are a title formatter."
+
 
 @dataclass(slots=True)
 class RetryPolicy:
     max_attempts: int = 3
     delay_seconds: float = 2.0
+    max_delay_seconds: float = 30.0
+
+
+@dataclass(slots=True)
+class ConnectionPolicy:
+    max_connections: int = 10
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+
+
+# 分位数只按最近这么多次调用估算，长时间运行的服务不会无限攒延迟样本。
+LATENCY_WINDOW = 1024
+
+
+@dataclass(slots=True)
+class LLMCallStats:
+    calls: int = 0
+    failures: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    short_circuits: int = 0
+    wait_seconds: float = 0.0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record_latency(self, latency: float) -> None:
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.latencies.append(latency)
+
+    def summary(self) -> dict[str, float | int]:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+
+        def percentile(ratio: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(count - 1, int(round(ratio * (count - 1))))]
+
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "short_circuits": self.short_circuits,
+            "wait_seconds": self.wait_seconds,
+            "latency_total": self.latency_total,
+            "latency_mean": self.latency_total / self.calls if self.calls else 0.0,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": self.latency_max,
+        }
+
+
+def _language_prompt(sample_text: str) -> str:
+    prompt = (
+        "识别文本主要语言，仅返回 JSON："
+        '{"language":"zh|en|mixed|unknown","confidence":0-1}'
+    )
+    return f"{prompt}\n\n{sample_text}"
+
+
+def _chapter_pattern_prompt(sample_text: str) -> str:
+    prompt = (
+        "根据样本文本识别章节标题正则，只返回 JSON："
+        '{"pattern":"^...$"}；若无法识别返回 {"pattern":""}'
+    )
+    return f"{prompt}\n\n{sample_text}"
+
+
+def _format_titles_prompt(
+    items: list[dict[str, Any]],
+    language: str,
+    templates: dict[str, str] | None = None,
+) -> str:
+    prompt = "按输入顺序返回格式化标题数组，必须是 JSON 对象，键名为 formatted，值为字符串数组。"
+    if templates:
+        # 模板每次请求只给一次，不随条目重复。
+        prompt += (
+            f"\n标题格式: 未拆分章节 {templates['single']}；拆分章节 {templates['split']}。"
+            "{num} 填 chapter_num，{part}/{total} 填输入里的值（未给出即未拆分），"
+            "{title} 填去掉章节编号后整理过的标题正文，其余文字原样保留。"
+        )
+    return f"{prompt}\n语言: {language}\n输入: {json.dumps(items, ensure_ascii=False, separators=(',', ':'))}"
+
+
+def _as_dict(payload: Any) -> dict[str, Any] | None:
+    if not isinstance(payload, dict):
+        return None
+    return payload
+
+
+def _formatted_titles(payload: Any) -> list[str] | None:
+    if not isinstance(payload, dict):
+        return None
+
+    formatted = payload.get("formatted")
+    if not isinstance(formatted, list):
+        return None
+
+    cleaned = [str(item).strip() for item in formatted]
+    return cleaned
+
+
+def _close_async_client(client: Any, loop: asyncio.AbstractEventLoop | None) -> None:
+    # 同步代码里关闭异步客户端：原事件循环还在跑就交给它，停着就借它跑完，已关闭则另起一个循环。
+    with suppress(Exception):
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.close(), loop)
+        elif loop is not None and not loop.is_closed():
+            loop.run_until_complete(client.close())
+        else:
+            asyncio.run(client.close())
 
 
 class LLMClient:
@@ -22,6 +149,9 @@ class LLMClient:
         model: str,
         timeout: int = 30,
         retry_policy: RetryPolicy | None = None,
+        cache: ResponseCache | None = None,
+        connection_policy: ConnectionPolicy | None = None,
+        scheduler: LLMScheduler | None = None,
     ) -> None:
         self.provider = provider
         self.api_key = api_key or ""
@@ -29,74 +159,265 @@ class LLMClient:
         self.model = model
         self.timeout = timeout
         self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
+        self.connection_policy = connection_policy or ConnectionPolicy()
+        self.scheduler = scheduler or LLMScheduler(
+            backoff_seconds=self.retry_policy.delay_seconds,
+            max_backoff_seconds=self.retry_policy.max_delay_seconds,
+        )
+        self.stats = LLMCallStats()
+        self._lock = threading.Lock()
+        self._client: Any | None = None
+        self._sync_owner: LLMClient | None = None
+        self._async_client: Any | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
 
     @property
     def enabled(self) -> bool:
         return bool(self.api_key and self.model and self.base_url)
 
+    def _http_limits(self) -> Any:
+        import httpx
+
+        policy = self.connection_policy
+        return httpx.Limits(
+            max_connections=max(1, policy.max_connections),
+            max_keepalive_connections=max(0, policy.max_keepalive_connections),
+            keepalive_expiry=policy.keepalive_expiry,
+        )
+
+    def share_sync_client(self, owner: LLMClient) -> None:
+        """同步请求改用 owner 的客户端与连接池；异步客户端绑定各自的事件循环，仍各建各的。"""
+        self._sync_owner = owner
+
+    def _get_client(self) -> Any | None:
+        if self._sync_owner is not None:
+            return self._sync_owner._get_client()
+        with self._lock:
+            if self._client is not None:
+                return self._client
+
+            try:
+                from openai import DefaultHttpxClient, OpenAI
+            except Exception:
+                return None
+
+            self._client = OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0,
+                http_client=DefaultHttpxClient(limits=self._http_limits(), timeout=self.timeout),
+            )
+            return self._client
+
+    def warm_up(self) -> None:
+        """提前导入 SDK 并建好同步客户端，常驻服务启动时调用。"""
+        if self.enabled:
+            self._get_client()
+
+    async def _get_async_client(self) -> Any | None:
+        # httpx.AsyncClient 的连接池绑定在创建它的事件循环上，换了循环就重新建。
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._async_client is not None and self._async_loop is loop:
+                return self._async_client
+            stale = self._async_client
+            self._async_client = self._async_loop = None
+        if stale is not None:
+            # 旧循环上的连接在新循环里未必关得干净，尽力而为，失败也不影响新建客户端。
+            with suppress(Exception):
+                await stale.close()
+
+        try:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        except Exception:
+            return None
+
+        with self._lock:
+            if self._async_client is not None and self._async_loop is loop:
+                return self._async_client
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(limits=self._http_limits(), timeout=self.timeout),
+            )
+            self._async_loop = loop
+            return self._async_client
+
+    def _cache_lookup(self, system_prompt: str, user_prompt: str) -> tuple[str | None, Any | None]:
+        if self.cache is None:
+            return None, None
+
+        cache_key = make_cache_key(self.provider, self.model, system_prompt, user_prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            with self._lock:
+                self.stats.cache_hits += 1
+        return cache_key, cached
+
+    def _record_call(self, latency: float, *, ok: bool, retried: bool) -> None:
+        with self._lock:
+            self.stats.calls += 1
+            self.stats.record_latency(latency)
+            if not ok:
+                self.stats.failures += 1
+            if retried:
+                self.stats.retries += 1
+
+    def _completion_kwargs(self, system_prompt: str, user_prompt: str) -> dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "temperature": 0.1,
+            "response_format": {"type": "json_object"},
+        }
+
+    def _before_attempt(self, tokens: int) -> float | None:
+        # 熔断打开时不再请求，返回 None，调用方退回本地兜底。
+        if not self.scheduler.allow():
+            with self._lock:
+                self.stats.short_circuits += 1
+            return None
+        delay = self.scheduler.reserve(tokens)
+        if delay > 0:
+            with self._lock:
+                self.stats.wait_seconds += delay
+        return delay
+
+    def _after_failure(self, exc: Exception, attempt: int, started: float) -> float | None:
+        self._record_call(time.perf_counter() - started, ok=False, retried=attempt > 1)
+        delay = self.scheduler.record_failure(exc, attempt)
+        if delay is None or attempt >= max(1, self.retry_policy.max_attempts):
+            return None
+        return delay
+
+    def _after_success(self, completion: Any, tokens: int, cache_key: str | None, started: float, attempt: int) -> Any:
+        content = completion.choices[0].message.content or "{}"
+        payload = json.loads(content)
+        self._record_call(time.perf_counter() - started, ok=True, retried=attempt > 1)
+        usage = getattr(completion, "usage", None)
+        self.scheduler.record_success(tokens, getattr(usage, "total_tokens", None))
+        if cache_key is not None:
+            self.cache.set(cache_key, payload)
+        return payload
+
     def _request_json(self, system_prompt: str, user_prompt: str) -> Any | None:
         if not self.enabled:
             return None
 
-        try:
-            from openai import OpenAI
-        except Exception:
+        cache_key, cached = self._cache_lookup(system_prompt, user_prompt)
+        if cached is not None:
+            return cached
+
+        client = self._get_client()
+        if client is None:
             return None
 
-        client = OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout)
+        tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+        attempt = 0
+        while (delay := self._before_attempt(tokens)) is not None:
+            attempt += 1
+            started = time.perf_counter()
+            try:
+                time.sleep(delay)
+                started = time.perf_counter()
+                completion = client.chat.completions.create(**self._completion_kwargs(system_prompt, user_prompt))
+                return self._after_success(completion, tokens, cache_key, started, attempt)
+            except Exception as exc:
+                retry_delay = self._after_failure(exc, attempt, started)
+                if retry_delay is None:
+                    return None
+                time.sleep(retry_delay)
+            except BaseException:
+                # 被中断的尝试没有结果，若它是熔断后的试探请求，熔断要重新断开。
+                self.scheduler.abort_probe()
+                raise
+        return None
+
+    async def _request_json_async(self, system_prompt: str, user_prompt: str) -> Any | None:
+        if not self.enabled:
+            return None
+
+        cache_key, cached = self._cache_lookup(system_prompt, user_prompt)
+        if cached is not None:
+            return cached
 
-        attempts = max(1, self.retry_policy.max_attempts)
-        for attempt in range(1, attempts + 1):
+        client = await self._get_async_client()
+        if client is None:
+            return None
+
+        tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+        attempt = 0
+        while (delay := self._before_attempt(tokens)) is not None:
+            attempt += 1
+            started = time.perf_counter()
             try:
-                completion = client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    temperature=0.1,
-                    response_format={"type": "json_object"},
+                await asyncio.sleep(delay)
+                started = time.perf_counter()
+                completion = await client.chat.completions.create(
+                    **self._completion_kwargs(system_prompt, user_prompt)
                 )
-                content = completion.choices[0].message.content or "{}"
-                return json.loads(content)
-            except Exception:
-                if attempt >= attempts:
+                return self._after_success(completion, tokens, cache_key, started, attempt)
+            except Exception as exc:
+                retry_delay = self._after_failure(exc, attempt, started)
+                if retry_delay is None:
                     return None
-                time.sleep(max(0, self.retry_policy.delay_seconds))
+                await asyncio.sleep(retry_delay)
+            except BaseException:
+                # 取消同样要结束试探，否则熔断会一直停在试探中。
+                self.scheduler.abort_probe()
+                raise
         return None
 
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+            async_client, async_loop = self._async_client, self._async_loop
+            self._async_client = self._async_loop = None
+        if client is not None:
+            client.close()
+        if async_client is not None:
+            _close_async_client(async_client, async_loop)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            client, self._async_client = self._async_client, None
+            self._async_loop = None
+        if client is not None:
+            await client.close()
+
     def detect_language(self, sample_text: str) -> dict[str, Any] | None:
-        prompt = (
-            "识别文本主要语言，仅返回 JSON："
-            '{"language":"zh|en|mixed|unknown","confidence":0-1}'
-        )
-        payload = self._request_json("You are a language classifier.", f"{prompt}\n\n{sample_text}")
-        if not isinstance(payload, dict):
-            return None
-        return payload
+        payload = self._request_json(LANGUAGE_SYSTEM_PROMPT, _language_prompt(sample_text))
+        return _as_dict(payload)
 
     def detect_chapter_pattern(self, sample_text: str) -> dict[str, Any] | None:
-        prompt = (
-            "根据样本文本识别章节标题正则，只返回 JSON："
-            '{"pattern":"^...$"}；若无法识别返回 {"pattern":""}'
-        )
-        payload = self._request_json("You are a chapter pattern detector.", f"{prompt}\n\n{sample_text}")
-        if not isinstance(payload, dict):
-            return None
-        return payload
+        payload = self._request_json(CHAPTER_PATTERN_SYSTEM_PROMPT, _chapter_pattern_prompt(sample_text))
+        return _as_dict(payload)
 
-    def format_titles(self, items: list[dict[str, Any]], language: str) -> list[str] | None:
-        user_prompt = (
-            "按输入顺序返回格式化标题数组，必须是 JSON 对象，键名为 formatted，值为字符串数组。"
-            f"\n语言: {language}\n输入: {json.dumps(items, ensure_ascii=False)}"
-        )
-        payload = self._request_json("You are a title formatter.", user_prompt)
-        if not isinstance(payload, dict):
-            return None
+    def format_titles(
+        self, items: list[dict[str, Any]], language: str, templates: dict[str, str] | None = None
+    ) -> list[str] | None:
+        payload = self._request_json(TITLE_FORMAT_SYSTEM_PROMPT, _format_titles_prompt(items, language, templates))
+        return _formatted_titles(payload)
 
-        formatted = payload.get("formatted")
-        if not isinstance(formatted, list):
-            return None
+    async def adetect_language(self, sample_text: str) -> dict[str, Any] | None:
+        payload = await self._request_json_async(LANGUAGE_SYSTEM_PROMPT, _language_prompt(sample_text))
+        return _as_dict(payload)
 
-        cleaned = [str(item).strip() for item in formatted]
-        return cleaned
+    async def adetect_chapter_pattern(self, sample_text: str) -> dict[str, Any] | None:
+        payload = await self._request_json_async(CHAPTER_PATTERN_SYSTEM_PROMPT, _chapter_pattern_prompt(sample_text))
+        return _as_dict(payload)
+
+    async def aformat_titles(
+        self, items: list[dict[str, Any]], language: str, templates: dict[str, str] | None = None
+    ) -> list[str] | None:
+        payload = await self._request_json_async(
+            TITLE_FORMAT_SYSTEM_PROMPT, _format_titles_prompt(items, language, templates)
+        )
+        return _formatted_titles(payload)
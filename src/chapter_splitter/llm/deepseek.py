@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from .client import LLMClient, RetryPolicy
+from .cache import ResponseCache
+from .client import ConnectionPolicy, LLMClient, RetryPolicy
+from .scheduler import LLMScheduler
 
 
 class DeepSeekClient(LLMClient):
@@ -12,6 +14,9 @@ class DeepSeekClient(LLMClient):
         model: str = "deepseek-chat",
         timeout: int = 30,
         retry_policy: RetryPolicy | None = None,
+        cache: ResponseCache | None = None,
+        connection_policy: ConnectionPolicy | None = None,
+        scheduler: LLMScheduler | None = None,
     ) -> None:
         super().__init__(
             provider="deepseek",
@@ -20,4 +25,7 @@ class DeepSeekClient(LLMClient):
             model=model,
             timeout=timeout,
             retry_policy=retry_policy,
+            cache=cache,
+            connection_policy=connection_policy,
+            scheduler=scheduler,
         )
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import random
+import threading
+import time
+from typing import Any
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitPolicy:
+    requests_per_minute: float = 0.0
+    tokens_per_minute: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class CircuitBreakerPolicy:
+    failure_threshold: int = 5
+    reset_seconds: float = 60.0
+
+
+# 429 / 408 / 409 与 5xx 属于暂时性错误，值得退避重试；其余 4xx 重试也不会成功。
+_RETRYABLE_STATUS = frozenset({408, 409, 429})
+
+
+class TokenBucket:
+    """按分钟速率补充的令牌桶；预约制，余额可以为负，负多少就要等多久。"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def reserve(self, amount: float, now: float | None = None) -> float:
+        now = self._clock() if now is None else now
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens - amount)
+        return max(0.0, -self._tokens / self.rate)
+
+
+def _bucket(per_minute: float, clock: Callable[[], float]) -> TokenBucket | None:
+    # 0 表示不限速。
+    return TokenBucket(per_minute, clock) if per_minute > 0 else None
+
+
+class CircuitBreaker:
+    """连续失败达到阈值后断开；过 reset_seconds 放行一次试探，成功即恢复，其余结局都重新断开。"""
+
+    def __init__(self, policy: CircuitBreakerPolicy, clock: Callable[[], float] = time.monotonic) -> None:
+        self.policy = policy
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self._probing or self._clock() - self._opened_at < self.policy.reset_seconds:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probing or (self.policy.failure_threshold > 0 and self._failures >= self.policy.failure_threshold):
+            self._opened_at = self._clock()
+            self._probing = False
+
+    def abort_probe(self) -> None:
+        # 试探请求没换来正常响应（坏响应、被取消）时重新断开，重新计时，别让熔断卡在试探中。
+        if self._probing:
+            self._opened_at = self._clock()
+            self._probing = False
+
+
+def _header(exc: Exception, name: str) -> str | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return None
+    return headers.get(name)
+
+
+def retry_after_seconds(exc: Exception, now: float | None = None) -> float | None:
+    """从 Retry-After（秒数或 HTTP 日期）/ retry-after-ms 响应头取服务端要求的等待时间。"""
+    value = _header(exc, "retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = _header(exc, "retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+
+def is_bad_response(exc: Exception) -> bool:
+    # 请求成功但返回内容解析失败（非 JSON、缺字段），说明服务是通的。
+    return isinstance(exc, (ValueError, LookupError, AttributeError, TypeError))
+
+
+def is_retryable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        return True
+    return status in _RETRYABLE_STATUS or status >= 500
+
+
+class LLMScheduler:
+    """同一 provider 的所有请求共用：限速（请求数 / token 数每分钟）、指数退避和熔断。"""
+
+    def __init__(
+        self,
+        *,
+        rate_limit: RateLimitPolicy | None = None,
+        circuit_breaker: CircuitBreakerPolicy | None = None,
+        backoff_seconds: float = 2.0,
+        max_backoff_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.rate_limit = rate_limit or RateLimitPolicy()
+        self.backoff_seconds = max(0.0, backoff_seconds)
+        self.max_backoff_seconds = max(self.backoff_seconds, max_backoff_seconds)
+        self._clock = clock
+        self._rng = rng
+        self._lock = threading.Lock()
+        self._requests = _bucket(self.rate_limit.requests_per_minute, clock)
+        self._tokens = _bucket(self.rate_limit.tokens_per_minute, clock)
+        self._breaker = CircuitBreaker(circuit_breaker or CircuitBreakerPolicy(), clock)
+        self._paused_until = 0.0
+
+    @property
+    def circuit_open(self) -> bool:
+        return self._breaker.is_open
+
+    def allow(self) -> bool:
+        with self._lock:
+            return self._breaker.allow()
+
+    def reserve(self, tokens: int) -> float:
+        """预约一次请求，返回发出前需要等待的秒数。"""
+        with self._lock:
+            now = self._clock()
+            delay = max(0.0, self._paused_until - now)
+            if self._requests is not None:
+                delay = max(delay, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                delay = max(delay, self._tokens.reserve(tokens, now))
+            return delay
+
+    def record_success(self, estimated_tokens: int, used_tokens: int | None = None) -> None:
+        with self._lock:
+            self._breaker.record_success()
+            if self._tokens is not None and used_tokens is not None:
+                # 按响应里的实际用量修正预约时的估算。
+                self._tokens.reserve(used_tokens - estimated_tokens)
+
+    def abort_probe(self) -> None:
+        with self._lock:
+            self._breaker.abort_probe()
+
+    def record_failure(self, exc: Exception, attempt: int) -> float | None:
+        """记录一次失败，返回重试前的等待秒数；不值得重试时返回 None。"""
+        if is_bad_response(exc):
+            # 坏响应不算服务故障，但若这是试探请求，熔断仍要重新断开。
+            self.abort_probe()
+            return self._backoff(attempt)
+
+        with self._lock:
+            self._breaker.record_failure()
+        if not is_retryable(exc):
+            return None
+
+        retry_after = retry_after_seconds(exc)
+        if retry_after is None:
+            return self._backoff(attempt)
+        with self._lock:
+            # 服务端给了 Retry-After 时，共用这个调度器的其它请求也一起暂停。
+            self._paused_until = max(self._paused_until, self._clock() + retry_after)
+        return retry_after
+
+    def _backoff(self, attempt: int) -> float:
+        # 指数退避加抖动：取上限的一半到全部之间，避免并发请求同时重试。
+        ceiling = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** max(0, attempt - 1))
+        return ceiling * (0.5 + 0.5 * self._rng())
+
+
+_SHARED: dict[tuple[Any, ...], LLMScheduler] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_scheduler(
+    provider: str,
+    *,
+    rate_limit: RateLimitPolicy,
+    circuit_breaker: CircuitBreakerPolicy,
+    backoff_seconds: float,
+    max_backoff_seconds: float,
+) -> LLMScheduler:
+    """同一进程内相同 provider 与策略的客户端共用一个调度器，限速额度不会因为多建客户端而翻倍。"""
+    key = (provider, rate_limit, circuit_breaker, backoff_seconds, max_backoff_seconds)
+    with _SHARED_LOCK:
+        scheduler = _SHARED.get(key)
+        if scheduler is None:
+            scheduler = LLMScheduler(
+                rate_limit=rate_limit,
+                circuit_breaker=circuit_breaker,
+                backoff_seconds=backoff_seconds,
+                max_backoff_seconds=max_backoff_seconds,
+            )
+            _SHARED[key] = scheduler
+        return scheduler
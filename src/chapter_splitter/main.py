@@ -6,25 +6,145 @@ import json
 import click
 
 from .config import apply_cli_overrides, load_config
-from .pipeline import ChapterSplitterPipeline
 
 
-@click.command()
+class _DefaultCommandGroup(click.Group):
+    """首个参数不是子命令时按 split 处理，保持 `main INPUT_PATH` 的旧用法可用。"""
+
+    default_command = "split"
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if args and args[0] not in self.commands and args[0] not in ctx.help_option_names:
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+def _echo_stats_table(stats_data: dict) -> None:
+    click.echo(f"[STATS] total={stats_data['total_seconds']:.3f}s")
+    for name, values in stats_data["stages"].items():
+        click.echo(
+            f"[STATS] {name:<16} {values['seconds']:>9.3f}s  bytes={values['bytes']}  items={values['items']}  "
+            f"llm_calls={values['llm_calls']}  retries={values['llm_retries']}  failures={values['llm_failures']}  "
+            f"cache_hits={values['cache_hits']}  fallbacks={values['fallbacks']}"
+        )
+
+
+def _echo_chapter_index(input_path: Path, encoding: str) -> None:
+    from .encoding import detect_encoding
+    from .mapped import MappedSource, map_chapters
+
+    try:
+        source = MappedSource(input_path, detect_encoding(input_path, encoding))
+    except ValueError as exc:
+        raise click.ClickException(f"只建索引需要内存映射输入：{exc}") from exc
+    with source:
+        mapped = map_chapters(source)
+        if mapped is None:
+            raise click.ClickException("未识别到默认格式的章节标题，无法只建索引")
+        for idx, chapter in enumerate(mapped.chapters, start=1):
+            record = {
+                "index": idx,
+                "title": chapter.original_title,
+                "offset": chapter.start,
+                "bytes": chapter.byte_length,
+            }
+            click.echo(json.dumps(record, ensure_ascii=False))
+
+
+@click.group(cls=_DefaultCommandGroup)
+def main() -> None:
+    """章节划分 CLI 入口。"""
+
+
+@main.command("split")
 @click.argument("input_path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
 @click.option("--output", "output_path", type=click.Path(dir_okay=False, path_type=Path), default=None)
 @click.option("--config", "config_path", type=click.Path(dir_okay=False, path_type=Path), default=None)
 @click.option("--target-chars", type=int, default=None)
+@click.option(
+    "--reader",
+    type=click.Choice(["full", "stream", "mmap"]),
+    default=None,
+    help="输入读取方式：full 整篇读入，stream 逐行流式处理（内存只与最大单章相关），mmap 内存映射、按需解码章节",
+)
+@click.option(
+    "--encoding",
+    default=None,
+    help="输入文件编码，auto 按 BOM 和文件开头的字节嗅探（UTF-8 / UTF-16 / GB18030）",
+)
+@click.option(
+    "--incremental/--no-incremental",
+    default=None,
+    help="增量模式：复用上次 manifest 中未变章节的标题，只处理新增或改动的章节",
+)
+@click.option(
+    "--output-mode",
+    type=click.Choice(["single", "per_chapter", "shards", "jsonl"]),
+    default=None,
+    help="输出形式：single 单个文本文件，per_chapter 每章一个文件，shards 每 output.shard_size 章一个文件，jsonl 每章一行 JSON",
+)
+@click.option(
+    "--index/--no-index",
+    default=None,
+    help="在输出旁写 <输出名>.index.jsonl：每章的标题、章节号、分段和在输出文件中的字节偏移与长度",
+)
+@click.option(
+    "--async/--no-async",
+    "async_mode",
+    default=None,
+    help="异步流水线：解析切分与 LLM 标题格式化重叠执行，输出与同步模式一致",
+)
+@click.option(
+    "--split-workers",
+    type=int,
+    default=None,
+    help="切分章节的进程数，1 为串行，0 表示使用全部 CPU 核；输出与串行一致",
+)
 @click.option("--dry-run", is_flag=True, default=False, help="只校验配置和输入，不执行处理")
-def main(
+@click.option("--stats", "show_stats", is_flag=True, default=False, help="输出各阶段耗时、字节数、LLM 调用与兜底次数")
+@click.option(
+    "--stats-json",
+    "stats_json",
+    type=click.Path(dir_okay=False, allow_dash=True, path_type=Path),
+    default=None,
+    help="把各阶段统计写成 JSON（- 表示标准输出），供指标采集使用",
+)
+@click.option("--index-only", is_flag=True, default=False, help="只列出章节标题及字节大小，不解码正文、不输出文件")
+def split_command(
     input_path: Path,
     output_path: Path | None,
     config_path: Path | None,
     target_chars: int | None,
+    reader: str | None,
+    encoding: str | None,
+    incremental: bool | None,
+    output_mode: str | None,
+    index: bool | None,
+    async_mode: bool | None,
+    split_workers: int | None,
     dry_run: bool,
+    show_stats: bool,
+    stats_json: Path | None,
+    index_only: bool,
 ) -> None:
-    """章节划分 CLI 入口。"""
+    """划分单个 TXT 文件。"""
     config = load_config(str(config_path) if config_path else None)
-    config = apply_cli_overrides(config, target_chars=target_chars)
+    config = apply_cli_overrides(
+        config,
+        target_chars=target_chars,
+        reader=reader,
+        incremental=incremental,
+        stats=show_stats or stats_json is not None,
+        async_mode=async_mode,
+        split_workers=split_workers,
+        encoding=encoding,
+        index=index,
+        output_mode=output_mode,
+    )
+
+    if index_only:
+        _echo_chapter_index(input_path, config.input.encoding)
+        return
 
     if output_path is None:
         output_path = input_path.with_name(f"{input_path.stem}_split.txt")
@@ -36,6 +156,13 @@ def main(
         "llm_model": config.llm.model,
         "target_chars": config.splitter.target_chars,
         "separator": config.splitter.separator,
+        "reader": config.input.reader,
+        "encoding": config.input.encoding,
+        "incremental": config.output.incremental,
+        "output_mode": config.output.mode,
+        "index": config.output.index,
+        "async": config.pipeline.async_mode,
+        "split_workers": config.pipeline.split_workers,
         "dry_run": dry_run,
     }
     click.echo(json.dumps(summary, ensure_ascii=False, indent=2))
@@ -44,12 +171,129 @@ def main(
         click.echo("[INFO] Dry-run completed")
         return
 
-    result = ChapterSplitterPipeline(config).process(input_path=input_path, output_path=output_path)
+    # dry-run 不需要流水线，放到这里再导入以缩短冷启动。
+    from .pipeline import ChapterSplitterPipeline
+
+    pipeline = ChapterSplitterPipeline(config)
+    try:
+        result = pipeline.process(input_path=input_path, output_path=output_path)
+    except FileExistsError as exc:
+        raise click.ClickException(str(exc)) from exc
+    finally:
+        pipeline.close()
     click.echo(
         f"[INFO] Completed: language={result.language}, strategy={result.parse_strategy}, "
         f"input_chapters={result.input_chapter_count}, output_chapters={result.output_chapter_count}, "
-        f"output={result.output_path}"
+        f"reused_chapters={result.reused_chapter_count}, output={result.output_path}"
+    )
+
+    if result.stats is not None:
+        stats_data = result.stats.to_dict()
+        if show_stats:
+            _echo_stats_table(stats_data)
+        if stats_json is not None:
+            payload = json.dumps({"input": str(input_path), **result.to_dict()}, ensure_ascii=False)
+            if str(stats_json) == "-":
+                click.echo(payload)
+            else:
+                stats_json.write_text(payload + "\n", encoding="utf-8")
+
+
+@main.command("batch")
+@click.argument("source")
+@click.option("--output-dir", type=click.Path(file_okay=False, path_type=Path), default=None)
+@click.option("--config", "config_path", type=click.Path(dir_okay=False, path_type=Path), default=None)
+@click.option("--target-chars", type=int, default=None)
+@click.option("--pattern", default=None, help="SOURCE 为目录时匹配的文件模式，默认取配置 batch.pattern")
+@click.option("--workers", type=int, default=None, help="进程数，0 表示使用全部 CPU 核")
+@click.option("--summary", "summary_path", type=click.Path(dir_okay=False, path_type=Path), default=None)
+@click.option("--force", is_flag=True, default=False, help="忽略已是最新的输出，全部重新处理")
+def batch_command(
+    source: str,
+    output_dir: Path | None,
+    config_path: Path | None,
+    target_chars: int | None,
+    pattern: str | None,
+    workers: int | None,
+    summary_path: Path | None,
+    force: bool,
+) -> None:
+    """批量划分目录（或 glob）下的 TXT 文件。"""
+    from .batch import collect_batch_items, run_batch
+
+    config = load_config(str(config_path) if config_path else None)
+    config = apply_cli_overrides(config, target_chars=target_chars)
+
+    items = collect_batch_items(source, pattern=pattern or config.batch.pattern, output_dir=output_dir)
+    if summary_path is None:
+        summary_dir = output_dir or (Path(source) if Path(source).is_dir() else Path.cwd())
+        summary_path = summary_dir / "batch_summary.jsonl"
+
+    records = run_batch(
+        config,
+        items,
+        summary_path=summary_path,
+        workers=config.batch.workers if workers is None else workers,
+        force=force,
+    )
+
+    statuses = [record["status"] for record in records]
+    click.echo(
+        f"[INFO] Batch completed: total={len(records)}, ok={statuses.count('ok')}, "
+        f"skipped={statuses.count('skipped')}, error={statuses.count('error')}, summary={summary_path}"
+    )
+
+
+@main.command("serve")
+@click.option("--config", "config_path", type=click.Path(dir_okay=False, path_type=Path), default=None)
+@click.option("--host", default=None, help="监听地址，默认取配置 serve.host")
+@click.option("--port", type=int, default=None, help="监听端口，默认取配置 serve.port")
+@click.option("--socket", "socket_path", default=None, help="改为监听 Unix socket 路径")
+@click.option("--workers", type=int, default=None, help="同时处理的任务数")
+@click.option("--queue-size", type=int, default=None, help="排队等待的任务上限，超出返回 503")
+@click.option("--max-body-mb", type=int, default=None, help="请求体上限（MB），超出返回 413，0 表示不限")
+def serve_command(
+    config_path: Path | None,
+    host: str | None,
+    port: int | None,
+    socket_path: str | None,
+    workers: int | None,
+    queue_size: int | None,
+    max_body_mb: int | None,
+) -> None:
+    """常驻服务：保持流水线预热，通过本地 HTTP 接收划分任务。"""
+    from .server import SplitService, make_server
+
+    config = load_config(str(config_path) if config_path else None)
+    serve = config.serve
+    service = SplitService(
+        config,
+        workers=serve.workers if workers is None else workers,
+        queue_size=serve.queue_size if queue_size is None else queue_size,
+        max_body_bytes=(serve.max_body_mb if max_body_mb is None else max_body_mb) * 1024 * 1024,
     )
+    service.warm_up()
+    socket_path = socket_path or serve.socket or None
+    try:
+        server = make_server(
+            service,
+            host=host or serve.host,
+            port=serve.port if port is None else port,
+            socket_path=socket_path,
+        )
+    except FileExistsError as exc:
+        service.close()
+        raise click.ClickException(str(exc)) from exc
+    click.echo(f"[INFO] Serving on {socket_path or f'{host or serve.host}:{server.server_address[1]}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if socket_path:
+            Path(socket_path).unlink(missing_ok=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+import hashlib
+import json
+from typing import Any
+
+from .parser import ParsedChapter
+from .renderer import atomic_open
+
+
+MANIFEST_VERSION = 2
+
+
+@dataclass(slots=True)
+class ManifestChapter:
+    digest: str
+    start_num: int
+    titles: list[str] = field(default_factory=list)
+    # 每个标题的来源："llm" 或 "local"（LLM 失败或未启用时的本地兜底）。
+    sources: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class RunManifest:
+    settings_digest: str
+    chapters: list[ManifestChapter] = field(default_factory=list)
+
+    def reusable_chapter(
+        self,
+        index: int,
+        digest: str,
+        start_num: int,
+        piece_count: int,
+        *,
+        allow_local: bool = False,
+    ) -> ManifestChapter | None:
+        """内容与编号都没变的章节复用上次的标题；本地兜底标题只在不用 LLM 时复用，否则下次重新请求。"""
+        if index >= len(self.chapters):
+            return None
+        entry = self.chapters[index]
+        if entry.digest != digest or entry.start_num != start_num or len(entry.titles) != piece_count:
+            return None
+        if not allow_local and any(source != "llm" for source in entry.sources):
+            return None
+        return entry
+
+
+def manifest_path_for(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.manifest.json")
+
+
+def chapter_digest(chapter: ParsedChapter) -> str:
+    material = f"{chapter.original_title}\0{chapter.content}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def settings_digest(settings: dict[str, Any]) -> str:
+    material = json.dumps(settings, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def load_manifest(path: Path) -> RunManifest | None:
+    if not path.exists():
+        return None
+
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        return RunManifest(
+            settings_digest=str(data["settings_digest"]),
+            chapters=[
+                ManifestChapter(
+                    digest=str(item["digest"]),
+                    start_num=int(item["start_num"]),
+                    titles=[str(title) for title in item["titles"]],
+                    sources=[str(source) for source in item["sources"]],
+                )
+                for item in data.get("chapters", [])
+            ],
+        )
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def save_manifest(path: Path, manifest: RunManifest) -> Path:
+    data = {"version": MANIFEST_VERSION, **asdict(manifest)}
+    with atomic_open(path, "w", encoding="utf-8") as handle:
+        handle.write(json.dumps(data, ensure_ascii=False, indent=1))
+    return path
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+import codecs
+import mmap
+import re
+from typing import Any, Pattern
+
+from .parser import _DEFAULT_HEADING_FIRST_CHARS, DEFAULT_CHAPTER_PATTERNS, _is_chapter_heading
+from .utils.text import normalize_newlines
+
+
+# 与 str.splitlines 一致的行分隔符（\r\n 视为一个），以及不会断行的空白字符。
+_LINE_BREAKS = ("\r\n", "\r", "\n", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
+_INLINE_SPACES = (" ", "\t", "\x1f", "\xa0", "\u1680", "\u202f", "\u205f", "\u3000") + tuple(
+    chr(code) for code in range(0x2000, 0x200B)
+)
+_LONE_CR_RE = re.compile(b"\\r(?!\\n)")
+# 只支持自同步的编码：任何字节位置都不会从多字节字符中间误判出行首。
+MAPPABLE_ENCODINGS = frozenset({"utf-8", "ascii"})
+
+
+def _hex(value: int) -> bytes:
+    return b"\\x%02x" % value
+
+
+def _byte_alternation(items: Iterable[bytes]) -> bytes:
+    trie: dict[int, Any] = {}
+    for item in items:
+        node = trie
+        for value in item:
+            node = node.setdefault(value, {})
+
+    def emit(node: dict[int, Any]) -> bytes:
+        leaves = [value for value, child in node.items() if not child]
+        parts = [_hex(value) + b"(?:" + emit(child) + b")" for value, child in sorted(node.items()) if child]
+        if leaves:
+            parts.append(b"[" + b"".join(_hex(value) for value in sorted(leaves)) + b"]")
+        return b"|".join(parts)
+
+    return emit(trie)
+
+
+@lru_cache(maxsize=1)
+def _decimal_chars() -> tuple[str, ...]:
+    return tuple(chr(code) for code in range(0x110000) if chr(code).isdecimal())
+
+
+@lru_cache(maxsize=None)
+def _heading_candidate_re(encoding: str, line_breaks: tuple[str, ...]) -> Pattern[bytes]:
+    # 只在“行首 + 若干空白 + 可能的标题首字符”处命中，正文行的字节不会被解码。
+    first_chars = sorted(_DEFAULT_HEADING_FIRST_CHARS) + list(_decimal_chars())
+    encoded_first = {char.encode(encoding) for char in first_chars if _encodable(char, encoding)}
+    encoded_spaces = {char.encode(encoding) for char in _INLINE_SPACES if _encodable(char, encoding)}
+    line_prefix = b"(?:" + _byte_alternation(encoded_spaces) + b")*(?:" + _byte_alternation(encoded_first) + b")"
+    if not line_breaks:
+        return re.compile(line_prefix)
+    return re.compile(b"(?P<brk>" + _line_break_re(encoding, line_breaks).pattern + b")" + line_prefix)
+
+
+@lru_cache(maxsize=None)
+def _line_break_re(encoding: str, line_breaks: tuple[str, ...] = _LINE_BREAKS) -> Pattern[bytes]:
+    encoded_breaks = {char.encode(encoding) for char in line_breaks if _encodable(char, encoding)}
+    pattern = _byte_alternation(encoded_breaks - {b"\r\n"})
+    return re.compile(b"\\x0d\\x0a|" + pattern if b"\r\n" in encoded_breaks else pattern)
+
+
+def _encodable(char: str, encoding: str) -> bool:
+    try:
+        char.encode(encoding)
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+class MappedSource:
+    def __init__(self, path: Path, encoding: str = "utf-8") -> None:
+        normalized_encoding = codecs.lookup(encoding).name
+        if normalized_encoding not in MAPPABLE_ENCODINGS:
+            raise ValueError(f"encoding {encoding!r} cannot be memory-mapped")
+
+        self.path = path
+        self.encoding = normalized_encoding
+        self._handle = path.open("rb")
+        self.size = path.stat().st_size
+        self._map: mmap.mmap | bytes = (
+            mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        )
+
+    def decode(self, start: int = 0, end: int | None = None) -> str:
+        return normalize_newlines(self._map[start:end].decode(self.encoding))
+
+    def _uses_rare_line_breaks(self) -> bool:
+        # 绝大多数文件只用 \n 或 \r\n 换行；确认后即可走只认 \n 的快速正则。
+        data = self._map
+        if _LONE_CR_RE.search(data):
+            return True
+        rare = (char.encode(self.encoding) for char in _LINE_BREAKS[3:] if _encodable(char, self.encoding))
+        return any(data.find(encoded) >= 0 for encoded in rare)
+
+    def iter_heading_candidates(self) -> Iterator[tuple[int, int, int]]:
+        line_breaks = _LINE_BREAKS if self._uses_rare_line_breaks() else ("\n",)
+        breaks = _line_break_re(self.encoding)
+        if _heading_candidate_re(self.encoding, ()).match(self._map):
+            yield self._candidate_line(breaks, 0)
+        for matched in _heading_candidate_re(self.encoding, line_breaks).finditer(self._map):
+            yield self._candidate_line(breaks, matched.end("brk"))
+
+    def _candidate_line(self, breaks: Pattern[bytes], line_start: int) -> tuple[int, int, int]:
+        line_break = breaks.search(self._map, line_start)
+        line_end = line_break.start() if line_break else self.size
+        next_line = line_break.end() if line_break else self.size
+        return line_start, line_end, next_line
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._handle.close()
+
+    def __enter__(self) -> MappedSource:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+@dataclass(slots=True)
+class MappedChapter:
+    original_title: str
+    source: MappedSource
+    start: int
+    end: int
+    index_hint: int | None = None
+
+    @property
+    def content(self) -> str:
+        return self.source.decode(self.start, self.end).strip()
+
+    @property
+    def char_count(self) -> int:
+        return len(self.content)
+
+    @property
+    def byte_length(self) -> int:
+        return self.end - self.start
+
+
+@dataclass(slots=True)
+class MappedParseResult:
+    chapters: list[MappedChapter]
+    leading_text: str
+    strategy: str = "regex"
+
+
+def map_chapters(
+    source: MappedSource,
+    patterns: tuple[Pattern[str], ...] = DEFAULT_CHAPTER_PATTERNS,
+) -> MappedParseResult | None:
+    headings: list[tuple[str, int, int]] = []
+    for line_start, line_end, next_line in source.iter_heading_candidates():
+        line = source.decode(line_start, line_end).strip()
+        if line and _is_chapter_heading(line, patterns):
+            headings.append((line, line_start, next_line))
+
+    if not headings:
+        return None
+
+    chapters = [
+        MappedChapter(
+            original_title=title,
+            source=source,
+            start=content_start,
+            end=headings[idx + 1][1] if idx + 1 < len(headings) else source.size,
+        )
+        for idx, (title, _, content_start) in enumerate(headings)
+    ]
+    return MappedParseResult(chapters=chapters, leading_text=source.decode(0, headings[0][1]))
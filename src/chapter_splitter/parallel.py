@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain
+from multiprocessing import shared_memory
+from typing import Protocol, TypeVar
+
+from .splitter import PieceSpan, split_content_spans
+
+
+CHUNK_CHARS = 1 << 20
+
+
+class _Chapter(Protocol):
+    @property
+    def content(self) -> str: ...
+
+
+ChapterT = TypeVar("ChapterT", bound=_Chapter)
+# (target_chars, min_ratio, max_ratio, split_search_range)，与 split_content_spans 的位置参数顺序一致。
+SplitOptions = tuple[int, float, float, int]
+
+
+def _iter_chunks(chapters: Iterable[ChapterT], chunk_chars: int) -> Iterator[tuple[list[ChapterT], list[str]]]:
+    # 按正文字数攒块：块太小时进程间往返的开销会盖过切分本身。
+    chunk: list[ChapterT] = []
+    contents: list[str] = []
+    size = 0
+    for chapter in chapters:
+        content = chapter.content
+        chunk.append(chapter)
+        contents.append(content)
+        size += len(content)
+        if size >= chunk_chars:
+            yield chunk, contents
+            chunk, contents, size = [], [], 0
+    if chunk:
+        yield chunk, contents
+
+
+def _split_contents(contents: Iterable[str], options: SplitOptions) -> list[list[PieceSpan]]:
+    return [split_content_spans(content, *options) for content in contents]
+
+
+def _split_shared_chunk(name: str, size: int, lengths: list[int], options: SplitOptions) -> list[list[PieceSpan]]:
+    # 工作进程：从共享内存解码整块正文，按字数还原各章后切分，只把偏移传回去。
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        with block.buf[:size] as view:
+            text = str(view, "utf-8")
+    finally:
+        block.close()
+
+    contents: list[str] = []
+    position = 0
+    for length in lengths:
+        contents.append(text[position : position + length])
+        position += length
+    return _split_contents(contents, options)
+
+
+def _submit_chunk(
+    executor: ProcessPoolExecutor,
+    contents: list[str],
+    options: SplitOptions,
+) -> tuple[shared_memory.SharedMemory, Future[list[list[PieceSpan]]]]:
+    encoded = [content.encode("utf-8") for content in contents]
+    size = sum(len(data) for data in encoded)
+    block = shared_memory.SharedMemory(create=True, size=max(1, size))
+    position = 0
+    for data in encoded:
+        block.buf[position : position + len(data)] = data
+        position += len(data)
+    future = executor.submit(_split_shared_chunk, block.name, size, [len(content) for content in contents], options)
+    return block, future
+
+
+def _release(block: shared_memory.SharedMemory) -> None:
+    block.close()
+    block.unlink()
+
+
+def iter_split_spans(
+    chapters: Iterable[ChapterT],
+    *,
+    workers: int,
+    target_chars: int,
+    min_ratio: float,
+    max_ratio: float,
+    split_search_range: int = 200,
+    chunk_chars: int | None = None,
+) -> Iterator[tuple[ChapterT, list[PieceSpan]]]:
+    """多进程切分章节，按输入顺序产出 (章节, 相对章节正文的 span)；正文经共享内存传给工作进程，不走 pickle。"""
+    options: SplitOptions = (target_chars, min_ratio, max_ratio, split_search_range)
+    chunks = _iter_chunks(chapters, max(1, chunk_chars or CHUNK_CHARS))
+    head = [chunk for chunk in (next(chunks, None), next(chunks, None)) if chunk is not None]
+
+    if workers <= 1 or len(head) <= 1:
+        # 只有一块时起进程池得不偿失，直接在本进程切分。
+        for chunk, contents in chain(head, chunks):
+            yield from zip(chunk, _split_contents(contents, options))
+        return
+
+    in_flight: deque[tuple[list[ChapterT], shared_memory.SharedMemory, Future[list[list[PieceSpan]]]]] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            for chunk, contents in chain(head, chunks):
+                in_flight.append((chunk, *_submit_chunk(executor, contents, options)))
+                # 结果按提交顺序取回，章节顺序（以及之后的 running_num）与串行切分一致。
+                while len(in_flight) > 2 * workers:
+                    yield from _collect(in_flight.popleft())
+            while in_flight:
+                yield from _collect(in_flight.popleft())
+        finally:
+            for _, block, future in in_flight:
+                future.cancel()
+                _release(block)
+
+
+def _collect(
+    entry: tuple[list[ChapterT], shared_memory.SharedMemory, Future[list[list[PieceSpan]]]],
+) -> Iterator[tuple[ChapterT, list[PieceSpan]]]:
+    chunk, block, future = entry
+    try:
+        spans = future.result()
+    finally:
+        _release(block)
+    return zip(chunk, spans)
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass
 import re
-from typing import Match, Pattern
+import time
+from typing import TYPE_CHECKING, Any, Match, Pattern
 
+from .detector import SAMPLE_BREAK
 from .utils.text import split_by_paragraph, split_by_sentence
 
+if TYPE_CHECKING:
+    from .patterns import PatternLibrary
+
 
 GENERIC_NUMBERED_HEADING_PATTERN = re.compile(
     r"^(?P<number>\d{1,4})(?P<sep>[.\s、:：\-])\s*(?P<body>.+)$",
@@ -27,6 +33,22 @@ DEFAULT_CHAPTER_PATTERNS: tuple[Pattern[str], ...] = (
 )
 
 
+# 所有默认标题正则合成一个分支正则，每行只扫描一次；分支顺序即原先逐个尝试的顺序。
+_DEFAULT_HEADING_RE = re.compile(
+    "|".join(f"(?P<_h{idx}>{pattern.pattern})" for idx, pattern in enumerate(DEFAULT_CHAPTER_PATTERNS)),
+    re.IGNORECASE,
+)
+_GENERIC_HEADING_GROUP = f"_h{DEFAULT_CHAPTER_PATTERNS.index(GENERIC_NUMBERED_HEADING_PATTERN)}"
+# LLM 给出的标题正则单行匹配的超时（秒），超时即放弃该正则、改走兜底切分。
+LLM_PATTERN_MATCH_TIMEOUT = 0.05
+# 超过这个长度的行不像标题，更像被过宽的正则误中的正文。
+_MAX_HEADING_CHARS = 90
+# 相邻标题间距的中位数至少要有均匀分布时的这个比例，挤在一处的命中（目录、列表）不算章节标题。
+_MIN_HEADING_GAP_RATIO = 0.25
+# 默认标题可能的首字符（另加任意 Unicode 十进制数字），其余首字符的行不可能是标题。
+_DEFAULT_HEADING_FIRST_CHARS = frozenset("第一二三四五六七八九十百千万零〇序楔番cCpPeE")
+
+
 @dataclass(slots=True)
 class ParsedChapter:
     original_title: str
@@ -45,12 +67,19 @@ class ParseResult:
     leading_text: str = ""
 
 
+@dataclass(slots=True)
+class ChapterStream:
+    chapters: Iterator[ParsedChapter]
+    strategy: str
+    leading_text: str = ""
+
+
 def _is_generic_numbered_heading(line: str, matched: Match[str]) -> bool:
     body = matched.group("body").strip()
     if not body:
         return False
 
-    if len(line) > 90:
+    if len(line) > _MAX_HEADING_CHARS:
         return False
 
     if (body.count(",") + body.count("，")) >= 3:
@@ -70,7 +99,23 @@ def _is_generic_numbered_heading(line: str, matched: Match[str]) -> bool:
     return True
 
 
+def _is_default_chapter_heading(line: str) -> bool:
+    first = line[:1]
+    if first not in _DEFAULT_HEADING_FIRST_CHARS and not first.isdecimal():
+        return False
+
+    matched = _DEFAULT_HEADING_RE.match(line)
+    if not matched:
+        return False
+    if matched.lastgroup == _GENERIC_HEADING_GROUP:
+        return _is_generic_numbered_heading(line, matched)
+    return True
+
+
 def _is_chapter_heading(line: str, patterns: tuple[Pattern[str], ...]) -> bool:
+    if patterns is DEFAULT_CHAPTER_PATTERNS:
+        return _is_default_chapter_heading(line)
+
     for pattern in patterns:
         matched = pattern.match(line)
         if not matched:
@@ -81,6 +126,18 @@ def _is_chapter_heading(line: str, patterns: tuple[Pattern[str], ...]) -> bool:
     return False
 
 
+def _match_heading_line(raw_line: str, patterns: tuple[Pattern[str], ...]) -> str | None:
+    if patterns is DEFAULT_CHAPTER_PATTERNS:
+        first = raw_line[:1]
+        if not first.isspace() and first not in _DEFAULT_HEADING_FIRST_CHARS and not first.isdecimal():
+            return None
+
+    line = raw_line.strip()
+    if line and _is_chapter_heading(line, patterns):
+        return line
+    return None
+
+
 def _extract_chapters_and_leading_text(
     text: str,
     patterns: tuple[Pattern[str], ...],
@@ -89,10 +146,7 @@ def _extract_chapters_and_leading_text(
     heading_indices: list[int] = []
 
     for idx, raw_line in enumerate(raw_lines):
-        line = raw_line.strip()
-        if not line:
-            continue
-        if _is_chapter_heading(line, patterns):
+        if _match_heading_line(raw_line, patterns) is not None:
             heading_indices.append(idx)
 
     if not heading_indices:
@@ -111,38 +165,123 @@ def _extract_chapters_and_leading_text(
     return chapters, leading_text
 
 
-def _parse_with_llm_pattern(
-    text: str,
-    llm_client: object | None,
-    sample_text: str,
-) -> tuple[list[ParsedChapter], str]:
-    if llm_client is None:
-        return [], ""
+class _TimedPattern:
+    """regex 模块编译的 LLM 正则：每次匹配都带超时，超时抛 TimeoutError。"""
+
+    __slots__ = ("pattern", "timeout")
+
+    def __init__(self, pattern: Any, timeout: float) -> None:
+        self.pattern = pattern
+        self.timeout = timeout
+
+    def match(self, string: str) -> Any:
+        return self.pattern.match(string, timeout=self.timeout)
+
 
+def _compile_llm_pattern(pattern_text: str) -> _TimedPattern | None:
+    # 模型给出的正则可能有嵌套量词，用 stdlib re 跑整本书会卡住几分钟；regex 模块支持匹配超时。
+    import regex
+
+    try:
+        compiled = regex.compile(pattern_text, regex.IGNORECASE | regex.V0)
+    except (regex.error, ValueError, OverflowError, RecursionError):
+        return None
+    return _TimedPattern(compiled, LLM_PATTERN_MATCH_TIMEOUT)
+
+
+def _is_plausible_on_samples(pattern: _TimedPattern, sample_text: str) -> bool:
+    """先在检测样本上试跑：命中了标题、标题行不超过非空行的一半、都不太长且散布开，才值得扫整本书。"""
+    line_count = 0
+    headings: list[str] = []
+    offsets: list[int] = []
+    position = 0
+    try:
+        for raw_line in sample_text.splitlines(keepends=True):
+            line = raw_line.strip()
+            if line and line != SAMPLE_BREAK:
+                line_count += 1
+                if pattern.match(line):
+                    headings.append(line)
+                    offsets.append(position)
+            position += len(raw_line)
+    except TimeoutError:
+        return False
+
+    if not headings or len(headings) * 2 > line_count:
+        return False
+    if any(len(line) > _MAX_HEADING_CHARS for line in headings):
+        return False
+    if len(offsets) < 2:
+        return True
+    gaps = sorted(end - start for start, end in zip(offsets, offsets[1:]))
+    return gaps[len(gaps) // 2] * len(offsets) >= position * _MIN_HEADING_GAP_RATIO
+
+
+def _detect_llm_pattern(llm_client: object | None, sample_text: str) -> str:
     detector = getattr(llm_client, "detect_chapter_pattern", None)
     if detector is None:
-        return [], ""
+        return ""
 
     try:
         result = detector(sample_text)
     except Exception:
-        return [], ""
+        return ""
 
-    pattern_text = ""
     if isinstance(result, str):
-        pattern_text = result.strip()
-    elif isinstance(result, dict):
-        pattern_text = str(result.get("pattern", "")).strip()
+        return result.strip()
+    if isinstance(result, dict):
+        return str(result.get("pattern", "")).strip()
+    return ""
 
-    if not pattern_text:
+
+def _parse_with_pattern_text(text: str, pattern_text: str, sample_text: str) -> tuple[list[ParsedChapter], str]:
+    pattern = _compile_llm_pattern(pattern_text)
+    if pattern is None or not _is_plausible_on_samples(pattern, sample_text):
         return [], ""
 
     try:
-        pattern = re.compile(pattern_text, re.IGNORECASE)
-    except re.error:
+        return _extract_chapters_and_leading_text(text, (pattern,))  # type: ignore[arg-type]
+    except TimeoutError:
+        return [], ""
+
+
+def _parse_with_library(
+    text: str,
+    library: PatternLibrary,
+    sample_text: str,
+    fingerprint: str,
+) -> tuple[list[ParsedChapter], str]:
+    # 依次试库里学过的正则，命中即用；每次试的结果与耗时都记回库里，影响下次的排序。
+    for pattern_text in library.candidates(fingerprint):
+        started = time.perf_counter()
+        chapters, leading_text = _parse_with_pattern_text(text, pattern_text, sample_text)
+        seconds = time.perf_counter() - started
+        if chapters:
+            library.record_hit(pattern_text, fingerprint, seconds)
+            return chapters, leading_text
+        library.record_miss(pattern_text, seconds)
+    return [], ""
+
+
+def _parse_with_llm_pattern(
+    text: str,
+    llm_client: object | None,
+    sample_text: str,
+    library: PatternLibrary | None = None,
+    fingerprint: str = "",
+) -> tuple[list[ParsedChapter], str]:
+    if llm_client is None:
         return [], ""
 
-    return _extract_chapters_and_leading_text(text, (pattern,))
+    pattern_text = _detect_llm_pattern(llm_client, sample_text)
+    if not pattern_text:
+        return [], ""
+
+    started = time.perf_counter()
+    chapters, leading_text = _parse_with_pattern_text(text, pattern_text, sample_text)
+    if chapters and library is not None:
+        library.record_hit(pattern_text, fingerprint, time.perf_counter() - started)
+    return chapters, leading_text
 
 
 def _fallback_parse(text: str, mode: str = "paragraph", target_chars: int = 1000) -> list[ParsedChapter]:
@@ -162,24 +301,119 @@ def _fallback_parse(text: str, mode: str = "paragraph", target_chars: int = 1000
     ]
 
 
+def _parse_without_default_patterns(
+    text: str,
+    llm_client: object | None,
+    llm_sample_text: str | None,
+    fallback_mode: str,
+    target_chars: int,
+    pattern_library: PatternLibrary | None = None,
+) -> ParseResult:
+    sample_text = llm_sample_text or text[:6000]
+    fingerprint = ""
+    if pattern_library is not None:
+        from .patterns import layout_fingerprint
+
+        fingerprint = layout_fingerprint(sample_text)
+        library_chapters, library_leading_text = _parse_with_library(text, pattern_library, sample_text, fingerprint)
+        if library_chapters:
+            return ParseResult(chapters=library_chapters, strategy="library_pattern", leading_text=library_leading_text)
+
+    llm_chapters, llm_leading_text = _parse_with_llm_pattern(
+        text=text,
+        llm_client=llm_client,
+        sample_text=sample_text,
+        library=pattern_library,
+        fingerprint=fingerprint,
+    )
+    if llm_chapters:
+        return ParseResult(chapters=llm_chapters, strategy="llm_pattern", leading_text=llm_leading_text)
+
+    fallback_chapters = _fallback_parse(text, mode=fallback_mode, target_chars=target_chars)
+    return ParseResult(chapters=fallback_chapters, strategy=f"fallback_{fallback_mode}", leading_text="")
+
+
 def parse_chapters(
     text: str,
     llm_client: object | None = None,
     llm_sample_text: str | None = None,
     fallback_mode: str = "paragraph",
     target_chars: int = 1000,
+    pattern_library: PatternLibrary | None = None,
 ) -> ParseResult:
     chapters, leading_text = _extract_chapters_and_leading_text(text, DEFAULT_CHAPTER_PATTERNS)
     if chapters:
         return ParseResult(chapters=chapters, strategy="regex", leading_text=leading_text)
 
-    llm_chapters, llm_leading_text = _parse_with_llm_pattern(
-        text=text,
+    return _parse_without_default_patterns(
+        text,
         llm_client=llm_client,
-        sample_text=llm_sample_text or text[:6000],
+        llm_sample_text=llm_sample_text,
+        fallback_mode=fallback_mode,
+        target_chars=target_chars,
+        pattern_library=pattern_library,
     )
-    if llm_chapters:
-        return ParseResult(chapters=llm_chapters, strategy="llm_pattern", leading_text=llm_leading_text)
 
-    fallback_chapters = _fallback_parse(text, mode=fallback_mode, target_chars=target_chars)
-    return ParseResult(chapters=fallback_chapters, strategy=f"fallback_{fallback_mode}", leading_text="")
+
+def _iter_raw_lines(lines: Iterable[str]) -> Iterator[str]:
+    # 文件迭代只按 \n 断行，这里补齐 str.splitlines 的其余行分隔符，保证与整篇解析一致。
+    for line in lines:
+        yield from line.splitlines(keepends=True)
+
+
+def _iter_chapters_from(
+    first_heading: str,
+    raw_lines: Iterator[str],
+    patterns: tuple[Pattern[str], ...],
+) -> Iterator[ParsedChapter]:
+    heading = first_heading
+    content_lines: list[str] = []
+
+    for raw_line in raw_lines:
+        line = _match_heading_line(raw_line, patterns)
+        if line is not None:
+            yield ParsedChapter(original_title=heading, content="".join(content_lines).strip())
+            heading = line
+            content_lines = []
+            continue
+        content_lines.append(raw_line)
+
+    yield ParsedChapter(original_title=heading, content="".join(content_lines).strip())
+
+
+def stream_chapters(
+    lines: Iterable[str],
+    llm_client: object | None = None,
+    llm_sample_builder: Callable[[str], str] | None = None,
+    fallback_mode: str = "paragraph",
+    target_chars: int = 1000,
+    pattern_library: PatternLibrary | None = None,
+) -> ChapterStream:
+    raw_lines = _iter_raw_lines(lines)
+    leading_lines: list[str] = []
+
+    for raw_line in raw_lines:
+        line = _match_heading_line(raw_line, DEFAULT_CHAPTER_PATTERNS)
+        if line is not None:
+            return ChapterStream(
+                chapters=_iter_chapters_from(line, raw_lines, DEFAULT_CHAPTER_PATTERNS),
+                strategy="regex",
+                leading_text="".join(leading_lines),
+            )
+        leading_lines.append(raw_line)
+
+    # 没有命中默认标题时，后续的 LLM 正则与兜底切分都需要全文，只能退回整篇解析。
+    text = "".join(leading_lines)
+    parse_result = _parse_without_default_patterns(
+        text,
+        llm_client=llm_client,
+        llm_sample_text=llm_sample_builder(text) if llm_sample_builder else None,
+        fallback_mode=fallback_mode,
+        target_chars=target_chars,
+        pattern_library=pattern_library,
+    )
+    return ChapterStream(
+        chapters=iter(parse_result.chapters),
+        strategy=parse_result.strategy,
+        leading_text=parse_result.leading_text,
+    )
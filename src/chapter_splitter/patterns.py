@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+import hashlib
+import threading
+import time
+from typing import Any
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patterns (
+    pattern TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    seconds REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL
+)
+"""
+
+# 同一来源站点的标题行长得一样：只看较短的行，每行取前若干字符归类成“形状”。
+_SHAPE_LINE_CHARS = 40
+_SHAPE_PREFIX_CHARS = 12
+_FINGERPRINT_SHAPES = 5
+_CHINESE_NUMERALS = frozenset("一二三四五六七八九十百千万零〇")
+
+
+def _char_class(char: str) -> str:
+    if char.isdecimal():
+        return "9"
+    if char in _CHINESE_NUMERALS:
+        return "九"
+    if "\u4e00" <= char <= "\u9fff":
+        return "字"
+    if char.isalpha():
+        return "a"
+    if char.isspace():
+        return " "
+    return char
+
+
+def _line_shape(line: str) -> str:
+    shape: list[str] = []
+    for char in line[:_SHAPE_PREFIX_CHARS]:
+        kind = _char_class(char)
+        if not shape or shape[-1] != kind:
+            shape.append(kind)
+    return "".join(shape)
+
+
+def layout_fingerprint(sample_text: str) -> str:
+    """检测样本的版式指纹：短行里重复出现的行首形状（多半是章节标题），与具体章节号、标题文字无关。"""
+    shapes = Counter(
+        _line_shape(line)
+        for line in (raw.strip() for raw in sample_text.splitlines())
+        if line and len(line) <= _SHAPE_LINE_CHARS
+    )
+    repeated = sorted(shape for shape, count in shapes.most_common(_FINGERPRINT_SHAPES) if count > 1)
+    if not repeated:
+        return ""
+    return hashlib.sha256("\n".join(repeated).encode("utf-8")).hexdigest()[:16]
+
+
+class PatternLibrary:
+    """LLM 识别成功过的章节标题正则（SQLite 单文件），带命中统计；下次先在本地试这些正则，再问 LLM。"""
+
+    def __init__(self, path: Path, *, max_candidates: int = 20) -> None:
+        self.path = path
+        self.max_candidates = max(0, max_candidates)
+        self._lock = threading.Lock()
+        self._conn: Any = None
+
+    def _connection(self) -> Any:
+        # 只有默认标题没命中时才会用到，连接（以及 sqlite3 的导入）推迟到第一次查询。
+        if self._conn is None:
+            import sqlite3
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+        return self._conn
+
+    def candidates(self, fingerprint: str) -> list[str]:
+        """同一版式指纹学到的正则排最前，其次按成功率、命中次数从高到低，再按平均耗时从低到高。"""
+        with self._lock:
+            # 库文件还不存在就是什么都没学到，不为一次查询建库。
+            if not self.max_candidates or (self._conn is None and not self.path.exists()):
+                return []
+            try:
+                rows = self._connection().execute(
+                    "SELECT pattern FROM patterns "
+                    "ORDER BY fingerprint = ? DESC, CAST(hits AS REAL) / (hits + misses) DESC, hits DESC, "
+                    "seconds / (hits + misses) ASC LIMIT ?",
+                    (fingerprint, self.max_candidates),
+                ).fetchall()
+            except Exception:
+                return []
+        return [row[0] for row in rows]
+
+    def record_hit(self, pattern: str, fingerprint: str, seconds: float) -> None:
+        """正则成功划分出章节：新学到的就入库，已有的累计命中并改记为这次的版式指纹。"""
+        now = time.time()
+        self._execute(
+            "INSERT INTO patterns (pattern, fingerprint, hits, seconds, created_at, used_at) "
+            "VALUES (?, ?, 1, ?, ?, ?) "
+            "ON CONFLICT(pattern) DO UPDATE SET fingerprint = excluded.fingerprint, hits = hits + 1, "
+            "seconds = seconds + excluded.seconds, used_at = excluded.used_at",
+            (pattern, fingerprint, seconds, now, now),
+        )
+
+    def record_miss(self, pattern: str, seconds: float) -> None:
+        self._execute(
+            "UPDATE patterns SET misses = misses + 1, seconds = seconds + ? WHERE pattern = ?",
+            (seconds, pattern),
+        )
+
+    def _execute(self, sql: str, params: tuple[Any, ...]) -> None:
+        with self._lock:
+            try:
+                self._connection().execute(sql, params)
+            except Exception:
+                return
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,16 +1,77 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack, contextmanager, suppress
+from dataclasses import asdict, dataclass
 from pathlib import Path
+import codecs
+import os
+import queue
+import time
+from typing import TYPE_CHECKING, Any, Union
 
 from .config import AppConfig
-from .detector import build_detection_samples, detect_language
-from .formatter import TitleFormatInput, format_titles_batch
-from .llm import DeepSeekClient, GrokClient, LLMClient
-from .llm.client import RetryPolicy
-from .parser import parse_chapters
-from .renderer import RenderChapter, write_output
-from .splitter import split_chapter
+from .detector import (
+    adetect_language_from_samples,
+    build_detection_samples,
+    detect_language_from_samples,
+    language_samples,
+    read_language_samples,
+)
+from .encoding import detect_encoding
+from .formatter import (
+    TitleBatchPacker,
+    TitleFormatInput,
+    TitleFormatResult,
+    format_titles_batch,
+    format_titles_batch_async,
+)
+from .manifest import (
+    ManifestChapter,
+    RunManifest,
+    chapter_digest,
+    load_manifest,
+    manifest_path_for,
+    save_manifest,
+    settings_digest,
+)
+from .mapped import MAPPABLE_ENCODINGS, MappedParseResult, MappedSource, map_chapters
+from .parser import ChapterStream, ParsedChapter, ParseResult, parse_chapters, stream_chapters
+from .renderer import (
+    RenderChapter,
+    index_path_for,
+    output_target,
+    write_chapter_files,
+    write_jsonl,
+    write_output,
+)
+from .splitter import PieceSpan, span_text, split_content_spans
+from .stats import RunStats, llm_counters, stage, timed_iter
+from .table import TableChapter, TableParseResult, build_chapter_table
+
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from .llm import LLMClient, ResponseCache
+    from .llm.client import RetryPolicy
+    from .llm.scheduler import LLMScheduler
+    from .patterns import PatternLibrary
+
+
+LANGUAGE_SAMPLE_CHARS = 500
+_READ_CHUNK_CHARS = 1 << 20
+# 异步模式下等待写出的章节上限：写出跟不上格式化时，积压在内存里的章节不超过这么多。
+_RENDER_QUEUE_CHAPTERS = 256
+_RENDER_QUEUE_WAIT_SECONDS = 0.1
+# 上游出错时发给写出线程的信号：写出在 atomic_open 内中止，临时文件作废，原有输出保持不动。
+_ABORT_WRITE = object()
+
+
+class _WriteAborted(Exception):
+    pass
+
+ParsedSource = Union[ParseResult, ChapterStream, MappedParseResult, TableParseResult]
 
 
 @dataclass(slots=True)
@@ -20,111 +81,745 @@ class ProcessResult:
     parse_strategy: str
     input_chapter_count: int
     output_chapter_count: int
+    reused_chapter_count: int = 0
+    stats: RunStats | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "output_path": str(self.output_path),
+            "language": self.language,
+            "parse_strategy": self.parse_strategy,
+            "input_chapter_count": self.input_chapter_count,
+            "output_chapter_count": self.output_chapter_count,
+            "reused_chapter_count": self.reused_chapter_count,
+        }
+        if self.stats is not None:
+            data["stats"] = self.stats.to_dict()
+        return data
+
+
+@dataclass(slots=True)
+class _RunCounts:
+    input_chapters: int = 0
+    output_chapters: int = 0
+    reused_chapters: int = 0
+
+
+@dataclass(slots=True)
+class _PendingPiece:
+    title_input: TitleFormatInput
+    # 片段正文是 source 上的一个 span，写出时才切出来。
+    source: str
+    span: PieceSpan
+    chapter_index: int
+    title: str | None = None
+    title_source: str = ""
+
+    @property
+    def content(self) -> str:
+        return span_text(self.source, self.span)
+
+
+def _counter_delta(before: tuple[int, ...], after: tuple[int, ...]) -> tuple[int, ...]:
+    return tuple(end - begin for end, begin in zip(after, before))
+
+
+def _output_size(target: Path) -> int:
+    if target.is_dir():
+        return sum(path.stat().st_size for path in target.iterdir() if path.is_file())
+    return target.stat().st_size
+
+
+def _book_spans(chapter: ParsedChapter | TableChapter, spans: list[PieceSpan]) -> tuple[str, list[PieceSpan]]:
+    if not isinstance(chapter, TableChapter):
+        return chapter.content, spans
+    # 列式章节表：span 换算成整本书正文上的偏移，片段直接引用书的正文，章节切片用完即弃。
+    offset = chapter.start
+    return chapter.table.text, [
+        (start + offset, end + offset, tail_start + offset, tail_end + offset)
+        for start, end, tail_start, tail_end in spans
+    ]
 
 
 class ChapterSplitterPipeline:
-    def __init__(self, config: AppConfig) -> None:
+    def __init__(self, config: AppConfig, *, parent: ChapterSplitterPipeline | None = None) -> None:
+        # parent 非空时共用它的响应缓存、同步连接池和章节正则库，这些资源由 parent 负责关闭。
         self.config = config
+        self.parent = parent
         self.llm_client = self._build_llm_client()
+        self.pattern_library = parent.pattern_library if parent is not None else self._build_pattern_library()
+
+    def fork(self) -> ChapterSplitterPipeline:
+        """给并发的工作线程用的另一条流水线：LLM 客户端各自一个（异步客户端和调用统计不串），其余资源共用。"""
+        return type(self)(self.config, parent=self)
+
+    def _build_response_cache(self) -> ResponseCache | None:
+        from .llm import ResponseCache
+
+        if self.parent is not None:
+            return self.parent.llm_client.cache if self.parent.llm_client is not None else None
+        cache_config = self.config.llm.cache
+        if not cache_config.enabled or not self.config.llm.api_key:
+            return None
+
+        return ResponseCache(
+            Path(cache_config.path),
+            max_size_bytes=cache_config.max_size_mb * 1024 * 1024,
+            max_age_seconds=cache_config.max_age_days * 86400,
+        )
+
+    def _build_pattern_library(self) -> PatternLibrary | None:
+        from .patterns import PatternLibrary
+
+        detection = self.config.llm.chapter_detection
+        if not detection.library_enabled:
+            return None
+        return PatternLibrary(Path(detection.library_path), max_candidates=detection.library_candidates)
+
+    def _build_scheduler(self, retry: RetryPolicy) -> LLMScheduler:
+        from .llm.scheduler import CircuitBreakerPolicy, RateLimitPolicy, shared_scheduler
+
+        llm = self.config.llm
+        return shared_scheduler(
+            llm.provider,
+            rate_limit=RateLimitPolicy(
+                requests_per_minute=llm.rate_limit.requests_per_minute,
+                tokens_per_minute=llm.rate_limit.tokens_per_minute,
+            ),
+            circuit_breaker=CircuitBreakerPolicy(
+                failure_threshold=llm.circuit_breaker.failure_threshold,
+                reset_seconds=llm.circuit_breaker.reset_seconds,
+            ),
+            backoff_seconds=retry.delay_seconds,
+            max_backoff_seconds=retry.max_delay_seconds,
+        )
 
     def _build_llm_client(self) -> LLMClient | None:
+        # 没配 API key 等于不用 LLM，此时不导入 llm 包（及其 SDK 依赖），冷启动更快。
+        llm = self.config.llm
+        if llm.provider not in {"deepseek", "grok"} or not (llm.api_key and llm.model and llm.base_url):
+            return None
+
+        from .llm import DeepSeekClient, GrokClient
+        from .llm.client import ConnectionPolicy, RetryPolicy
+
         retry = RetryPolicy(
             max_attempts=self.config.llm.retry.max_attempts,
             delay_seconds=self.config.llm.retry.delay_seconds,
+            max_delay_seconds=self.config.llm.retry.max_delay_seconds,
+        )
+        connection = ConnectionPolicy(
+            max_connections=self.config.llm.connection.max_connections,
+            max_keepalive_connections=self.config.llm.connection.max_keepalive_connections,
+            keepalive_expiry=self.config.llm.connection.keepalive_expiry,
         )
 
-        if self.config.llm.provider == "deepseek":
-            return DeepSeekClient(
-                api_key=self.config.llm.api_key,
-                base_url=self.config.llm.base_url,
-                model=self.config.llm.model,
-                timeout=self.config.llm.timeout,
-                retry_policy=retry,
-            )
+        client_class = DeepSeekClient if self.config.llm.provider == "deepseek" else GrokClient
+        client = client_class(
+            api_key=self.config.llm.api_key,
+            base_url=self.config.llm.base_url,
+            model=self.config.llm.model,
+            timeout=self.config.llm.timeout,
+            retry_policy=retry,
+            cache=self._build_response_cache(),
+            connection_policy=connection,
+            scheduler=self._build_scheduler(retry),
+        )
+        if self.parent is not None and self.parent.llm_client is not None:
+            client.share_sync_client(self.parent.llm_client)
+        return client
 
-        if self.config.llm.provider == "grok":
-            return GrokClient(
-                api_key=self.config.llm.api_key,
-                base_url=self.config.llm.base_url,
-                model=self.config.llm.model,
-                timeout=self.config.llm.timeout,
-                retry_policy=retry,
-            )
+    def close(self) -> None:
+        if self.parent is not None:
+            # 共用的缓存、连接池和正则库留给 parent 关，这里只关自己的 LLM 客户端。
+            if self.llm_client is not None:
+                self.llm_client.close()
+            return
+        if self.pattern_library is not None:
+            self.pattern_library.close()
+        if self.llm_client is None:
+            return
+        self.llm_client.close()
+        if self.llm_client.cache is not None:
+            self.llm_client.cache.close()
 
-        return None
+    def _detect_language(self, samples: list[str], stats: RunStats | None = None) -> str:
+        with stage(stats, "detect_language"):
+            language_result = detect_language_from_samples(
+                samples,
+                llm_client=self.llm_client,
+                llm_sample_chars=LANGUAGE_SAMPLE_CHARS,
+                skip_llm_confidence=self.config.llm.language_detection.skip_llm_confidence,
+            )
+        if stats is not None:
+            stats.add("detect_language", bytes=sum(len(sample.encode("utf-8")) for sample in samples), items=len(samples))
+        return "zh" if language_result.language in {"zh", "mixed"} else "en"
 
-    def process(self, input_path: Path, output_path: Path) -> ProcessResult:
-        text = input_path.read_text(encoding="utf-8")
+    def _language_samples(self, text: str) -> list[str]:
+        detection = self.config.llm.language_detection
+        return language_samples(text, sample_size=detection.sample_size, sample_count=detection.sample_count)
 
-        language_result = detect_language(text, llm_client=self.llm_client)
-        language = "zh" if language_result.language in {"zh", "mixed"} else "en"
+    def _read_language_samples(self, input_path: Path, encoding: str) -> list[str]:
+        # 流式 / mmap 读取时按字节偏移直接读样本，不需要先把全文读进来。
+        detection = self.config.llm.language_detection
+        return read_language_samples(
+            input_path,
+            sample_size=detection.sample_size,
+            sample_count=detection.sample_count,
+            encoding=encoding,
+        )
 
-        sample_text = build_detection_samples(
+    def _build_sample_text(self, text: str) -> str:
+        return build_detection_samples(
             text,
             sample_size=self.config.llm.chapter_detection.sample_size,
             sample_count=self.config.llm.chapter_detection.sample_count,
         )
 
-        parser_llm = self.llm_client if self.config.llm.chapter_detection.enable_llm_fallback else None
-        parse_result = parse_chapters(
-            text,
-            llm_client=parser_llm,
-            llm_sample_text=sample_text,
-            fallback_mode=self.config.fallback.no_chapter_detected,
-            target_chars=self.config.splitter.target_chars,
-        )
+    @property
+    def _parser_llm(self) -> LLMClient | None:
+        return self.llm_client if self.config.llm.chapter_detection.enable_llm_fallback else None
 
-        title_inputs: list[TitleFormatInput] = []
-        piece_contents: list[str] = []
+    def _manifest_settings(self, language: str) -> dict[str, Any]:
+        return {
+            "splitter": asdict(self.config.splitter),
+            "formats": self.config.formats,
+            "language": language,
+            "llm": {
+                "provider": self.config.llm.provider,
+                "model": self.config.llm.model,
+                "enabled": bool(self.llm_client is not None and self.llm_client.enabled),
+            },
+        }
+
+    def _iter_pending_batches(
+        self,
+        chapters: Iterable[ParsedChapter],
+        counts: _RunCounts,
+        group: int,
+        previous_manifest: RunManifest | None = None,
+        manifest: RunManifest | None = None,
+        stats: RunStats | None = None,
+    ) -> Iterator[list[_PendingPiece]]:
+        # 每次产出 group 个装满的标题批次（最后一次除外）；切点都落在批次起点，
+        # 格式化时重新装批得到的边界与一次性格式化全部标题时一致。
+        title_config = self.config.llm.title_formatting
+        packer = TitleBatchPacker(batch_size=title_config.batch_size, token_budget=title_config.token_budget)
+        pending: list[_PendingPiece] = []
+        cuts: list[int] = []
         running_num = 1
+        llm_enabled = bool(getattr(self.llm_client, "enabled", False))
 
-        for chapter in parse_result.chapters:
-            pieces = split_chapter(
-                chapter,
-                target_chars=self.config.splitter.target_chars,
-                min_ratio=self.config.splitter.min_ratio,
-                max_ratio=self.config.splitter.max_ratio,
-                split_search_range=self.config.splitter.split_search_range,
-            )
+        for chapter_index, (chapter, source, spans) in enumerate(self._iter_split_chapters(chapters, stats)):
+            counts.input_chapters += 1
+            if stats is not None:
+                split_bytes = sum(len(span_text(source, span).encode("utf-8")) for span in spans)
+                stats.add("split_chapter", bytes=split_bytes, items=1)
 
-            for piece in pieces:
-                title_inputs.append(
-                    TitleFormatInput(
-                        original_title=piece.original_title,
-                        chapter_num=running_num,
-                        part=piece.part,
-                        total=piece.total,
+            reused = None
+            if manifest is not None:
+                digest = chapter_digest(chapter)
+                manifest.chapters.append(ManifestChapter(digest=digest, start_num=running_num))
+                if previous_manifest is not None:
+                    reused = previous_manifest.reusable_chapter(
+                        chapter_index, digest, running_num, len(spans), allow_local=not llm_enabled
                     )
+                    if reused is not None:
+                        counts.reused_chapters += 1
+
+            original_title = chapter.original_title
+            for offset, span in enumerate(spans):
+                title_input = TitleFormatInput(
+                    original_title=original_title,
+                    chapter_num=running_num,
+                    part=offset + 1,
+                    total=len(spans),
                 )
-                piece_contents.append(piece.content)
+                title, title_source = None, ""
+                if reused is not None:
+                    title, title_source = reused.titles[offset], reused.sources[offset]
+                elif packer.push(title_input):
+                    cuts.append(len(pending))
+                pending.append(_PendingPiece(title_input, source, span, chapter_index, title, title_source))
                 running_num += 1
 
-        formatted_titles = format_titles_batch(
+            while len(cuts) >= group:
+                cut = cuts[group - 1]
+                yield pending[:cut]
+                del pending[:cut]
+                cuts = [position - cut for position in cuts[group:]]
+
+            if pending and all(item.title is not None for item in pending):
+                yield pending
+                pending = []
+
+        if pending:
+            yield pending
+
+    def _iter_split_chapters(
+        self,
+        chapters: Iterable[ParsedChapter | TableChapter],
+        stats: RunStats | None,
+    ) -> Iterator[tuple[ParsedChapter | TableChapter, str, list[PieceSpan]]]:
+        splitter = self.config.splitter
+        options = {
+            "target_chars": splitter.target_chars,
+            "min_ratio": splitter.min_ratio,
+            "max_ratio": splitter.max_ratio,
+            "split_search_range": splitter.split_search_range,
+        }
+        workers = self.config.pipeline.split_workers
+        if workers != 1:
+            from .parallel import iter_split_spans
+
+            workers = workers if workers > 0 else (os.cpu_count() or 1)
+            # 整块取回结果前的等待都算切分耗时，拉取上游章节的解析耗时仍各自计入。
+            split = iter_split_spans(chapters, workers=workers, **options)
+            for chapter, spans in timed_iter(stats, "split_chapter", split):
+                yield chapter, *_book_spans(chapter, spans)
+            return
+
+        for chapter in chapters:
+            with stage(stats, "split_chapter"):
+                spans = split_content_spans(chapter.content, **options)
+            yield chapter, *_book_spans(chapter, spans)
+
+    def _iter_render_chapters(
+        self,
+        chapters: Iterable[ParsedChapter],
+        language: str,
+        counts: _RunCounts,
+        previous_manifest: RunManifest | None = None,
+        manifest: RunManifest | None = None,
+        stats: RunStats | None = None,
+    ) -> Iterator[RenderChapter]:
+        # 每次凑满 max_concurrency 个批次再格式化，让这些批次可以并发请求。
+        group = max(1, self.config.llm.title_formatting.max_concurrency)
+        for pending in self._iter_pending_batches(chapters, counts, group, previous_manifest, manifest, stats):
+            titles = self._format_pending_titles(pending, language, stats)
+            yield from self._emit_render_chapters(pending, titles, counts, manifest)
+
+    def _format_pending_titles(
+        self,
+        pending: list[_PendingPiece],
+        language: str,
+        stats: RunStats | None = None,
+    ) -> list[TitleFormatResult]:
+        title_inputs = [item.title_input for item in pending if item.title is None]
+        with stage(stats, "format_titles"):
+            results = format_titles_batch(
+                title_inputs,
+                language=language,
+                formats=self.config.formats,
+                batch_size=self.config.llm.title_formatting.batch_size,
+                llm_client=self.llm_client,
+                max_concurrency=self.config.llm.title_formatting.max_concurrency,
+                token_budget=self.config.llm.title_formatting.token_budget,
+            )
+        self._count_format_stats(stats, title_inputs, results)
+        return results
+
+    async def _aformat_pending_titles(
+        self,
+        pending: list[_PendingPiece],
+        language: str,
+        semaphore: asyncio.Semaphore,
+        stats: RunStats | None = None,
+    ) -> list[TitleFormatResult]:
+        title_inputs = [item.title_input for item in pending if item.title is None]
+        started = time.perf_counter()
+        results = await format_titles_batch_async(
             title_inputs,
             language=language,
             formats=self.config.formats,
             batch_size=self.config.llm.title_formatting.batch_size,
             llm_client=self.llm_client,
+            semaphore=semaphore,
+            token_budget=self.config.llm.title_formatting.token_budget,
         )
+        if stats is not None:
+            stats.add("format_titles", seconds=time.perf_counter() - started)
+        self._count_format_stats(stats, title_inputs, results)
+        return results
 
-        render_chapters = [
-            RenderChapter(title=title_result.title, content=content)
-            for title_result, content in zip(formatted_titles, piece_contents, strict=True)
-        ]
-
-        write_output(
-            output_path,
-            render_chapters,
-            separator=self.config.splitter.separator,
-            blank_lines=self.config.output.blank_lines_between_chapters,
-            encoding=self.config.output.encoding,
-            leading_text=parse_result.leading_text,
-        )
+    def _count_format_stats(
+        self,
+        stats: RunStats | None,
+        title_inputs: list[TitleFormatInput],
+        results: list[TitleFormatResult],
+    ) -> None:
+        if stats is None:
+            return
+        llm_enabled = bool(getattr(self.llm_client, "enabled", False))
+        fallbacks = sum(result.source == "local" for result in results) if llm_enabled else 0
+        title_bytes = sum(len(entry.original_title.encode("utf-8")) for entry in title_inputs)
+        stats.add("format_titles", bytes=title_bytes, items=len(results), fallbacks=fallbacks)
+
+    def _emit_render_chapters(
+        self,
+        pending: list[_PendingPiece],
+        results: list[TitleFormatResult],
+        counts: _RunCounts,
+        manifest: RunManifest | None,
+    ) -> Iterator[RenderChapter]:
+        formatted_titles = iter(results)
+        for item in pending:
+            if item.title is not None:
+                title, source = item.title, item.title_source
+            else:
+                result = next(formatted_titles)
+                title, source = result.title, result.source
+            counts.output_chapters += 1
+            if manifest is not None:
+                entry = manifest.chapters[item.chapter_index]
+                entry.titles.append(title)
+                entry.sources.append(source)
+            title_input = item.title_input
+            yield RenderChapter(
+                title=title,
+                content=item.content,
+                chapter_num=title_input.chapter_num,
+                part=title_input.part,
+                total=title_input.total,
+            )
+
+    def _write_chapters(self, output_path: Path, chapters: Iterable[RenderChapter], leading_text: str) -> None:
+        output = self.config.output
+        target = output_target(output_path, output.mode)
+        if output.mode == "jsonl":
+            write_jsonl(target, chapters, leading_text=leading_text)
+            return
+
+        options = {
+            "separator": self.config.splitter.separator,
+            "blank_lines": output.blank_lines_between_chapters,
+            "encoding": output.encoding,
+            "leading_text": leading_text,
+        }
+        if output.mode in {"per_chapter", "shards"}:
+            shard_size = output.shard_size if output.mode == "shards" else 1
+            write_chapter_files(target, chapters, shard_size=shard_size, workers=output.write_workers, **options)
+        elif output.mode == "single":
+            index_path = index_path_for(output_path) if output.index else None
+            write_output(output_path, chapters, index_path=index_path, **options)
+        else:
+            raise ValueError(f"unknown output mode: {output.mode!r}")
+
+    def _load_manifests(self, output_path: Path, language: str) -> tuple[RunManifest | None, RunManifest | None]:
+        if not self.config.output.incremental:
+            return None, None
+
+        manifest = RunManifest(settings_digest=settings_digest(self._manifest_settings(language)))
+        previous_manifest = load_manifest(manifest_path_for(output_path))
+        if previous_manifest is not None and previous_manifest.settings_digest != manifest.settings_digest:
+            previous_manifest = None
+        return previous_manifest, manifest
+
+    def _build_result(
+        self,
+        output_path: Path,
+        language: str,
+        parsed: ParsedSource,
+        counts: _RunCounts,
+        stats: RunStats | None,
+    ) -> ProcessResult:
+        target = output_target(output_path, self.config.output.mode)
+        if stats is not None:
+            fallback = int(parsed.strategy.startswith("fallback"))
+            stats.add("parse_chapters", items=counts.input_chapters, fallbacks=fallback)
+            stats.add("write_output", bytes=_output_size(target), items=counts.output_chapters)
 
         return ProcessResult(
-            output_path=output_path,
+            output_path=target,
             language=language,
-            parse_strategy=parse_result.strategy,
-            input_chapter_count=len(parse_result.chapters),
-            output_chapter_count=len(render_chapters),
+            parse_strategy=parsed.strategy,
+            input_chapter_count=counts.input_chapters,
+            output_chapter_count=counts.output_chapters,
+            reused_chapter_count=counts.reused_chapters,
+        )
+
+    def _new_stats(self, llm_client: object | None) -> RunStats | None:
+        return RunStats(llm_client=llm_client) if self.config.stats.enabled else None
+
+    def _finish_stats(self, result: ProcessResult, stats: RunStats | None, input_path: Path, started: float) -> None:
+        if stats is None:
+            return
+        stats.total_seconds = time.perf_counter() - started
+        stats.add("parse_chapters", bytes=input_path.stat().st_size)
+        result.stats = stats
+
+    def _read_full_text(self, input_path: Path, encoding: str) -> str | None:
+        if self.config.input.reader in {"stream", "mmap"}:
+            return None
+        # 整体解码时字节串和逐步扩宽的解码缓冲会同时驻留（约为正文的数倍）；分块解码再拼接，峰值只比正文多一倍。
+        parts: list[str] = []
+        with input_path.open(encoding=encoding) as handle:
+            while chunk := handle.read(_READ_CHUNK_CHARS):
+                parts.append(chunk)
+        return "".join(parts)
+
+    def _source_language_samples(self, input_path: Path, text: str | None, encoding: str) -> list[str]:
+        if text is not None:
+            return self._language_samples(text)
+        return self._read_language_samples(input_path, encoding)
+
+    def _parse_text(self, text: str, stats: RunStats | None) -> ParseResult:
+        with stage(stats, "parse_chapters"):
+            return parse_chapters(
+                text,
+                llm_client=self._parser_llm,
+                llm_sample_text=self._build_sample_text(text),
+                fallback_mode=self.config.fallback.no_chapter_detected,
+                target_chars=self.config.splitter.target_chars,
+                pattern_library=self.pattern_library,
+            )
+
+    @contextmanager
+    def _open_chapters(
+        self,
+        input_path: Path,
+        text: str | None,
+        stats: RunStats | None,
+        encoding: str,
+    ) -> Iterator[ParsedSource]:
+        if text is not None:
+            table = None
+            if self.config.pipeline.columnar:
+                with stage(stats, "parse_chapters"):
+                    table = build_chapter_table(text)
+            yield table if table is not None else self._parse_text(text, stats)
+            return
+
+        # mmap 只能扫描 UTF-8 这类自同步编码，GB18030 / UTF-16 等改为边解码边解析。
+        if self.config.input.reader == "stream" or codecs.lookup(encoding).name not in MAPPABLE_ENCODINGS:
+            with input_path.open(encoding=encoding) as handle:
+                with stage(stats, "parse_chapters"):
+                    chapter_stream = stream_chapters(
+                        handle,
+                        llm_client=self._parser_llm,
+                        llm_sample_builder=self._build_sample_text,
+                        fallback_mode=self.config.fallback.no_chapter_detected,
+                        target_chars=self.config.splitter.target_chars,
+                        pattern_library=self.pattern_library,
+                    )
+                chapter_stream.chapters = timed_iter(stats, "parse_chapters", chapter_stream.chapters)
+                yield chapter_stream
+            return
+
+        with MappedSource(input_path, encoding) as source:
+            with stage(stats, "parse_chapters"):
+                mapped = map_chapters(source)
+            # 没有默认标题时要靠 LLM 识别或兜底切分，这些都需要全文，退回整篇解码。
+            yield mapped if mapped is not None else self._parse_text(source.decode(), stats)
+
+    def process(self, input_path: Path, output_path: Path) -> ProcessResult:
+        if self.config.pipeline.async_mode:
+            import asyncio
+
+            return asyncio.run(self.process_async(input_path, output_path))
+
+        stats = self._new_stats(self.llm_client)
+        started = time.perf_counter()
+        encoding = detect_encoding(input_path, self.config.input.encoding)
+        text = self._read_full_text(input_path, encoding)
+        language = self._detect_language(self._source_language_samples(input_path, text, encoding), stats)
+        previous_manifest, manifest = self._load_manifests(output_path, language)
+        counts = _RunCounts()
+
+        with self._open_chapters(input_path, text, stats, encoding) as parsed:
+            with stage(stats, "write_output"):
+                self._write_chapters(
+                    output_path,
+                    self._iter_render_chapters(parsed.chapters, language, counts, previous_manifest, manifest, stats),
+                    parsed.leading_text,
+                )
+                if manifest is not None:
+                    save_manifest(manifest_path_for(output_path), manifest)
+
+        result = self._build_result(output_path, language, parsed, counts, stats)
+        self._finish_stats(result, stats, input_path, started)
+        return result
+
+    async def _adetect_language(self, samples: list[str], stats: RunStats | None) -> str:
+        started, before = time.perf_counter(), llm_counters(self.llm_client)
+        language_result = await adetect_language_from_samples(
+            samples,
+            llm_client=self.llm_client,
+            llm_sample_chars=LANGUAGE_SAMPLE_CHARS,
+            skip_llm_confidence=self.config.llm.language_detection.skip_llm_confidence,
         )
+        if stats is not None:
+            stats.add(
+                "detect_language",
+                seconds=time.perf_counter() - started,
+                bytes=sum(len(sample.encode("utf-8")) for sample in samples),
+                items=len(samples),
+                llm=_counter_delta(before, llm_counters(self.llm_client)),
+            )
+        return "zh" if language_result.language in {"zh", "mixed"} else "en"
+
+    def _enter_chapters(
+        self,
+        stack: ExitStack,
+        input_path: Path,
+        text: str | None,
+        stats: RunStats | None,
+        encoding: str,
+    ) -> ParsedSource:
+        before = llm_counters(self.llm_client)
+        parsed = stack.enter_context(self._open_chapters(input_path, text, stats, encoding))
+        if stats is not None:
+            stats.add("parse_chapters", llm=_counter_delta(before, llm_counters(self.llm_client)))
+        return parsed
+
+    async def process_async(self, input_path: Path, output_path: Path) -> ProcessResult:
+        """语言识别、解析切分与标题格式化重叠执行；输出与 process 完全一致。
+
+        解析和切分在线程里按批推进，每装满一个标题批次就立即送去格式化，
+        格式化结果按原顺序交给写出线程。
+        """
+        try:
+            return await self._process_async(input_path, output_path)
+        finally:
+            # 异步连接池绑定在本次事件循环上，循环结束前就要关掉。
+            aclose = getattr(self.llm_client, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def _process_async(self, input_path: Path, output_path: Path) -> ProcessResult:
+        import asyncio
+
+        # 各阶段并发执行，统计里的 LLM 计数按时间窗口归属，窗口重叠时可能有少量错位。
+        stats = self._new_stats(None)
+        started, llm_before = time.perf_counter(), llm_counters(self.llm_client)
+        title_config = self.config.llm.title_formatting
+        semaphore = asyncio.Semaphore(max(1, title_config.max_concurrency))
+
+        encoding = await asyncio.to_thread(detect_encoding, input_path, self.config.input.encoding)
+        text = await asyncio.to_thread(self._read_full_text, input_path, encoding)
+        samples = await asyncio.to_thread(self._source_language_samples, input_path, text, encoding)
+        language_task = asyncio.create_task(self._adetect_language(samples, stats))
+
+        with ExitStack() as stack:
+            parsed = await asyncio.to_thread(self._enter_chapters, stack, input_path, text, stats, encoding)
+            previous_manifest = manifest = None
+            if self.config.output.incremental:
+                # manifest 是否可复用取决于语言，增量模式下要先等语言结果。
+                previous_manifest, manifest = self._load_manifests(output_path, await language_task)
+
+            counts = _RunCounts()
+            batches = self._iter_pending_batches(
+                parsed.chapters,
+                counts,
+                1,
+                previous_manifest,
+                manifest,
+                stats,
+            )
+            stack.callback(batches.close)
+            formatted: asyncio.Queue[tuple[list[_PendingPiece], asyncio.Task] | None] = asyncio.Queue(
+                maxsize=max(1, title_config.max_concurrency)
+            )
+            render_queue: queue.Queue[Any] = queue.Queue(maxsize=_RENDER_QUEUE_CHAPTERS)
+            dispatch_failed = False
+
+            async def dispatch() -> None:
+                nonlocal dispatch_failed
+                try:
+                    language = await language_task
+                    while (pending := await asyncio.to_thread(next, batches, None)) is not None:
+                        task = asyncio.create_task(self._aformat_pending_titles(pending, language, semaphore, stats))
+                        await formatted.put((pending, task))
+                except Exception:
+                    dispatch_failed = True
+                    await formatted.put(None)
+                    raise
+                await formatted.put(None)
+
+            async def emit() -> None:
+                writer = asyncio.create_task(
+                    asyncio.to_thread(self._write_from_queue, output_path, render_queue, parsed, stats)
+                )
+
+                async def hand_over(item: Any) -> None:
+                    with suppress(queue.Full):
+                        render_queue.put_nowait(item)
+                        return
+                    # 队列满了就等写出线程腾位置；写出线程若已出错退出，直接抛出它的异常。
+                    while not writer.done():
+                        with suppress(queue.Full):
+                            await asyncio.to_thread(render_queue.put, item, True, _RENDER_QUEUE_WAIT_SECONDS)
+                            return
+                    await writer
+
+                failed = True
+                try:
+                    while (entry := await formatted.get()) is not None:
+                        pending, task = entry
+                        for chapter in self._emit_render_chapters(pending, await task, counts, manifest):
+                            await hand_over(chapter)
+                    failed = dispatch_failed
+                finally:
+                    if failed:
+                        # 原始异常由出错的一方抛出，写出线程这边的中止异常不再往外传。
+                        with suppress(Exception):
+                            await hand_over(_ABORT_WRITE)
+                            await writer
+                    else:
+                        await hand_over(None)
+                        await writer
+
+            dispatch_task = asyncio.create_task(dispatch())
+            try:
+                await emit()
+            except BaseException:
+                dispatch_task.cancel()
+                await asyncio.gather(dispatch_task, return_exceptions=True)
+                while not formatted.empty():
+                    if (entry := formatted.get_nowait()) is not None:
+                        entry[1].cancel()
+                raise
+            await dispatch_task
+
+        if manifest is not None:
+            save_manifest(manifest_path_for(output_path), manifest)
+
+        if stats is not None:
+            # 全程 LLM 计数减去语言识别与解析窗口内的部分，余下记在标题格式化上。
+            remaining = _counter_delta(llm_before, llm_counters(self.llm_client))
+            for name in ("detect_language", "parse_chapters"):
+                counted = stats.stages[name]
+                attributed = (counted.llm_calls, counted.llm_retries, counted.llm_failures, counted.cache_hits)
+                remaining = tuple(max(0, left - used) for left, used in zip(remaining, attributed))
+            stats.add("format_titles", llm=remaining)
+
+        result = self._build_result(output_path, await language_task, parsed, counts, stats)
+        self._finish_stats(result, stats, input_path, started)
+        return result
+
+    def _write_from_queue(
+        self,
+        output_path: Path,
+        render_queue: queue.Queue[Any],
+        parsed: ParsedSource,
+        stats: RunStats | None,
+    ) -> None:
+        waited = 0.0
+
+        def chapters() -> Iterator[RenderChapter]:
+            nonlocal waited
+            while True:
+                wait_started = time.perf_counter()
+                chapter = render_queue.get()
+                waited += time.perf_counter() - wait_started
+                if chapter is None:
+                    return
+                if chapter is _ABORT_WRITE:
+                    raise _WriteAborted
+                yield chapter
+
+        started = time.perf_counter()
+        self._write_chapters(output_path, chapters(), parsed.leading_text)
+        if stats is not None:
+            # 等待上游格式化的时间不算写出耗时。
+            stats.add("write_output", seconds=time.perf_counter() - started - waited)
@@ -1,58 +1,310 @@
 from __future__ import annotations
 
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
+import codecs
+import json
+import os
+import threading
+from typing import IO, Any
+
+
+# 目录输出里的文件清单：记下本工具写过哪些章节文件，重跑时只清理清单里的旧文件。
+CHAPTER_LISTING_NAME = ".chapter-files.json"
 
 
 @dataclass(slots=True)
 class RenderChapter:
     title: str
     content: str
+    chapter_num: int | None = None
+    part: int = 1
+    total: int = 1
 
 
 def default_output_path(input_path: Path) -> Path:
     return input_path.with_name(f"{input_path.stem}_split.txt")
 
 
-def render_text(
-    chapters: list[RenderChapter],
-    separator: str = "===",
-    blank_lines: int = 2,
-    leading_text: str = "",
-) -> str:
-    chunks: list[str] = []
+def index_path_for(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.index.jsonl")
+
+
+def output_target(output_path: Path, mode: str) -> Path:
+    """各输出模式实际写出的位置：single 即 output_path，per_chapter / shards 是同名目录，jsonl 是同名 .jsonl 文件。"""
+    if mode in {"per_chapter", "shards"}:
+        return output_path.with_suffix("")
+    if mode == "jsonl":
+        return output_path.with_suffix(".jsonl")
+    return output_path
+
+
+@contextmanager
+def atomic_open(path: Path, mode: str = "w", **kwargs: Any) -> Iterator[IO[Any]]:
+    """先写同目录下的临时文件，写完再 rename 成 path；读者要么看不到文件，要么看到完整的文件。"""
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with temp_path.open(mode, **kwargs) as handle:
+            yield handle
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _render_chunk(chapter: RenderChapter, separator: str) -> str:
+    wrapped_title = f"{separator}{chapter.title}{separator}"
+    chunk = f"{wrapped_title}\n{chapter.content.strip()}"
+    return chunk.strip()
+
+
+def _iter_fragments(
+    chapters: Iterable[RenderChapter],
+    separator: str,
+    blank_lines: int,
+    leading_text: str,
+) -> Iterator[tuple[str, RenderChapter | None]]:
+    # 产出 (文本片段, 片段对应的章节)；前言、章节间空行和结尾换行对应 None。
     line_break = "\n" * max(1, blank_lines)
+    leading = leading_text.rstrip("\n")
+    started = False
+    skipped_chunks = 0
 
     for chapter in chapters:
-        wrapped_title = f"{separator}{chapter.title}{separator}"
-        chunk = f"{wrapped_title}\n{chapter.content.strip()}"
-        chunks.append(chunk.strip())
+        chunk = _render_chunk(chapter, separator)
+        if not chunk:
+            if started:
+                skipped_chunks += 1
+            continue
 
-    chapter_text = line_break.join(chunks).strip()
+        if started:
+            yield line_break * (skipped_chunks + 1), None
+        elif leading:
+            yield leading, None
+            yield line_break, None
+        started = True
+        skipped_chunks = 0
+        yield chunk, chapter
 
-    leading = leading_text.rstrip("\n")
-    if leading and chapter_text:
-        return f"{leading}{line_break}{chapter_text}\n"
-    if leading:
-        return f"{leading}\n"
-    if chapter_text:
-        return f"{chapter_text}\n"
-    return ""
+    if started:
+        yield "\n", None
+    elif leading:
+        yield f"{leading}\n", None
+
+
+def iter_rendered_text(
+    chapters: Iterable[RenderChapter],
+    separator: str = "===",
+    blank_lines: int = 2,
+    leading_text: str = "",
+) -> Iterator[str]:
+    for fragment, _ in _iter_fragments(chapters, separator, blank_lines, leading_text):
+        yield fragment
+
+
+def render_text(
+    chapters: Iterable[RenderChapter],
+    separator: str = "===",
+    blank_lines: int = 2,
+    leading_text: str = "",
+) -> str:
+    return "".join(
+        iter_rendered_text(
+            chapters,
+            separator=separator,
+            blank_lines=blank_lines,
+            leading_text=leading_text,
+        )
+    )
 
 
 def write_output(
     output_path: Path,
-    chapters: list[RenderChapter],
+    chapters: Iterable[RenderChapter],
     separator: str = "===",
     blank_lines: int = 2,
     encoding: str = "utf-8",
     leading_text: str = "",
+    index_path: Path | None = None,
 ) -> Path:
-    output_text = render_text(
+    if index_path is not None:
+        fragments_with_chapters = _iter_fragments(chapters, separator, blank_lines, leading_text)
+        _write_with_index(output_path, index_path, fragments_with_chapters, encoding)
+        return output_path
+
+    fragments = iter_rendered_text(
         chapters,
         separator=separator,
         blank_lines=blank_lines,
         leading_text=leading_text,
     )
-    output_path.write_text(output_text, encoding=encoding)
+    with atomic_open(output_path, "w", encoding=encoding) as handle:
+        handle.writelines(fragments)
+    return output_path
+
+
+def _chapter_record(number: int, chapter: RenderChapter, **extra: Any) -> dict[str, Any]:
+    return {
+        "index": number,
+        "title": chapter.title,
+        "chapter_num": chapter.chapter_num,
+        "part": chapter.part,
+        "total": chapter.total,
+        **extra,
+    }
+
+
+def _write_with_index(
+    output_path: Path,
+    index_path: Path,
+    fragments: Iterable[tuple[str, RenderChapter | None]],
+    encoding: str,
+) -> None:
+    # 自己编码再按字节写出，编码结果与文本模式写出的逐字节一致，顺带得到每章在输出文件里的字节偏移和长度。
+    encoder = codecs.getincrementalencoder(encoding)()
+    with atomic_open(output_path, "wb") as handle, atomic_open(index_path, "w", encoding="utf-8") as index:
+        # 空串只会编码出 BOM（若有），BOM 不算进第一章。
+        position = handle.write(encoder.encode(""))
+        number = 0
+        for fragment, chapter in fragments:
+            if os.linesep != "\n":
+                fragment = fragment.replace("\n", os.linesep)
+            data = encoder.encode(fragment)
+            handle.write(data)
+            if chapter is not None:
+                number += 1
+                record = _chapter_record(number, chapter, offset=position, length=len(data))
+                index.write(json.dumps(record, ensure_ascii=False) + "\n")
+            position += len(data)
+        handle.write(encoder.encode("", final=True))
+
+
+def _write_file(path: Path, text: str, encoding: str) -> None:
+    # 整个文件一次编码、一次写入。
+    data = text.encode(encoding)
+    with atomic_open(path, "wb") as handle:
+        handle.write(data)
+
+
+def _write_files(jobs: Iterable[tuple[Path, str]], encoding: str, workers: int) -> None:
+    if workers <= 1:
+        for path, text in jobs:
+            _write_file(path, text, encoding)
+        return
+
+    # 最多 2×workers 个文件在途，渲染好的正文不会无限堆积；按提交顺序取结果，写失败时立即抛出。
+    in_flight: deque[Future[None]] = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chapter-writer") as executor:
+        try:
+            for path, text in jobs:
+                in_flight.append(executor.submit(_write_file, path, text, encoding))
+                while len(in_flight) > 2 * workers:
+                    in_flight.popleft().result()
+            while in_flight:
+                in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+def _iter_chapter_files(
+    output_dir: Path,
+    chapters: Iterable[RenderChapter],
+    shard_size: int,
+    separator: str,
+    blank_lines: int,
+    leading_text: str,
+) -> Iterator[tuple[Path, str]]:
+    leading = leading_text.rstrip("\n")
+    if leading:
+        yield output_dir / "00000.txt", f"{leading}\n"
+
+    iterator = iter(chapters)
+    first = 1
+    while shard := list(islice(iterator, shard_size)):
+        last = first + len(shard) - 1
+        name = f"{first:05d}.txt" if shard_size == 1 else f"{first:05d}-{last:05d}.txt"
+        text = render_text(shard, separator=separator, blank_lines=blank_lines)
+        if text:
+            yield output_dir / name, text
+        first = last + 1
+
+
+def write_chapter_files(
+    output_dir: Path,
+    chapters: Iterable[RenderChapter],
+    shard_size: int = 1,
+    separator: str = "===",
+    blank_lines: int = 2,
+    encoding: str = "utf-8",
+    leading_text: str = "",
+    workers: int = 1,
+) -> Path:
+    """每 shard_size 章写一个文件（1 即每章一个），格式与单文件输出相同；每个文件写完即原子出现，可以边写边读。
+
+    目录里有文件却没有本工具的文件清单时拒绝写入，不覆盖、不删除别人的文件。
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    listing_path = output_dir / CHAPTER_LISTING_NAME
+    previous = _read_chapter_listing(listing_path)
+    if previous is None:
+        if any(output_dir.iterdir()):
+            raise FileExistsError(f"{output_dir} 不是本工具的输出目录且不为空，拒绝写入")
+        previous = []
+    # 先认领目录，中途失败时下次运行仍能识别并清理。
+    _write_chapter_listing(listing_path, previous)
+    written: set[str] = set()
+
+    def jobs() -> Iterator[tuple[Path, str]]:
+        for path, text in _iter_chapter_files(
+            output_dir, chapters, max(1, shard_size), separator, blank_lines, leading_text
+        ):
+            written.add(path.name)
+            yield path, text
+
+    _write_files(jobs(), encoding, workers)
+    # 上次运行写过、这次没有再写的章节文件（章节变少或分片大小变了）一并清掉。
+    for name in previous:
+        if name not in written:
+            (output_dir / name).unlink(missing_ok=True)
+    _write_chapter_listing(listing_path, sorted(written))
+    return output_dir
+
+
+def _read_chapter_listing(path: Path) -> list[str] | None:
+    try:
+        names = json.loads(path.read_text(encoding="utf-8"))["files"]
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError):
+        # 清单损坏时只当作没有旧文件可清理，目录仍算本工具的。
+        return []
+    # 清单里只认本目录下的普通文件名，防止被改成别处的路径。
+    return [name for name in names if isinstance(name, str) and name == Path(name).name and not name.startswith(".")]
+
+
+def _write_chapter_listing(path: Path, names: list[str]) -> None:
+    with atomic_open(path, "w", encoding="utf-8") as handle:
+        handle.write(json.dumps({"files": names}, ensure_ascii=False))
+
+
+def write_jsonl(
+    output_path: Path,
+    chapters: Iterable[RenderChapter],
+    leading_text: str = "",
+) -> Path:
+    """每章一行 JSON（UTF-8）；有前言时第一行是 index 为 0 的前言记录。"""
+    with atomic_open(output_path, "w", encoding="utf-8") as handle:
+        leading = leading_text.rstrip("\n")
+        if leading:
+            record = _chapter_record(0, RenderChapter(title="", content=leading), content=leading)
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        for number, chapter in enumerate(chapters, start=1):
+            record = _chapter_record(number, chapter, content=chapter.content.strip())
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
     return output_path
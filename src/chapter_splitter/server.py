@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import copy
+import json
+import os
+import shutil
+import socketserver
+import stat
+import tempfile
+import threading
+from typing import Any
+
+from .config import AppConfig
+from .pipeline import ChapterSplitterPipeline, ProcessResult
+
+
+_COPY_CHUNK = 64 * 1024
+
+
+class SplitService:
+    """常驻的划分服务：预热好的流水线，固定大小的工作线程池和有界的等待队列。"""
+
+    def __init__(
+        self,
+        config: AppConfig,
+        *,
+        workers: int = 2,
+        queue_size: int = 16,
+        max_body_bytes: int = 0,
+    ) -> None:
+        self.config = config
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.max_body_bytes = max(0, max_body_bytes)
+        if config.output.mode != "single":
+            # 响应体就是划分后的文本，服务端总是写单个文件。
+            config = copy.deepcopy(config)
+            config.output.mode = "single"
+            self.config = config
+        self.pipeline = ChapterSplitterPipeline(config)
+        self._local = threading.local()
+        self._forks: list[ChapterSplitterPipeline] = []
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="split-job",
+            initializer=self._init_worker,
+        )
+        # 在跑的加排队的任务总数上限，满了直接拒绝，不让请求无限堆积。
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._active = 0
+
+    def warm_up(self) -> None:
+        # 提前建好 LLM 客户端（导入 openai、建连接池），第一个任务不用再付这笔开销。
+        if self.pipeline.llm_client is not None and self.pipeline.llm_client.enabled:
+            self.pipeline.llm_client.warm_up()
+
+    @property
+    def active_jobs(self) -> int:
+        return self._active
+
+    def try_acquire(self) -> bool:
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            self._active += 1
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def _init_worker(self) -> None:
+        # 每个工作线程一条自己的流水线和 LLM 客户端（异步客户端绑定各自的事件循环），
+        # 只共用预热好的同步连接池、响应缓存和正则库。
+        pipeline = self.pipeline.fork()
+        with self._lock:
+            self._forks.append(pipeline)
+        self._local.pipeline = pipeline
+
+    def _process(self, input_path: Path, output_path: Path) -> ProcessResult:
+        return self._local.pipeline.process(input_path, output_path)
+
+    def run(self, input_path: Path, output_path: Path) -> ProcessResult:
+        """在工作线程里处理一个任务并等待结果；调用前须先 try_acquire 占到名额。"""
+        return self._executor.submit(self._process, input_path, output_path).result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for pipeline in self._forks:
+            pipeline.close()
+        self.pipeline.close()
+
+
+class _SplitRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: Any
+
+    def address_string(self) -> str:
+        # Unix socket 上 client_address 是空字符串。
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: HTTPStatus, payload: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        service: SplitService = self.server.service
+        self._send_json(
+            HTTPStatus.OK,
+            {
+                "status": "ok",
+                "workers": service.workers,
+                "queue_size": service.queue_size,
+                "active_jobs": service.active_jobs,
+            },
+        )
+
+    def do_POST(self) -> None:
+        if self.path != "/split":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+
+        length = self.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            self._send_json(HTTPStatus.LENGTH_REQUIRED, {"error": "Content-Length required"})
+            return
+
+        # 拒绝时不读请求体，回完响应就断开连接，免得为一个不处理的请求收下整本书。
+        service: SplitService = self.server.service
+        if service.max_body_bytes and int(length) > service.max_body_bytes:
+            self._send_json(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                {"error": f"request body exceeds {service.max_body_bytes} bytes"},
+                {"Connection": "close"},
+            )
+            return
+        if not service.try_acquire():
+            self._send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"error": "job queue is full"},
+                {"Retry-After": "1", "Connection": "close"},
+            )
+            return
+
+        try:
+            with tempfile.TemporaryDirectory(prefix="chapter-splitter-") as job_dir:
+                input_path = Path(job_dir) / "input.txt"
+                output_path = Path(job_dir) / "output.txt"
+                with input_path.open("wb") as handle:
+                    _copy_exact(self.rfile, handle, int(length))
+                try:
+                    result = service.run(input_path, output_path)
+                except Exception as exc:
+                    self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exc).__name__}: {exc}"})
+                    return
+                self._send_output(output_path, result)
+        finally:
+            service.release()
+
+    def _send_output(self, output_path: Path, result: ProcessResult) -> None:
+        summary = result.to_dict()
+        summary.pop("output_path")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", f"text/plain; charset={self.server.service.config.output.encoding}")
+        self.send_header("Content-Length", str(output_path.stat().st_size))
+        self.send_header("X-Split-Result", json.dumps(summary))
+        self.end_headers()
+        with output_path.open("rb") as handle:
+            shutil.copyfileobj(handle, self.wfile, _COPY_CHUNK)
+
+
+def _copy_exact(source: Any, target: Any, length: int) -> None:
+    remaining = length
+    while remaining > 0:
+        chunk = source.read(min(_COPY_CHUNK, remaining))
+        if not chunk:
+            raise ConnectionError("request body ended early")
+        target.write(chunk)
+        remaining -= len(chunk)
+
+
+def _remove_stale_socket(path: str) -> None:
+    # 只清理上次遗留的 socket 文件；路径指向普通文件等其它东西时拒绝启动，免得误删。
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} 已存在且不是 Unix socket，拒绝覆盖")
+    os.unlink(path)
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(
+    service: SplitService,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: str | None = None,
+    quiet: bool = False,
+) -> socketserver.BaseServer:
+    """POST /split 提交 TXT 正文，响应体即划分结果；GET /health 查看队列状况。"""
+    if socket_path:
+        _remove_stale_socket(socket_path)
+        server: socketserver.BaseServer = _UnixServer(socket_path, _SplitRequestHandler)
+    else:
+        server = _TCPServer((host, port), _SplitRequestHandler)
+    server.service = service
+    server.quiet = quiet
+    return server
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 import re
 
@@ -40,10 +41,77 @@ def calculate_split_count(char_count: int, target: int, min_ratio: float, max_ra
     return max(1, split_count)
 
 
-def _closest(candidates: list[int], target: int) -> int | None:
-    if not candidates:
-        return None
-    return min(candidates, key=lambda value: abs(value - target))
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\n+")
+_SENTENCE_END_RE = re.compile(r"[。.!?！？]")
+_COMMA_RE = re.compile(r"[,，]")
+
+# (start, end, tail_start, tail_end)：片段正文为 text[start:end] + text[tail_start:tail_end]，
+# tail 是从下一段开头挪过来的右引号/括号。
+PieceSpan = tuple[int, int, int, int]
+
+
+class _BoundaryIndex:
+    """一次性记录整章的段落、句末、逗号断点，切分时对这些数组二分查找，不再复制剩余文本。"""
+
+    __slots__ = ("text", "paragraph_starts", "paragraph_ends", "sentence_ends", "comma_ends")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.paragraph_starts: list[int] = []
+        self.paragraph_ends: list[int] = []
+        for match in _PARAGRAPH_BREAK_RE.finditer(text):
+            self.paragraph_starts.append(match.start())
+            self.paragraph_ends.append(match.end())
+        self.sentence_ends = [match.end() for match in _SENTENCE_END_RE.finditer(text)]
+        self.comma_ends = [match.end() for match in _COMMA_RE.finditer(text)]
+
+    def _closest_paragraph(self, window_start: int, window_end: int, target: int) -> int | None:
+        best = None
+        idx = bisect_right(self.paragraph_ends, window_start)
+        while idx < len(self.paragraph_starts) and self.paragraph_starts[idx] < window_end:
+            # 窗口内看到的是被窗口截断后的换行串，至少两个换行才算段落断点。
+            run_start = max(self.paragraph_starts[idx], window_start)
+            run_end = min(self.paragraph_ends[idx], window_end)
+            if run_end - run_start >= 2:
+                candidate = run_start + 2
+                if best is None or abs(candidate - target) < abs(best - target):
+                    best = candidate
+            idx += 1
+        return best
+
+    @staticmethod
+    def _closest_end(ends: list[int], window_start: int, window_end: int, target: int) -> int | None:
+        low = bisect_left(ends, window_start + 1)
+        high = bisect_left(ends, window_end + 1)
+        if low >= high:
+            return None
+
+        idx = min(max(bisect_left(ends, target, low, high), low), high)
+        candidates = ends[max(low, idx - 1) : min(high, idx + 1)]
+        return min(candidates, key=lambda value: abs(value - target))
+
+    def find_split_point(self, offset: int, target_pos: int, search_range: int) -> int:
+        length = len(self.text) - offset
+        if length <= 0:
+            return 0
+
+        window_start = offset + max(0, target_pos - search_range)
+        window_end = offset + min(length, target_pos + search_range)
+        target = offset + target_pos
+
+        best_paragraph = self._closest_paragraph(window_start, window_end, target)
+        if best_paragraph is not None:
+            return best_paragraph - offset
+
+        best_sentence = self._closest_end(self.sentence_ends, window_start, window_end, target)
+        if best_sentence is not None:
+            return _extend_right_closing_marks(self.text, best_sentence) - offset
+
+        best_comma = self._closest_end(self.comma_ends, window_start, window_end, target)
+        if best_comma is not None:
+            return _extend_right_closing_marks(self.text, best_comma) - offset
+
+        return max(1, min(length - 1, target_pos))
 
 
 def _extend_right_closing_marks(text: str, point: int) -> int:
@@ -53,91 +121,115 @@ def _extend_right_closing_marks(text: str, point: int) -> int:
     return cursor
 
 
-def _rebalance_piece_edges(left: str, right: str) -> tuple[str, str]:
-    if not right:
-        return left, right
+def _skip_space(text: str, start: int) -> int:
+    while start < len(text) and text[start].isspace():
+        start += 1
+    return start
 
-    cursor = 0
-    while cursor < len(right) and right[cursor] in CLOSING_MARKS:
-        cursor += 1
-
-    if cursor == 0:
-        return left, right
 
-    return left + right[:cursor], right[cursor:].lstrip()
+def _trim_space_end(text: str, start: int, end: int) -> int:
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
 
 
 def find_split_point(text: str, target_pos: int, search_range: int = 200) -> int:
     if not text:
         return 0
+    return _BoundaryIndex(text).find_split_point(0, target_pos, search_range)
 
-    start = max(0, target_pos - search_range)
-    end = min(len(text), target_pos + search_range)
-    window = text[start:end]
-
-    paragraph_breaks = [start + match.start() + 2 for match in re.finditer(r"\n\n+", window)]
-    best_paragraph = _closest(paragraph_breaks, target_pos)
-    if best_paragraph is not None:
-        return best_paragraph
 
-    sentence_breaks = [start + match.end() for match in re.finditer(r"[。.!?！？]", window)]
-    best_sentence = _closest(sentence_breaks, target_pos)
-    if best_sentence is not None:
-        return _extend_right_closing_marks(text, best_sentence)
+def _split_normalized_spans(
+    normalized: str,
+    split_count: int,
+    split_search_range: int,
+) -> list[PieceSpan]:
+    # normalized 首尾已去空白，剩余文本始终是 normalized[offset:]，只移动下标不切片。
+    index = _BoundaryIndex(normalized)
+    total_chars = len(normalized)
+    spans: list[PieceSpan] = []
+    offset = 0
+    remaining_count = split_count
 
-    comma_breaks = [start + match.end() for match in re.finditer(r"[,，]", window)]
-    best_comma = _closest(comma_breaks, target_pos)
-    if best_comma is not None:
-        return _extend_right_closing_marks(text, best_comma)
+    while remaining_count > 1:
+        remaining_chars = total_chars - offset
+        target_pos = max(1, remaining_chars // remaining_count)
+        split_point = offset + index.find_split_point(offset, target_pos, split_search_range)
+
+        left_end = _trim_space_end(normalized, offset, split_point)
+        right_start = _skip_space(normalized, split_point)
+
+        if left_end == offset or right_start == total_chars:
+            hard_point = min(total_chars, offset + max(1, remaining_chars // remaining_count))
+            left_end = _trim_space_end(normalized, offset, hard_point)
+            right_start = _skip_space(normalized, hard_point)
+
+        tail_start = tail_end = right_start
+        if right_start < total_chars:
+            tail_end = _extend_right_closing_marks(normalized, right_start)
+            if tail_end > tail_start:
+                right_start = _skip_space(normalized, tail_end)
+            else:
+                tail_start = tail_end = 0
+
+        if (left_end == offset and tail_end == tail_start) or right_start == total_chars:
+            hard_point = min(total_chars, offset + max(1, remaining_chars // remaining_count))
+            left_end = _trim_space_end(normalized, offset, hard_point)
+            right_start = _skip_space(normalized, hard_point)
+            tail_start = tail_end = 0
+
+        spans.append((offset, left_end, tail_start, tail_end))
+        offset = right_start
+        remaining_count -= 1
 
-    return max(1, min(len(text) - 1, target_pos))
+    spans.append((offset, total_chars, 0, 0))
+    return [span for span in spans if span[1] > span[0] or span[3] > span[2]]
 
 
-def split_content(
+def split_content_spans(
     content: str,
     target_chars: int,
     min_ratio: float,
     max_ratio: float,
     split_search_range: int = 200,
-) -> list[str]:
+) -> list[PieceSpan]:
     normalized = content.strip()
     if not normalized:
-        return [""]
+        return [(0, 0, 0, 0)]
 
-    total_chars = len(normalized)
-    split_count = calculate_split_count(total_chars, target_chars, min_ratio, max_ratio)
+    split_count = calculate_split_count(len(normalized), target_chars, min_ratio, max_ratio)
+    lead = len(content) - len(content.lstrip())
     if split_count == 1:
-        return [normalized]
-
-    pieces: list[str] = []
-    remaining = normalized
-    remaining_count = split_count
-
-    while remaining_count > 1:
-        target_pos = max(1, len(remaining) // remaining_count)
-        split_point = find_split_point(remaining, target_pos, split_search_range)
+        return [(lead, lead + len(normalized), 0, 0)]
 
-        left = remaining[:split_point].strip()
-        right = remaining[split_point:].strip()
+    return [
+        (start + lead, end + lead, tail_start + lead, tail_end + lead)
+        for start, end, tail_start, tail_end in _split_normalized_spans(normalized, split_count, split_search_range)
+    ]
 
-        if not left or not right:
-            hard_point = max(1, len(remaining) // remaining_count)
-            left = remaining[:hard_point].strip()
-            right = remaining[hard_point:].strip()
 
-        left, right = _rebalance_piece_edges(left, right)
+def span_text(text: str, span: PieceSpan) -> str:
+    start, end, tail_start, tail_end = span
+    if tail_end > tail_start:
+        return text[start:end] + text[tail_start:tail_end]
+    return text[start:end]
 
-        if not left or not right:
-            hard_point = max(1, len(remaining) // remaining_count)
-            left = remaining[:hard_point].strip()
-            right = remaining[hard_point:].strip()
 
-        pieces.append(left)
-        remaining = right
-        remaining_count -= 1
-
-    pieces.append(remaining.strip())
-    return [piece for piece in pieces if piece]
+def split_content(
+    content: str,
+    target_chars: int,
+    min_ratio: float,
+    max_ratio: float,
+    split_search_range: int = 200,
+) -> list[str]:
+    spans = split_content_spans(
+        content,
+        target_chars=target_chars,
+        min_ratio=min_ratio,
+        max_ratio=max_ratio,
+        split_search_range=split_search_range,
+    )
+    return [span_text(content, span) for span in spans]
 
 
 def split_chapter(
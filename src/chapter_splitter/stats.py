@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+import time
+from typing import Any, ContextManager, TypeVar
+
+
+T = TypeVar("T")
+
+STAGE_ORDER = ("detect_language", "parse_chapters", "split_chapter", "format_titles", "write_output")
+
+
+@dataclass(slots=True)
+class StageStats:
+    seconds: float = 0.0
+    bytes: int = 0
+    items: int = 0
+    llm_calls: int = 0
+    llm_retries: int = 0
+    llm_failures: int = 0
+    cache_hits: int = 0
+    fallbacks: int = 0
+
+
+LLMCounters = tuple[int, int, int, int]
+
+
+def llm_counters(llm_client: object | None) -> LLMCounters:
+    stats = getattr(llm_client, "stats", None)
+    if stats is None:
+        return (0, 0, 0, 0)
+    return (stats.calls, stats.retries, stats.failures, stats.cache_hits)
+
+
+@dataclass(slots=True)
+class _Frame:
+    name: str
+    started: float
+    counters: LLMCounters
+
+
+@dataclass(slots=True)
+class RunStats:
+    """按阶段累计耗时与计数。阶段可以嵌套，外层阶段只记自身耗时（不含内层）。"""
+
+    llm_client: object | None = None
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    total_seconds: float = 0.0
+    _stack: list[_Frame] = field(default_factory=list)
+
+    def _counters(self) -> LLMCounters:
+        return llm_counters(self.llm_client)
+
+    def _charge(self, frame: _Frame, now: float, counters: LLMCounters) -> None:
+        delta = tuple(after - before for after, before in zip(counters, frame.counters))
+        self.add(frame.name, seconds=now - frame.started, llm=delta)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        now, counters = time.perf_counter(), self._counters()
+        if self._stack:
+            parent = self._stack[-1]
+            self._charge(parent, now, counters)
+        self._stack.append(_Frame(name, now, counters))
+        try:
+            yield self.stages.setdefault(name, StageStats())
+        finally:
+            frame = self._stack.pop()
+            now, counters = time.perf_counter(), self._counters()
+            self._charge(frame, now, counters)
+            if self._stack:
+                self._stack[-1].started = now
+                self._stack[-1].counters = counters
+
+    def add(
+        self,
+        name: str,
+        *,
+        seconds: float = 0.0,
+        bytes: int = 0,
+        items: int = 0,
+        fallbacks: int = 0,
+        llm: LLMCounters = (0, 0, 0, 0),
+    ) -> None:
+        stage = self.stages.setdefault(name, StageStats())
+        stage.seconds += seconds
+        stage.llm_calls += llm[0]
+        stage.llm_retries += llm[1]
+        stage.llm_failures += llm[2]
+        stage.cache_hits += llm[3]
+        stage.bytes += bytes
+        stage.items += items
+        stage.fallbacks += fallbacks
+
+    def to_dict(self) -> dict[str, Any]:
+        ordered = sorted(self.stages, key=lambda name: (STAGE_ORDER + (name,)).index(name))
+        return {
+            "total_seconds": round(self.total_seconds, 6),
+            "stages": {
+                name: {**asdict(self.stages[name]), "seconds": round(self.stages[name].seconds, 6)}
+                for name in ordered
+            },
+        }
+
+
+def stage(stats: RunStats | None, name: str) -> ContextManager[StageStats | None]:
+    # 未开启统计时返回共享的空上下文，不取时间、不建对象。
+    if stats is None:
+        return _NULL_STAGE
+    return stats.stage(name)
+
+
+def timed_iter(stats: RunStats | None, name: str, items: Iterable[T]) -> Iterable[T]:
+    """惰性迭代器每次取下一项的耗时记到 name 阶段（流式解析在写出时才真正执行）。"""
+    if stats is None:
+        return items
+    return _timed_iter(stats, name, items)
+
+
+def _timed_iter(stats: RunStats, name: str, items: Iterable[T]) -> Iterator[T]:
+    iterator = iter(items)
+    while True:
+        with stats.stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+_NULL_STAGE: ContextManager[None] = nullcontext()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+import re
+import sys
+from typing import Pattern
+
+from .parser import _DEFAULT_HEADING_FIRST_CHARS, DEFAULT_CHAPTER_PATTERNS, _match_heading_line
+
+
+# 除 \n 外 str.splitlines 认作换行的字符；正文里没有它们时只按 \n 断行即可。
+_RARE_LINE_BREAK_RE = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+# 可能是默认标题的行：跳过行首缩进后，首字符是十进制数字或默认标题的首字符。
+_HEADING_CANDIDATE_RE = re.compile(
+    "^[^\\S\n]*[\\d" + "".join(sorted(_DEFAULT_HEADING_FIRST_CHARS)) + "]",
+    re.MULTILINE,
+)
+
+
+class ChapterTable:
+    """列式章节表：正文只保留整本书一份，章节只存起止偏移（array）和驻留后的标题。"""
+
+    __slots__ = ("text", "titles", "starts", "ends")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.titles: list[str] = []
+        self.starts = array("q")
+        self.ends = array("q")
+
+    def append(self, title: str, start: int, end: int) -> None:
+        self.titles.append(sys.intern(title))
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def __getitem__(self, index: int) -> TableChapter:
+        return TableChapter(self, index)
+
+    def __iter__(self) -> Iterator[TableChapter]:
+        return (TableChapter(self, index) for index in range(len(self.titles)))
+
+
+class TableChapter:
+    """章节表里一行的视图，接口与 ParsedChapter 一致；content 每次访问时才切片。"""
+
+    __slots__ = ("table", "index")
+
+    index_hint = None
+
+    def __init__(self, table: ChapterTable, index: int) -> None:
+        self.table = table
+        self.index = index
+
+    @property
+    def original_title(self) -> str:
+        return self.table.titles[self.index]
+
+    @property
+    def start(self) -> int:
+        return self.table.starts[self.index]
+
+    @property
+    def end(self) -> int:
+        return self.table.ends[self.index]
+
+    @property
+    def content(self) -> str:
+        return self.table.text[self.start : self.end]
+
+    @property
+    def char_count(self) -> int:
+        return self.end - self.start
+
+
+@dataclass(slots=True)
+class TableParseResult:
+    chapters: ChapterTable
+    leading_text: str
+    strategy: str = "regex"
+
+
+def _strip_bounds(text: str, start: int, end: int) -> tuple[int, int]:
+    # 与 str.strip() 相同的空白判定，只移动下标。
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _iter_lines(text: str, patterns: tuple[Pattern[str], ...]) -> Iterator[tuple[int, str]]:
+    # 产出 (行首偏移, 含换行符的整行)；默认标题只需检查候选行，不必把全文拆成行列表。
+    if patterns is not DEFAULT_CHAPTER_PATTERNS or _RARE_LINE_BREAK_RE.search(text):
+        position = 0
+        for raw_line in text.splitlines(keepends=True):
+            yield position, raw_line
+            position += len(raw_line)
+        return
+
+    for matched in _HEADING_CANDIDATE_RE.finditer(text):
+        start = matched.start()
+        end = text.find("\n", start)
+        yield start, text[start : len(text) if end < 0 else end + 1]
+
+
+def build_chapter_table(
+    text: str,
+    patterns: tuple[Pattern[str], ...] = DEFAULT_CHAPTER_PATTERNS,
+) -> TableParseResult | None:
+    """按默认标题建列式章节表，章节划分与 parse_chapters 完全一致；没有标题时返回 None。"""
+    table = ChapterTable(text)
+    heading_starts: list[int] = []
+    content_starts: list[int] = []
+    titles: list[str] = []
+    for position, raw_line in _iter_lines(text, patterns):
+        line = _match_heading_line(raw_line, patterns)
+        if line is not None:
+            titles.append(line)
+            heading_starts.append(position)
+            content_starts.append(position + len(raw_line))
+
+    if not titles:
+        return None
+
+    content_ends = [*heading_starts[1:], len(text)]
+    for title, start, end in zip(titles, content_starts, content_ends):
+        table.append(title, *_strip_bounds(text, start, end))
+    return TableParseResult(chapters=table, leading_text=text[: heading_starts[0]])
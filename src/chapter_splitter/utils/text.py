@@ -1,16 +1,28 @@
 from __future__ import annotations
 
+from bisect import bisect_right
 from collections.abc import Iterable
+from itertools import accumulate, compress
 import re
 
 
 CLOSING_MARKS = set('”」』》】〕）)]}\"')
+_SENTENCE_END_MARKS = "。.!?！？"
+_CLOSING_CLASS = re.escape("".join(sorted(CLOSING_MARKS)))
+# 句末标点（连同紧跟的右引号/括号）之后的空白；第二组记下空白后是否又是右引号/括号。
+_SENTENCE_GAP_RE = re.compile(rf"([{_SENTENCE_END_MARKS}][{_CLOSING_CLASS}]*)\s+(?=([{_CLOSING_CLASS}])?)")
 
 
 def normalize_newlines(text: str) -> str:
     return text.replace("\r\n", "\n").replace("\r", "\n")
 
 
+def estimate_tokens(text: str) -> int:
+    """粗估 token 数：非 ASCII 字符按 1 个、ASCII 按 4 个字符 1 个计。"""
+    ascii_chars = len(text.encode("ascii", errors="ignore"))
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+
 def sample_text_chunks(text: str, sample_size: int = 2000, sample_count: int = 3) -> list[str]:
     normalized = normalize_newlines(text)
     if not normalized:
@@ -45,51 +57,63 @@ def split_by_sentence(text: str, target_chars: int = 1000) -> list[str]:
     if not normalized:
         return []
 
-    sentence_tokens: list[str] = []
-    cursor = 0
-    token: list[str] = []
-
-    while cursor < len(normalized):
-        char = normalized[cursor]
-        token.append(char)
-        cursor += 1
-
-        if char in "。.!?！？":
-            while cursor < len(normalized) and normalized[cursor] in CLOSING_MARKS:
-                token.append(normalized[cursor])
-                cursor += 1
-            sentence = "".join(token).strip()
-            if sentence:
-                sentence_tokens.append(sentence)
-            token = []
-
-    if token:
-        tail = "".join(token).strip()
-        if tail:
-            sentence_tokens.append(tail)
-
-    if not sentence_tokens:
-        return [normalized]
-
+    # 句子去掉首尾空白后首尾相接（装块时句间空白本就不保留），块长就是拼接串上的下标差，
+    # 每块只需从上限处往回找最后一个句末，不必逐句累加。
+    parts = _SENTENCE_GAP_RE.split(normalized)
+    gaps = parts[2::3]
+    del parts[2::3]
+    packed = "".join(parts)
+    hazards: list[int] = []
+    if any(gaps):
+        # 空白后紧跟的右引号/括号属于下一句，拼接后它挨着上一句的句末，须记下位置不让句末越过。
+        ends = list(accumulate(map(len, parts)))
+        hazards = [ends[2 * idx + 1] for idx in compress(range(len(gaps)), gaps)]
+    del parts, gaps
+
+    marks = [mark for mark in _SENTENCE_END_MARKS if mark in packed]
     target_chars = max(200, target_chars)
     chunks: list[str] = []
-    current: list[str] = []
-    current_len = 0
-
-    for sentence in sentence_tokens:
-        sentence_len = len(sentence)
-        if current and current_len + sentence_len > target_chars:
-            chunks.append("".join(current).strip())
-            current = [sentence]
-            current_len = sentence_len
-            continue
-        current.append(sentence)
-        current_len += sentence_len
-
-    if current:
-        chunks.append("".join(current).strip())
-
-    return [chunk for chunk in chunks if chunk]
+    start = 0
+    while start < len(packed):
+        end = _last_sentence_end(packed, start, start + target_chars, marks, hazards)
+        if end is None:
+            # 第一句就超过 target_chars，单独成块。
+            end = _next_sentence_end(packed, start, marks, hazards)
+        chunks.append(packed[start:end])
+        start = end
+    return chunks
+
+
+def _sentence_end(text: str, mark: int, hazards: list[int]) -> int:
+    # 句末标点后紧跟的右引号/括号归入本句。
+    stop = len(text)
+    idx = bisect_right(hazards, mark)
+    if idx < len(hazards):
+        stop = hazards[idx]
+    cursor = mark + 1
+    while cursor < stop and text[cursor] in CLOSING_MARKS:
+        cursor += 1
+    return cursor
+
+
+def _last_sentence_end(text: str, start: int, limit: int, marks: list[str], hazards: list[int]) -> int | None:
+    if limit >= len(text):
+        return len(text)
+    while True:
+        mark = max((text.rfind(char, start, limit) for char in marks), default=-1)
+        if mark < 0:
+            return None
+        end = _sentence_end(text, mark, hazards)
+        if end <= limit:
+            return end
+        limit = mark
+
+
+def _next_sentence_end(text: str, start: int, marks: list[str], hazards: list[int]) -> int:
+    found = [position for position in (text.find(char, start) for char in marks) if position >= 0]
+    if not found:
+        return len(text)
+    return _sentence_end(text, min(found), hazards)
 
 
 def iter_non_empty_lines(text: str) -> Iterable[str]:
@@ -0,0 +1,70 @@
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import shutil
+
+import pytest
+
+from chapter_splitter.batch import collect_batch_items, run_batch
+from chapter_splitter.config import AppConfig
+from chapter_splitter.pipeline import ChapterSplitterPipeline
+
+
+def _prepare(tmp_path: Path) -> Path:
+    source_dir = tmp_path / "books"
+    source_dir.mkdir()
+    for fixture in Path("tests/fixtures").glob("*.txt"):
+        shutil.copy(fixture, source_dir / fixture.name)
+    (source_dir / "old_split.txt").write_text("===第1章===\n旧输出\n", encoding="utf-8")
+    return source_dir
+
+
+def test_collect_batch_items_skips_split_outputs(tmp_path):
+    source_dir = _prepare(tmp_path)
+    items = collect_batch_items(str(source_dir), output_dir=tmp_path / "out")
+    assert [item.input_path.name for item in items] == ["chinese_sample.txt", "english_sample.txt"]
+    assert items[0].output_path == tmp_path / "out" / "chinese_sample_split.txt"
+
+
+def test_run_batch_with_process_pool_and_skip_up_to_date(tmp_path):
+    source_dir = _prepare(tmp_path)
+    items = collect_batch_items(str(source_dir / "*.txt"), output_dir=tmp_path / "out")
+    summary_path = tmp_path / "summary.jsonl"
+
+    records = run_batch(AppConfig(), items, summary_path=summary_path, workers=2)
+    assert sorted(record["status"] for record in records) == ["ok", "ok"]
+    assert all(record["input_chapter_count"] == 3 for record in records)
+    lines = [json.loads(line) for line in summary_path.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 2
+
+    rerun = run_batch(AppConfig(), items, summary_path=summary_path, workers=2)
+    assert [record["status"] for record in rerun] == ["skipped", "skipped"]
+
+    touched = items[0].input_path
+    future = items[0].output_path.stat().st_mtime + 10
+    os.utime(touched, (future, future))
+    partial = run_batch(AppConfig(), items, summary_path=summary_path, workers=1)
+    assert sorted(record["status"] for record in partial) == ["ok", "skipped"]
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="子进程要继承测试里打的补丁")
+def test_pool_workers_close_their_pipelines(tmp_path, monkeypatch):
+    source_dir = _prepare(tmp_path)
+    items = collect_batch_items(str(source_dir / "*.txt"), output_dir=tmp_path / "out")
+    closed_log = tmp_path / "closed.log"
+    close = ChapterSplitterPipeline.close
+
+    def recording_close(self):
+        with closed_log.open("a", encoding="utf-8") as handle:
+            handle.write(f"{os.getpid()}\n")
+        close(self)
+
+    monkeypatch.setattr(ChapterSplitterPipeline, "close", recording_close)
+    records = run_batch(AppConfig(), items, summary_path=tmp_path / "summary.jsonl", workers=2)
+
+    assert sorted(record["status"] for record in records) == ["ok", "ok"]
+    pids = closed_log.read_text(encoding="utf-8").split()
+    assert pids
+    assert len(set(pids)) == len(pids)
+    assert str(os.getpid()) not in pids
@@ -0,0 +1,55 @@
+from chapter_splitter.detector import (
+    _count_scripts,
+    detect_language,
+    detect_language_from_samples,
+    read_language_samples,
+)
+
+
+def _reference_counts(text: str) -> tuple[int, int]:
+    zh = sum(1 for ch in text if "一" <= ch <= "鿿")
+    latin = sum(1 for ch in text if "a" <= ch.lower() <= "z")
+    return zh, latin
+
+
+def test_count_scripts_matches_per_character_reference():
+    text = "第一章 江湖 Chapter OneİKé　鿿一䷿ꀀ αβγ 😀 abcXYZ"
+    assert _count_scripts(text) == _reference_counts(text)
+
+
+def test_samples_across_book_override_english_front_matter():
+    header = "Translated by an English fan group. All rights reserved. " * 10
+    text = header + "　　少年背起行囊，踏上旅途。江风猎猎，远山如黛。\n" * 400
+
+    assert detect_language(text).language == "en"
+    assert detect_language(text, sample_count=8).language == "zh"
+
+
+class LanguageLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def detect_language(self, sample):
+        self.calls += 1
+        return {"language": "en", "confidence": 0.8}
+
+
+def test_confident_heuristic_skips_llm_call():
+    llm = LanguageLLM()
+    result = detect_language_from_samples(["纯中文的样本文本。" * 20], llm_client=llm, skip_llm_confidence=0.9)
+    assert (result.language, result.source, llm.calls) == ("zh", "heuristic", 0)
+
+    result = detect_language_from_samples(["中文 mixed with English"], llm_client=llm, skip_llm_confidence=0.9)
+    assert (result.language, result.source, llm.calls) == ("en", "llm", 1)
+
+
+def test_read_language_samples_spreads_over_file(tmp_path):
+    path = tmp_path / "book.txt"
+    path.write_text("English preface. " * 50 + "中文正文。" * 2000, encoding="utf-8")
+
+    samples = read_language_samples(path, sample_size=100, sample_count=4)
+
+    assert len(samples) == 4
+    assert samples[0].startswith("English preface.")
+    assert all(len(sample) <= 100 for sample in samples)
+    assert "English" not in samples[-1] and "中文正文" in samples[-1]
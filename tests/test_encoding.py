@@ -0,0 +1,55 @@
+import pytest
+
+from chapter_splitter.detector import read_language_samples
+from chapter_splitter.encoding import detect_encoding, sniff_encoding
+
+
+CHINESE = "第一章 开始\n这是正文，他说：“走吧。”\n" * 200
+ENGLISH = "Chapter 1\nThis is the body of the chapter.\n" * 200
+
+
+@pytest.mark.parametrize(
+    ("text", "encoding", "expected"),
+    [
+        (CHINESE, "utf-8", "utf-8"),
+        (ENGLISH, "utf-8", "utf-8"),
+        (CHINESE, "utf-8-sig", "utf-8-sig"),
+        (CHINESE, "gbk", "gb18030"),
+        (CHINESE, "gb18030", "gb18030"),
+        (CHINESE, "utf-16", "utf-16"),
+        (CHINESE, "utf-16-le", "utf-16-le"),
+        (ENGLISH, "utf-16-be", "utf-16-be"),
+        (CHINESE, "utf-32", "utf-32"),
+    ],
+)
+def test_sniff_encoding(text, encoding, expected):
+    assert sniff_encoding(text.encode(encoding)) == expected
+
+
+def test_sniff_ignores_character_cut_at_prefix_end():
+    data = CHINESE.encode("gb18030")
+    assert sniff_encoding(data[:101]) == "gb18030"
+    assert sniff_encoding(CHINESE.encode("utf-8")[:100]) == "utf-8"
+
+
+def test_detect_encoding_keeps_configured_encoding(tmp_path):
+    source = tmp_path / "book.txt"
+    source.write_bytes(CHINESE.encode("gb18030"))
+    assert detect_encoding(source) == "gb18030"
+    assert detect_encoding(source, "big5") == "big5"
+
+
+def test_language_samples_align_utf16_offsets(tmp_path):
+    source = tmp_path / "book.txt"
+    source.write_bytes(CHINESE.encode("utf-16"))
+    samples = read_language_samples(source, sample_size=20, sample_count=4, encoding="utf-16")
+    assert len(samples) == 4
+    assert all(sample and set(sample) <= set(CHINESE) for sample in samples)
+
+
+def test_language_samples_start_on_whole_gb18030_characters(tmp_path):
+    source = tmp_path / "book.txt"
+    source.write_bytes(CHINESE.encode("gb18030"))
+    samples = read_language_samples(source, sample_size=20, sample_count=9, encoding="gb18030")
+    assert len(samples) == 9
+    assert all(sample and set(sample) <= set(CHINESE) for sample in samples)
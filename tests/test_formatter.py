@@ -1,13 +1,28 @@
+import threading
+import time
+
 from chapter_splitter.formatter import (
     TitleFormatInput,
     build_title_inputs,
+    estimate_title_tokens,
     extract_chapter_number,
     format_titles_batch,
+    pack_title_batches,
 )
 
 
+def _llm_titles(payload, templates):
+    # 守规矩的假 LLM：按请求给的模板填标题，正文统一写成 LLM。
+    return [
+        templates["split" if item.get("total", 1) > 1 else "single"].format(
+            num=item["chapter_num"], title="LLM", part=item.get("part", 1), total=item.get("total", 1)
+        )
+        for item in payload
+    ]
+
+
 class BadLLM:
-    def format_titles(self, payload, language):
+    def format_titles(self, payload, language, templates=None):
         return ["only-one"]
 
 
@@ -15,9 +30,9 @@ class GoodLLM:
     def __init__(self):
         self.calls = 0
 
-    def format_titles(self, payload, language):
+    def format_titles(self, payload, language, templates=None):
         self.calls += 1
-        return [f"LLM-{item['chapter_num']}" for item in payload]
+        return _llm_titles(payload, templates)
 
 
 def test_extract_chapter_number_variants():
@@ -46,10 +61,120 @@ def test_format_titles_batch_llm_success_in_batches():
     results = format_titles_batch(entries, language="en", formats={}, batch_size=20, llm_client=llm)
     assert len(results) == 100
     assert llm.calls == 5
-    assert results[0].title == "LLM-1"
+    assert results[0].title == "Chapter 1: LLM"
+    assert results[0].source == "llm"
 
 
 def test_build_title_inputs_from_dict():
     raw = [{"original_title": "第5章 终局", "part": 1, "total": 1, "chapter_num": None}]
     outputs = build_title_inputs(raw)
     assert outputs[0].chapter_num == 5
+
+
+class SlowLLM:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def format_titles(self, payload, language, templates=None):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight -= 1
+        if payload[0]["chapter_num"] == 21:
+            raise RuntimeError("provider error")
+        return _llm_titles(payload, templates)
+
+
+def test_format_titles_batch_concurrent_keeps_order_and_chunk_fallback():
+    entries = [
+        TitleFormatInput(original_title=f"Chapter {idx}: Start", chapter_num=idx, part=1, total=1)
+        for idx in range(1, 101)
+    ]
+    llm = SlowLLM()
+    results = format_titles_batch(
+        entries,
+        language="en",
+        formats={},
+        batch_size=10,
+        llm_client=llm,
+        max_concurrency=3,
+    )
+    assert 1 < llm.peak <= 3
+    assert [result.title for result in results[:20]] == [f"Chapter {idx}: LLM" for idx in range(1, 21)]
+    assert results[20].title == "Chapter 21: Start"
+    assert results[20].source == "local"
+    assert results[30].title == "Chapter 31: LLM"
+
+
+class RecordingLLM:
+    def __init__(self, replies=None):
+        self.payloads = []
+        self.templates = []
+        self.replies = replies
+
+    def format_titles(self, payload, language, templates=None):
+        self.payloads.append(payload)
+        self.templates.append(templates)
+        return self.replies if self.replies is not None else _llm_titles(payload, templates)
+
+
+def test_payload_drops_index_fallback_and_unsplit_part_fields():
+    entries = [
+        TitleFormatInput(original_title="第1章 开端", chapter_num=1, part=1, total=1),
+        TitleFormatInput(original_title="第2章 风起", chapter_num=2, part=2, total=3),
+    ]
+    llm = RecordingLLM()
+    formats = {"zh_no_split": "【{num}】{title}"}
+    results = format_titles_batch(entries, language="zh", formats=formats, llm_client=llm)
+    assert llm.templates == [{"single": "【{num}】{title}", "split": "第{num}章：{title} ({part}/{total})"}]
+    assert [result.title for result in results] == ["【1】LLM", "第2章：LLM (2/3)"]
+    assert llm.payloads == [
+        [
+            {"original_title": "第1章 开端", "chapter_num": 1},
+            {"original_title": "第2章 风起", "chapter_num": 2, "part": 2, "total": 3},
+        ]
+    ]
+
+
+def test_off_format_llm_titles_fall_back_to_local_format():
+    entries = [
+        TitleFormatInput(original_title="第1章 开端", chapter_num=1, part=1, total=1),
+        TitleFormatInput(original_title="第2章 风起", chapter_num=2, part=2, total=3),
+        TitleFormatInput(original_title="第3章 落幕", chapter_num=3, part=1, total=1),
+        TitleFormatInput(original_title="第4章 尾声", chapter_num=4, part=1, total=1),
+    ]
+    llm = RecordingLLM(replies=["LLM-1", "第2章：风起 (1/3)", "第9章：落幕", "第4章：尾声"])
+    results = format_titles_batch(entries, language="zh", formats={}, llm_client=llm)
+    assert [(result.title, result.source) for result in results] == [
+        ("第1章：开端", "local"),
+        ("第2章：风起 (2/3)", "local"),
+        ("第3章：落幕", "local"),
+        ("第4章：尾声", "llm"),
+    ]
+
+
+def test_token_budget_packs_short_titles_together_and_long_titles_apart():
+    short = [TitleFormatInput(f"第{idx}章 短", idx, 1, 1) for idx in range(1, 41)]
+    long = [TitleFormatInput(f"Chapter {idx}: " + "a long english title " * 8, idx, 1, 1) for idx in range(1, 41)]
+    budget = 20 * estimate_title_tokens(short[0])
+
+    assert [len(batch) for batch in pack_title_batches(short, batch_size=100, token_budget=budget)] == [20, 20]
+    long_batches = pack_title_batches(long, batch_size=100, token_budget=budget)
+    assert len(long_batches) > 2
+    for batch in long_batches:
+        assert sum(estimate_title_tokens(entry) for entry in long[batch.start : batch.stop]) <= budget
+    assert [len(batch) for batch in pack_title_batches(short, batch_size=15)] == [15, 15, 10]
+
+
+def test_packing_restarts_at_batch_boundaries():
+    entries = [TitleFormatInput(f"第{idx}章 " + "长" * (idx % 7) * 5, idx, 1, 1) for idx in range(1, 60)]
+    batches = pack_title_batches(entries, batch_size=8, token_budget=150)
+    for batch in batches:
+        rest = pack_title_batches(entries[batch.start :], batch_size=8, token_budget=150)
+        assert [(item.start + batch.start, item.stop + batch.start) for item in rest] == [
+            (item.start, item.stop) for item in batches[batches.index(batch) :]
+        ]
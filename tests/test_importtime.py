@@ -0,0 +1,66 @@
+from pathlib import Path
+import os
+import subprocess
+import sys
+
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = str(ROOT / "src")
+FIXTURES = ROOT / "tests" / "fixtures"
+# 只在真正启用 LLM 或异步模式时才需要的模块。
+LAZY_MODULES = ("chapter_splitter.llm", "openai", "httpx", "asyncio", "sqlite3")
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": SRC}
+    env.pop("DEEPSEEK_API_KEY", None)
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+def _imported(stderr: str) -> set[str]:
+    modules: set[str] = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and line.count("|") == 2:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def test_dry_run_does_not_import_llm_or_pipeline():
+    completed = _run("-m", "chapter_splitter.main", "split", str(FIXTURES / "english_sample.txt"), "--dry-run")
+    modules = _imported(completed.stderr)
+
+    assert "chapter_splitter.pipeline" not in modules
+    assert not [name for name in modules if name.startswith(LAZY_MODULES)]
+
+
+_LOADED_AFTER = """
+import sys
+{statement}
+print(",".join(sorted(name for name in sys.modules if name.startswith(tuple(sys.argv[1:])))))
+"""
+
+
+def test_cli_import_does_not_load_llm_dependencies():
+    completed = _run("-c", _LOADED_AFTER.format(statement="import chapter_splitter.main"), *LAZY_MODULES)
+    assert completed.stdout.strip() == ""
+
+
+_LLM_FREE_RUN = """
+from pathlib import Path
+from chapter_splitter.config import AppConfig
+from chapter_splitter.pipeline import ChapterSplitterPipeline
+
+ChapterSplitterPipeline(AppConfig()).process(Path({source!r}), Path({output!r}))
+"""
+
+
+def test_llm_free_run_never_loads_llm_package(tmp_path):
+    statement = _LLM_FREE_RUN.format(source=str(FIXTURES / "chinese_sample.txt"), output=str(tmp_path / "out.txt"))
+    completed = _run("-c", _LOADED_AFTER.format(statement=statement), *LAZY_MODULES)
+    assert completed.stdout.strip() == ""
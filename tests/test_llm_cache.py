@@ -0,0 +1,53 @@
+import time
+
+from chapter_splitter.llm import DeepSeekClient, ResponseCache
+from chapter_splitter.llm.cache import make_cache_key
+
+
+def _cache(tmp_path, **kwargs):
+    options = {"max_size_bytes": 1024 * 1024, "max_age_seconds": 3600}
+    options.update(kwargs)
+    return ResponseCache(tmp_path / "cache.sqlite3", **options)
+
+
+def test_cache_round_trip_survives_reopen(tmp_path):
+    cache = _cache(tmp_path)
+    key = make_cache_key("deepseek", "deepseek-chat", "system", "user")
+    cache.set(key, {"language": "zh", "confidence": 0.9})
+    cache.close()
+
+    reopened = _cache(tmp_path)
+    assert reopened.get(key) == {"language": "zh", "confidence": 0.9}
+    assert reopened.get(make_cache_key("deepseek", "other-model", "system", "user")) is None
+
+
+def test_cache_evicts_expired_entries(tmp_path, monkeypatch):
+    cache = _cache(tmp_path, max_age_seconds=60)
+    cache.set("stale", {"pattern": "^@@"})
+
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("stale") is None
+
+
+def test_cache_evicts_least_recently_used_over_size_limit(tmp_path):
+    cache = _cache(tmp_path, max_size_bytes=600)
+    for idx in range(10):
+        cache.set(f"key-{idx}", {"formatted": ["x" * 80]})
+
+    assert cache.get("key-0") is None
+    assert cache.get("key-9") is not None
+
+
+def test_client_serves_cached_responses_without_network(tmp_path):
+    cache = _cache(tmp_path)
+    client = DeepSeekClient(api_key="test-key", base_url="http://127.0.0.1:9", cache=cache)
+    system_prompt = "You are a chapter pattern detector."
+    user_prompt = (
+        "根据样本文本识别章节标题正则，只返回 JSON："
+        '{"pattern":"^...$"}；若无法识别返回 {"pattern":""}'
+        "\n\nsample"
+    )
+    cache.set(make_cache_key("deepseek", client.model, system_prompt, user_prompt), {"pattern": "^@@\\d+"})
+
+    assert client.detect_chapter_pattern("sample") == {"pattern": "^@@\\d+"}
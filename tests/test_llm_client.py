@@ -0,0 +1,216 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+import pytest
+
+from chapter_splitter.formatter import TitleFormatInput, format_titles_batch
+from chapter_splitter.llm import DeepSeekClient
+from chapter_splitter.llm.client import LATENCY_WINDOW, LLMCallStats, RetryPolicy
+from chapter_splitter.llm.scheduler import CircuitBreakerPolicy, LLMScheduler, RateLimitPolicy
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests.append(request)
+        self.server.peers.add(self.client_address)
+
+        if self.server.script:
+            status, headers = self.server.script.pop(0)
+            if status != 200:
+                self._send_error(status, headers)
+                return
+
+        content = json.dumps({"language": "zh", "confidence": 0.95})
+        body = json.dumps(
+            {
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": request.get("model", ""),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, headers):
+        body = json.dumps({"error": {"message": "scripted", "type": "server_error"}}).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAIHandler)
+    server.requests = []
+    server.peers = set()
+    server.script = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server, max_attempts=1, scheduler=None):
+    host, port = server.server_address
+    return DeepSeekClient(
+        api_key="test-key",
+        base_url=f"http://{host}:{port}/v1",
+        retry_policy=RetryPolicy(max_attempts=max_attempts, delay_seconds=0),
+        scheduler=scheduler,
+    )
+
+
+def test_client_reuses_one_connection_and_records_latency(fake_server):
+    client = _client(fake_server)
+    for _ in range(5):
+        assert client.detect_language("样本") == {"language": "zh", "confidence": 0.95}
+    client.close()
+
+    assert len(fake_server.requests) == 5
+    assert len(fake_server.peers) == 1
+    summary = client.stats.summary()
+    assert summary["calls"] == 5
+    assert summary["failures"] == 0
+    assert 0 < summary["latency_p50"] <= summary["latency_max"]
+
+
+def test_async_client_handles_concurrent_callers(fake_server):
+    client = _client(fake_server)
+
+    async def run():
+        try:
+            return await asyncio.gather(*(client.adetect_language(f"样本{idx}") for idx in range(8)))
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(run())
+    assert results == [{"language": "zh", "confidence": 0.95}] * 8
+    assert client.stats.calls == 8
+
+
+def test_client_honours_retry_after_on_429(fake_server):
+    fake_server.script = [(429, {"Retry-After": "0.2"})]
+    client = _client(fake_server, max_attempts=3)
+
+    started = time.perf_counter()
+    assert client.detect_language("样本") == {"language": "zh", "confidence": 0.95}
+    assert time.perf_counter() - started >= 0.2
+    client.close()
+
+    assert len(fake_server.requests) == 2
+    assert client.stats.failures == 1
+    assert client.stats.retries == 1
+
+
+def test_client_does_not_retry_client_errors(fake_server):
+    fake_server.script = [(400, {})]
+    client = _client(fake_server, max_attempts=3)
+    assert client.detect_language("样本") is None
+    client.close()
+    assert len(fake_server.requests) == 1
+
+
+def test_circuit_breaker_switches_to_local_titles(fake_server):
+    fake_server.script = [(500, {})] * 10
+    scheduler = LLMScheduler(circuit_breaker=CircuitBreakerPolicy(failure_threshold=2), backoff_seconds=0)
+    client = _client(fake_server, max_attempts=3, scheduler=scheduler)
+    entries = [TitleFormatInput(f"第{idx}章 标题", idx, 1, 1) for idx in range(1, 5)]
+
+    results = format_titles_batch(entries, language="zh", formats={}, batch_size=1, llm_client=client)
+    client.close()
+
+    assert [result.title for result in results] == [f"第{idx}章：标题" for idx in range(1, 5)]
+    assert {result.source for result in results} == {"local"}
+    assert len(fake_server.requests) == 2
+    assert scheduler.circuit_open
+    assert client.stats.short_circuits == 4
+
+
+def test_cancelled_probe_reopens_the_breaker(fake_server):
+    scheduler = LLMScheduler(
+        rate_limit=RateLimitPolicy(requests_per_minute=1),
+        circuit_breaker=CircuitBreakerPolicy(failure_threshold=1, reset_seconds=0),
+    )
+    scheduler.record_failure(ConnectionError("down"), 1)
+    # 先用掉这一分钟的配额，试探请求会卡在限速等待里被取消。
+    scheduler.reserve(1)
+    client = _client(fake_server, scheduler=scheduler)
+
+    async def run():
+        try:
+            await asyncio.wait_for(client.adetect_language("样本"), timeout=0.05)
+        finally:
+            await client.aclose()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert scheduler.circuit_open
+    assert scheduler.allow()
+    assert not fake_server.requests
+
+
+def test_async_client_is_closed_on_loop_change_and_close(fake_server):
+    client = _client(fake_server)
+    asyncio.run(client.adetect_language("样本"))
+    first = client._async_client
+    asyncio.run(client.adetect_language("样本"))
+    second = client._async_client
+
+    assert second is not first
+    assert first.is_closed()
+    client.close()
+    assert second.is_closed()
+    assert client._async_client is None
+
+
+def test_latency_samples_are_bounded():
+    stats = LLMCallStats()
+    for idx in range(LATENCY_WINDOW + 10):
+        stats.calls += 1
+        stats.record_latency(float(idx))
+
+    assert len(stats.latencies) == LATENCY_WINDOW
+    summary = stats.summary()
+    assert summary["latency_max"] == LATENCY_WINDOW + 9
+    assert summary["latency_total"] == sum(range(LATENCY_WINDOW + 10))
+    assert summary["latency_p50"] >= 10
+
+
+def test_title_templates_are_sent_once_in_the_prompt(fake_server):
+    client = _client(fake_server)
+    templates = {"single": "【{num}】{title}", "split": "【{num}-{part}】{title}"}
+    items = [{"original_title": f"第{idx}章 标题", "chapter_num": idx} for idx in range(1, 4)]
+    client.format_titles(items, "zh", templates)
+    client.close()
+
+    prompt = fake_server.requests[0]["messages"][-1]["content"]
+    assert prompt.count("【{num}】{title}") == 1
+    assert prompt.count("【{num}-{part}】{title}") == 1
+    assert prompt.index("【{num}】{title}") < prompt.index("输入: ")
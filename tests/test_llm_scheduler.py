@@ -0,0 +1,120 @@
+import pytest
+
+from chapter_splitter.llm.scheduler import (
+    CircuitBreaker,
+    CircuitBreakerPolicy,
+    LLMScheduler,
+    RateLimitPolicy,
+    TokenBucket,
+    retry_after_seconds,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(status_code)
+        self.status_code = status_code
+        self.response = _Response(headers or {})
+
+
+def test_token_bucket_reservations_accumulate_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+    clock.now += 2
+    assert bucket.reserve(0) == 0
+
+
+def test_scheduler_limits_requests_and_tokens():
+    clock = FakeClock()
+    scheduler = LLMScheduler(rate_limit=RateLimitPolicy(requests_per_minute=2, tokens_per_minute=600), clock=clock)
+    assert scheduler.reserve(100) == 0
+    assert scheduler.reserve(100) == 0
+    assert scheduler.reserve(100) == pytest.approx(30.0)
+
+    tokens_only = LLMScheduler(rate_limit=RateLimitPolicy(tokens_per_minute=600), clock=clock)
+    assert tokens_only.reserve(600) == 0
+    assert tokens_only.reserve(300) == pytest.approx(30.0)
+
+
+def test_backoff_grows_exponentially_with_jitter_and_cap():
+    scheduler = LLMScheduler(backoff_seconds=1, max_backoff_seconds=5, rng=lambda: 1.0)
+    assert [scheduler.record_failure(StatusError(503), attempt) for attempt in (1, 2, 3, 4)] == [1, 2, 4, 5]
+    low = LLMScheduler(backoff_seconds=1, rng=lambda: 0.0)
+    assert low.record_failure(StatusError(503), 3) == 2
+    assert low.record_failure(StatusError(401), 1) is None
+
+
+def test_retry_after_pauses_every_caller():
+    clock = FakeClock()
+    scheduler = LLMScheduler(clock=clock)
+    assert scheduler.record_failure(StatusError(429, {"retry-after": "3"}), 1) == 3
+    assert scheduler.reserve(1) == 3
+    clock.now += 3
+    assert scheduler.reserve(1) == 0
+
+
+def test_retry_after_parses_ms_and_http_date():
+    assert retry_after_seconds(StatusError(429, {"retry-after-ms": "250"})) == 0.25
+    date = StatusError(429, {"retry-after": "Thu, 01 Jan 1970 00:00:10 GMT"})
+    assert retry_after_seconds(date, now=4.0) == pytest.approx(6.0)
+    assert retry_after_seconds(StatusError(429, {"retry-after": "soon"})) is None
+    assert retry_after_seconds(ValueError("no response")) is None
+
+
+def test_circuit_breaker_half_opens_after_reset():
+    clock = FakeClock()
+    breaker = CircuitBreaker(CircuitBreakerPolicy(failure_threshold=2, reset_seconds=10), clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now += 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_bad_responses_do_not_trip_the_breaker():
+    scheduler = LLMScheduler(circuit_breaker=CircuitBreakerPolicy(failure_threshold=1), backoff_seconds=0)
+    scheduler.record_failure(ValueError("not json"), 1)
+    assert not scheduler.circuit_open
+    scheduler.record_failure(ConnectionError("down"), 1)
+    assert scheduler.circuit_open
+
+
+def test_bad_response_on_probe_reopens_the_breaker():
+    clock = FakeClock()
+    scheduler = LLMScheduler(circuit_breaker=CircuitBreakerPolicy(failure_threshold=1, reset_seconds=10), clock=clock)
+    scheduler.record_failure(ConnectionError("down"), 1)
+    clock.now += 10
+    assert scheduler.allow()
+
+    scheduler.record_failure(ValueError("not json"), 1)
+    clock.now += 5
+    assert scheduler.circuit_open
+    assert not scheduler.allow()
+    clock.now += 5
+    assert scheduler.allow()
@@ -0,0 +1,39 @@
+from chapter_splitter.mapped import MappedSource, map_chapters
+from chapter_splitter.parser import parse_chapters
+
+
+def test_mapped_chapters_match_full_parse_across_line_endings(tmp_path):
+    text = "前言\r\n第一章 开始\r\n　　正文一。\r第2章 继续\n正文二。\x0c  Chapter 3 End 尾声。\n"
+    source_path = tmp_path / "book.txt"
+    source_path.write_bytes(text.encode("utf-8"))
+
+    expected = parse_chapters(source_path.read_text(encoding="utf-8"), llm_client=None)
+    with MappedSource(source_path) as source:
+        mapped = map_chapters(source)
+        assert mapped is not None
+        assert mapped.leading_text == expected.leading_text
+        assert [(chapter.original_title, chapter.content) for chapter in mapped.chapters] == [
+            (chapter.original_title, chapter.content) for chapter in expected.chapters
+        ]
+
+
+def test_mapped_chapters_keep_byte_offsets_without_decoding(tmp_path):
+    body = "正文。\n" * 100
+    source_path = tmp_path / "book.txt"
+    source_path.write_text(f"第一章 甲\n{body}第二章 乙\n{body}", encoding="utf-8")
+
+    with MappedSource(source_path) as source:
+        mapped = map_chapters(source)
+        first, second = mapped.chapters
+        assert first.start == len("第一章 甲\n".encode("utf-8"))
+        assert first.byte_length == len(body.encode("utf-8"))
+        assert second.end == source.size
+        assert second.char_count == len(body.strip())
+
+
+def test_map_chapters_returns_none_without_default_headings(tmp_path):
+    source_path = tmp_path / "plain.txt"
+    source_path.write_text("只有正文。\n没有标题。\n", encoding="utf-8")
+
+    with MappedSource(source_path) as source:
+        assert map_chapters(source) is None
@@ -0,0 +1,16 @@
+from chapter_splitter.parallel import iter_split_spans
+from chapter_splitter.parser import ParsedChapter
+from chapter_splitter.splitter import split_content_spans
+
+
+def test_parallel_spans_match_serial_order():
+    chapters = [
+        ParsedChapter(original_title=f"第{idx}章", content="。".join(f"第{idx}章第{line}句" for line in range(idx * 7)))
+        for idx in range(1, 40)
+    ]
+    options = {"target_chars": 40, "min_ratio": 0.7, "max_ratio": 1.3, "split_search_range": 10}
+
+    results = list(iter_split_spans(chapters, workers=2, chunk_chars=200, **options))
+
+    assert [chapter for chapter, _ in results] == chapters
+    assert [spans for _, spans in results] == [split_content_spans(chapter.content, **options) for chapter in chapters]
@@ -1,4 +1,12 @@
-from chapter_splitter.parser import parse_chapters
+import io
+import time
+
+from chapter_splitter.parser import (
+    DEFAULT_CHAPTER_PATTERNS,
+    _is_chapter_heading,
+    parse_chapters,
+    stream_chapters,
+)
 
 
 class DummyPatternLLM:
@@ -40,6 +48,35 @@ def test_parse_with_llm_pattern_fallback():
     assert len(result.chapters) == 2
 
 
+class FixedPatternLLM:
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+
+    def detect_chapter_pattern(self, sample_text: str):
+        return {"pattern": self.pattern}
+
+
+def test_catastrophic_llm_pattern_times_out_on_samples():
+    text = ("a" * 60 + "\n正文。\n") * 20
+    started = time.perf_counter()
+    result = parse_chapters(text, llm_client=FixedPatternLLM(r"^(?:(a|aa)+)+b$"), llm_sample_text=text)
+    assert result.strategy == "fallback_paragraph"
+    assert time.perf_counter() - started < 5
+
+
+def test_llm_pattern_matching_most_sample_lines_is_rejected():
+    text = "第一段内容。\n第二段内容。\n第三段内容。\n"
+    result = parse_chapters(text, llm_client=FixedPatternLLM(r"^.+$"), llm_sample_text=text)
+    assert result.strategy == "fallback_paragraph"
+
+
+def test_llm_pattern_with_bunched_sample_matches_is_rejected():
+    listing = "".join(f"@@{num} 条目\n" for num in range(1, 6))
+    text = listing + "这是一段足够长的正文，用来撑开样本的长度。\n" * 30
+    result = parse_chapters(text, llm_client=FixedPatternLLM(r"^@@\d+"), llm_sample_text=text)
+    assert result.strategy == "fallback_paragraph"
+
+
 def test_parse_fallback_sentence_when_no_heading():
     text = "这是没有章节标题的文本。第一句结束。第二句继续。第三句结束。"
     result = parse_chapters(text, fallback_mode="sentence", target_chars=12)
@@ -80,3 +117,38 @@ def test_parse_should_not_treat_long_numeric_sentence_like_dialogue_as_heading()
     assert result.chapters[0].original_title == "Chapter 12: Real Chapter"
     assert "158 pink lace crop top" in result.chapters[0].content
     assert result.chapters[1].original_title == "Chapter 13: Next Chapter"
+
+
+def test_stream_chapters_matches_parse_chapters():
+    text = "简介\n这是简介。\n\n第一章 起点\n正文一。\n\nChapter 2: Next\n正文二。 第三章 终点\n正文三。\n"
+    full = parse_chapters(text)
+    stream = stream_chapters(io.StringIO(text))
+
+    assert stream.strategy == full.strategy == "regex"
+    assert stream.leading_text == full.leading_text
+    assert [(c.original_title, c.content) for c in stream.chapters] == [
+        (c.original_title, c.content) for c in full.chapters
+    ]
+
+
+def test_combined_heading_matcher_matches_sequential_patterns():
+    sequential = tuple(list(DEFAULT_CHAPTER_PATTERNS))
+    lines = [
+        "第十二章 归来",
+        "第12回",
+        "三、风起",
+        "序章 开端",
+        "番外",
+        "CHAPTER 3: Return",
+        "Part 2",
+        "prologue",
+        "12. The Road",
+        "１２ 全角数字",
+        "158 pink lace crop top, pink lace short shorts, petite and exquisite, this one's also wow, so hot!\"",
+        "1　document　processed...",
+        "partial results",
+        "普通正文。",
+        "cat",
+    ]
+    for line in lines:
+        assert _is_chapter_heading(line, DEFAULT_CHAPTER_PATTERNS) == _is_chapter_heading(line, sequential), line
@@ -0,0 +1,52 @@
+from chapter_splitter.parser import parse_chapters
+from chapter_splitter.patterns import PatternLibrary, layout_fingerprint
+
+
+class CountingPatternLLM:
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.calls = 0
+
+    def detect_chapter_pattern(self, sample_text: str):
+        self.calls += 1
+        return {"pattern": self.pattern}
+
+
+def _book(first: int, count: int) -> str:
+    return "".join(f"◆{num}◆ 标题{num}\n第{num}节的正文内容。\n更多正文。\n" for num in range(first, first + count))
+
+
+def test_layout_fingerprint_ignores_numbers_and_titles():
+    assert layout_fingerprint(_book(1, 5)) == layout_fingerprint(_book(300, 5))
+    assert layout_fingerprint(_book(1, 5)) != layout_fingerprint(_book(1, 5).replace("◆", "##"))
+    assert layout_fingerprint("只有一行。") == ""
+
+
+def test_learned_pattern_is_reused_without_llm(tmp_path):
+    library = PatternLibrary(tmp_path / "patterns.sqlite3")
+    llm = CountingPatternLLM(r"^◆\d+◆")
+
+    first = parse_chapters(_book(1, 4), llm_client=llm, pattern_library=library)
+    second = parse_chapters(_book(50, 6), llm_client=llm, pattern_library=library)
+
+    assert first.strategy == "llm_pattern"
+    assert second.strategy == "library_pattern"
+    assert len(second.chapters) == 6
+    assert second.chapters[0].original_title == "◆50◆ 标题50"
+    assert llm.calls == 1
+    library.close()
+
+
+def test_candidates_prefer_matching_layout_then_success_rate(tmp_path):
+    library = PatternLibrary(tmp_path / "patterns.sqlite3")
+    assert library.candidates("layout") == []
+    assert not (tmp_path / "patterns.sqlite3").exists()
+
+    library.record_hit("^a", "other", 0.1)
+    library.record_hit("^b", "other", 0.1)
+    library.record_miss("^b", 0.1)
+    library.record_hit("^c", "layout", 0.1)
+    library.record_miss("^c", 0.1)
+
+    assert library.candidates("layout") == ["^c", "^a", "^b"]
+    library.close()
@@ -0,0 +1,359 @@
+from pathlib import Path
+import json
+import time
+
+import pytest
+
+from chapter_splitter.config import AppConfig
+from chapter_splitter.pipeline import ChapterSplitterPipeline
+
+
+def _run(tmp_path: Path, source: Path, reader: str, **splitter) -> tuple[str, object]:
+    config = AppConfig()
+    config.input.reader = reader
+    for key, value in splitter.items():
+        setattr(config.splitter, key, value)
+    output_path = tmp_path / f"{source.stem}_{reader}.txt"
+    result = ChapterSplitterPipeline(config).process(input_path=source, output_path=output_path)
+    return output_path.read_text(encoding="utf-8"), result
+
+
+@pytest.mark.parametrize("reader", ["stream", "mmap"])
+@pytest.mark.parametrize("fixture", ["chinese_sample.txt", "english_sample.txt"])
+def test_stream_reader_matches_full_reader(tmp_path, fixture, reader):
+    source = Path("tests/fixtures") / fixture
+    full_text, full_result = _run(tmp_path, source, "full", target_chars=30)
+    stream_text, stream_result = _run(tmp_path, source, reader, target_chars=30)
+
+    assert stream_text == full_text
+    assert stream_result.parse_strategy == full_result.parse_strategy == "regex"
+    assert stream_result.input_chapter_count == full_result.input_chapter_count == 3
+    assert stream_result.output_chapter_count == full_result.output_chapter_count
+
+
+@pytest.mark.parametrize("reader", ["stream", "mmap"])
+def test_stream_reader_falls_back_when_no_heading(tmp_path, reader):
+    source = tmp_path / "plain.txt"
+    source.write_text("第一段内容。\n\n第二段内容。\n\n第三段内容。\n", encoding="utf-8")
+
+    full_text, full_result = _run(tmp_path, source, "full")
+    stream_text, stream_result = _run(tmp_path, source, reader)
+
+    assert stream_text == full_text
+    assert stream_result.parse_strategy == full_result.parse_strategy == "fallback_paragraph"
+    assert stream_result.input_chapter_count == 3
+
+
+@pytest.mark.parametrize("reader", ["full", "stream", "mmap"])
+@pytest.mark.parametrize("encoding", ["gb18030", "utf-16", "utf-8-sig"])
+def test_sniffed_encoding_matches_utf8_source(tmp_path, encoding, reader):
+    text = Path("tests/fixtures/chinese_sample.txt").read_text(encoding="utf-8")
+    source = tmp_path / f"encoded_{encoding}.txt"
+    source.write_bytes(text.encode(encoding))
+
+    expected_text, expected_result = _run(tmp_path, Path("tests/fixtures/chinese_sample.txt"), "full", target_chars=30)
+    encoded_text, encoded_result = _run(tmp_path, source, reader, target_chars=30)
+
+    assert encoded_text == expected_text
+    assert encoded_result.language == expected_result.language == "zh"
+    assert encoded_result.input_chapter_count == expected_result.input_chapter_count
+
+
+def _llm_titles(payload, templates):
+    # 守规矩的假 LLM：按请求给的模板填标题，正文统一写成 LLM。
+    return [
+        templates["split" if item.get("total", 1) > 1 else "single"].format(
+            num=item["chapter_num"], title="LLM", part=item.get("part", 1), total=item.get("total", 1)
+        )
+        for item in payload
+    ]
+
+
+class CountingTitleLLM:
+    enabled = True
+
+    def __init__(self):
+        self.formatted: list[int] = []
+
+    def format_titles(self, payload, language, templates=None):
+        self.formatted.extend(item["chapter_num"] for item in payload)
+        return _llm_titles(payload, templates)
+
+
+def _incremental_run(tmp_path: Path, source: Path, llm: CountingTitleLLM):
+    config = AppConfig()
+    config.output.incremental = True
+    pipeline = ChapterSplitterPipeline(config)
+    pipeline.llm_client = llm
+    output_path = tmp_path / "book_split.txt"
+    result = pipeline.process(input_path=source, output_path=output_path)
+    return output_path.read_text(encoding="utf-8"), result
+
+
+def test_incremental_run_only_formats_new_chapters(tmp_path):
+    source = tmp_path / "book.txt"
+    chapters = [f"第{idx}章 标题{idx}\n第{idx}章的正文。\n\n" for idx in range(1, 6)]
+    source.write_text("".join(chapters[:3]), encoding="utf-8")
+
+    first_llm = CountingTitleLLM()
+    _, first = _incremental_run(tmp_path, source, first_llm)
+    assert first_llm.formatted == [1, 2, 3]
+    assert first.reused_chapter_count == 0
+    assert (tmp_path / "book_split.manifest.json").exists()
+
+    source.write_text("".join(chapters), encoding="utf-8")
+    second_llm = CountingTitleLLM()
+    output, second = _incremental_run(tmp_path, source, second_llm)
+    assert second_llm.formatted == [4, 5]
+    assert second.reused_chapter_count == 3
+    assert [line for line in output.splitlines() if line.startswith("===")] == [
+        f"===第{idx}章：LLM===" for idx in range(1, 6)
+    ]
+
+    edited = chapters[:1] + ["第2章 标题2\n改过的正文。\n\n"] + chapters[2:]
+    source.write_text("".join(edited), encoding="utf-8")
+    third_llm = CountingTitleLLM()
+    _, third = _incremental_run(tmp_path, source, third_llm)
+    assert third_llm.formatted == [2]
+    assert third.reused_chapter_count == 4
+
+
+class FailingTitleLLM(CountingTitleLLM):
+    def format_titles(self, payload, language, templates=None):
+        super().format_titles(payload, language, templates)
+        raise TimeoutError("LLM down")
+
+
+def test_incremental_run_retries_fallback_titles(tmp_path):
+    source = tmp_path / "book.txt"
+    source.write_text("".join(f"第{idx}章 标题{idx}\n第{idx}章的正文。\n\n" for idx in range(1, 4)), encoding="utf-8")
+
+    first_output, first = _incremental_run(tmp_path, source, FailingTitleLLM())
+    assert "===第1章：标题1===" in first_output.splitlines()
+
+    second_llm = CountingTitleLLM()
+    output, second = _incremental_run(tmp_path, source, second_llm)
+    assert second_llm.formatted == [1, 2, 3]
+    assert second.reused_chapter_count == 0
+    assert [line for line in output.splitlines() if line.startswith("===")] == [
+        f"===第{idx}章：LLM===" for idx in range(1, 4)
+    ]
+
+    third_llm = CountingTitleLLM()
+    _, third = _incremental_run(tmp_path, source, third_llm)
+    assert third_llm.formatted == []
+    assert third.reused_chapter_count == 3
+
+
+def test_stats_are_collected_only_when_enabled(tmp_path):
+    source = Path("tests/fixtures/chinese_sample.txt")
+    _, plain_result = _run(tmp_path, source, "full")
+    assert plain_result.stats is None
+    assert "stats" not in plain_result.to_dict()
+
+    config = AppConfig()
+    config.stats.enabled = True
+    config.splitter.target_chars = 30
+    pipeline = ChapterSplitterPipeline(config)
+    pipeline.llm_client = CountingTitleLLM()
+    result = pipeline.process(input_path=source, output_path=tmp_path / "stats_split.txt")
+
+    stages = result.to_dict()["stats"]["stages"]
+    assert list(stages) == ["detect_language", "parse_chapters", "split_chapter", "format_titles", "write_output"]
+    assert stages["parse_chapters"]["bytes"] == source.stat().st_size
+    assert stages["parse_chapters"]["items"] == 3
+    assert stages["format_titles"]["items"] == result.output_chapter_count
+    assert stages["write_output"]["bytes"] == (tmp_path / "stats_split.txt").stat().st_size
+
+
+@pytest.mark.parametrize("reader", ["full", "stream", "mmap"])
+def test_async_pipeline_matches_sync(tmp_path, monkeypatch, reader):
+    # 写出队列只留一个位置，异步模式要靠等待写出线程腾位置才能走完。
+    monkeypatch.setattr("chapter_splitter.pipeline._RENDER_QUEUE_CHAPTERS", 1)
+    source = Path("tests/fixtures/chinese_sample.txt")
+    outputs = []
+    for async_mode in (False, True):
+        config = AppConfig()
+        config.input.reader = reader
+        config.splitter.target_chars = 30
+        config.pipeline.async_mode = async_mode
+        config.stats.enabled = True
+        config.llm.title_formatting.batch_size = 2
+        pipeline = ChapterSplitterPipeline(config)
+        pipeline.llm_client = CountingTitleLLM()
+        output_path = tmp_path / f"{reader}_{async_mode}.txt"
+        result = pipeline.process(input_path=source, output_path=output_path)
+        outputs.append((output_path.read_text(encoding="utf-8"), result))
+
+    (sync_text, sync_result), (async_text, async_result) = outputs
+    assert async_text == sync_text
+    assert async_result.output_chapter_count == sync_result.output_chapter_count
+    async_stages = async_result.to_dict()["stats"]["stages"]
+    assert async_stages["format_titles"]["items"] == async_result.output_chapter_count
+    assert async_stages["write_output"]["bytes"] == (tmp_path / f"{reader}_True.txt").stat().st_size
+
+
+class SlowTitleLLM(CountingTitleLLM):
+    def format_titles(self, payload, language, templates=None):
+        time.sleep(0.05)
+        return super().format_titles(payload, language, templates)
+
+
+def test_async_pipeline_overlaps_llm_batches(tmp_path):
+    source = tmp_path / "book.txt"
+    source.write_text("".join(f"第{idx}章 标题{idx}\n正文{idx}。\n\n" for idx in range(1, 9)), encoding="utf-8")
+    config = AppConfig()
+    config.pipeline.async_mode = True
+    config.llm.title_formatting.batch_size = 1
+    config.llm.title_formatting.max_concurrency = 8
+    pipeline = ChapterSplitterPipeline(config)
+    pipeline.llm_client = SlowTitleLLM()
+
+    started = time.perf_counter()
+    result = pipeline.process(input_path=source, output_path=tmp_path / "book_split.txt")
+    elapsed = time.perf_counter() - started
+
+    assert result.output_chapter_count == 8
+    assert sorted(pipeline.llm_client.formatted) == list(range(1, 9))
+    assert elapsed < 8 * 0.05
+
+
+class ClosingTitleLLM(CountingTitleLLM):
+    def __init__(self):
+        super().__init__()
+        self.aclosed = 0
+
+    async def aclose(self):
+        self.aclosed += 1
+
+
+def test_async_pipeline_closes_async_client(tmp_path):
+    source = tmp_path / "book.txt"
+    source.write_text("第1章 标题1\n正文1。\n\n第2章 标题2\n正文2。\n", encoding="utf-8")
+    config = AppConfig()
+    config.pipeline.async_mode = True
+    pipeline = ChapterSplitterPipeline(config)
+    pipeline.llm_client = ClosingTitleLLM()
+
+    pipeline.process(input_path=source, output_path=tmp_path / "book_split.txt")
+
+    assert pipeline.llm_client.aclosed == 1
+
+
+class BatchRecordingLLM(CountingTitleLLM):
+    def __init__(self):
+        super().__init__()
+        self.batches: list[list[int]] = []
+
+    def format_titles(self, payload, language, templates=None):
+        self.batches.append([item["chapter_num"] for item in payload])
+        return super().format_titles(payload, language, templates)
+
+
+def test_sync_and_async_send_identical_token_packed_batches(tmp_path):
+    source = tmp_path / "book.txt"
+    titles = ["短", "一个相当长的标题" * 6, "中等长度的标题", "长" * 40]
+    source.write_text(
+        "".join(f"第{idx}章 {titles[idx % 4]}\n正文{idx}。\n\n" for idx in range(1, 31)), encoding="utf-8"
+    )
+    recorded = []
+    for async_mode in (False, True):
+        config = AppConfig()
+        config.pipeline.async_mode = async_mode
+        config.llm.title_formatting.batch_size = 6
+        config.llm.title_formatting.token_budget = 200
+        config.llm.title_formatting.max_concurrency = 3
+        pipeline = ChapterSplitterPipeline(config)
+        pipeline.llm_client = BatchRecordingLLM()
+        pipeline.process(input_path=source, output_path=tmp_path / f"out_{async_mode}.txt")
+        recorded.append(sorted(pipeline.llm_client.batches))
+
+    assert recorded[0] == recorded[1]
+    assert len(recorded[0]) > 30 // 6
+    assert [num for batch in recorded[0] for num in batch] == list(range(1, 31))
+
+
+@pytest.mark.parametrize("fixture", ["chinese_sample.txt", "english_sample.txt"])
+def test_columnar_table_matches_full_reader(tmp_path, fixture):
+    source = Path("tests/fixtures") / fixture
+    full_text, full_result = _run(tmp_path, source, "full", target_chars=30)
+
+    config = AppConfig()
+    config.pipeline.columnar = True
+    config.splitter.target_chars = 30
+    output_path = tmp_path / "columnar.txt"
+    result = ChapterSplitterPipeline(config).process(input_path=source, output_path=output_path)
+
+    assert output_path.read_text(encoding="utf-8") == full_text
+    assert result.parse_strategy == full_result.parse_strategy == "regex"
+    assert result.output_chapter_count == full_result.output_chapter_count
+
+
+def test_parallel_split_matches_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr("chapter_splitter.parallel.CHUNK_CHARS", 40)
+    source = Path("tests/fixtures") / "chinese_sample.txt"
+    serial_text, serial_result = _run(tmp_path, source, "full", target_chars=30)
+
+    config = AppConfig()
+    config.pipeline.split_workers = 2
+    config.splitter.target_chars = 30
+    output_path = tmp_path / "parallel.txt"
+    result = ChapterSplitterPipeline(config).process(input_path=source, output_path=output_path)
+
+    assert output_path.read_text(encoding="utf-8") == serial_text
+    assert result.output_chapter_count == serial_result.output_chapter_count
+
+
+def test_index_sidecar_points_at_output_chapters(tmp_path):
+    config = AppConfig()
+    config.output.index = True
+    config.splitter.target_chars = 30
+    output_path = tmp_path / "chinese_split.txt"
+    result = ChapterSplitterPipeline(config).process(Path("tests/fixtures/chinese_sample.txt"), output_path)
+
+    data = output_path.read_bytes()
+    lines = (tmp_path / "chinese_split.index.jsonl").read_text(encoding="utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == result.output_chapter_count
+    assert [record["chapter_num"] for record in records] == list(range(1, len(records) + 1))
+    for record in records:
+        chunk = data[record["offset"] : record["offset"] + record["length"]].decode("utf-8")
+        assert chunk.startswith(f"==={record['title']}===\n")
+        assert record["part"] <= record["total"]
+
+
+@pytest.mark.parametrize("async_mode", [False, True])
+def test_per_chapter_output_matches_single_file(tmp_path, async_mode):
+    source = Path("tests/fixtures/chinese_sample.txt")
+    single_text, _ = _run(tmp_path, source, "full", target_chars=30)
+
+    config = AppConfig()
+    config.splitter.target_chars = 30
+    config.pipeline.async_mode = async_mode
+    config.output.mode = "per_chapter"
+    config.output.write_workers = 2
+    result = ChapterSplitterPipeline(config).process(source, tmp_path / "chinese_split.txt")
+
+    files = sorted(path for path in result.output_path.iterdir() if not path.name.startswith("."))
+    assert result.output_path == tmp_path / "chinese_split"
+    assert len(files) == result.output_chapter_count
+    assert "\n\n".join(path.read_text(encoding="utf-8").rstrip("\n") for path in files) + "\n" == single_text
+
+
+@pytest.mark.parametrize("async_mode", [False, True])
+def test_failed_run_keeps_previous_output(tmp_path, async_mode):
+    chapters = "".join(f"第{num}章 标题\n" + "正文内容。" * 200 + "\n" for num in range(1, 200))
+    source = tmp_path / "broken.txt"
+    source.write_bytes(chapters.encode("utf-8") + b"\xff" + chapters.encode("utf-8"))
+    output_path = tmp_path / "broken_split.txt"
+    output_path.write_text("上次的结果\n", encoding="utf-8")
+
+    config = AppConfig()
+    config.input.reader = "stream"
+    config.input.encoding = "utf-8"
+    config.pipeline.async_mode = async_mode
+    with pytest.raises(UnicodeDecodeError):
+        ChapterSplitterPipeline(config).process(source, output_path)
+
+    assert output_path.read_text(encoding="utf-8") == "上次的结果\n"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["broken.txt", "broken_split.txt"]
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from chapter_splitter.renderer import (
+    RenderChapter,
+    index_path_for,
+    write_chapter_files,
+    write_jsonl,
+    write_output,
+)
+
+
+def _read_index(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_index_offsets_slice_chapters_from_output(tmp_path):
+    chapters = [
+        RenderChapter(title="第1章：起点 (1/2)", content="第一段。", chapter_num=1, part=1, total=2),
+        RenderChapter(title="第2章：起点 (2/2)", content="第二段。", chapter_num=2, part=2, total=2),
+    ]
+    plain_path = tmp_path / "plain_split.txt"
+    output_path = tmp_path / "book_split.txt"
+    index_path = index_path_for(output_path)
+    write_output(plain_path, chapters, leading_text="简介\n", encoding="utf-16")
+    write_output(output_path, chapters, leading_text="简介\n", encoding="utf-16", index_path=index_path)
+
+    data = output_path.read_bytes()
+    records = _read_index(index_path)
+    assert index_path.name == "book_split.index.jsonl"
+    assert data == plain_path.read_bytes()
+    assert [(record["index"], record["chapter_num"], record["part"], record["total"]) for record in records] == [
+        (1, 1, 1, 2),
+        (2, 2, 2, 2),
+    ]
+    for record, chapter in zip(records, chapters):
+        chunk = data[record["offset"] : record["offset"] + record["length"]].decode("utf-16-le")
+        assert chunk == f"==={chapter.title}===\n{chapter.content}"
+
+
+def _chapters(count):
+    return [
+        RenderChapter(title=f"第{num}章：标题", content=f"第{num}章正文。", chapter_num=num) for num in range(1, count + 1)
+    ]
+
+
+def test_shards_reassemble_single_output_and_drop_stale_files(tmp_path):
+    single_path = tmp_path / "book_split.txt"
+    shard_dir = tmp_path / "book_split"
+    write_output(single_path, _chapters(5), leading_text="简介\n")
+    write_chapter_files(shard_dir, _chapters(9), shard_size=1)
+    write_chapter_files(shard_dir, _chapters(5), shard_size=2, leading_text="简介\n", workers=3)
+
+    names = sorted(path.name for path in shard_dir.iterdir() if not path.name.startswith("."))
+    assert names == ["00000.txt", "00001-00002.txt", "00003-00004.txt", "00005-00005.txt"]
+    parts = [(shard_dir / name).read_text(encoding="utf-8").rstrip("\n") for name in names]
+    assert "\n\n".join(parts) + "\n" == single_path.read_text(encoding="utf-8")
+
+
+def test_chapter_files_refuse_a_foreign_directory(tmp_path):
+    foreign = tmp_path / "notes"
+    foreign.mkdir()
+    (foreign / "00001.txt").write_text("别人的文件\n", encoding="utf-8")
+
+    with pytest.raises(FileExistsError):
+        write_chapter_files(foreign, _chapters(2), shard_size=1)
+    assert [path.name for path in foreign.iterdir()] == ["00001.txt"]
+    assert (foreign / "00001.txt").read_text(encoding="utf-8") == "别人的文件\n"
+
+
+def test_jsonl_output_has_one_record_per_chapter(tmp_path):
+    output_path = write_jsonl(tmp_path / "book_split.jsonl", _chapters(2), leading_text="简介\n")
+    records = _read_index(output_path)
+    assert [(record["index"], record["title"], record["content"]) for record in records] == [
+        (0, "", "简介"),
+        (1, "第1章：标题", "第1章正文。"),
+        (2, "第2章：标题", "第2章正文。"),
+    ]
+
+
+def test_failed_write_keeps_previous_output(tmp_path):
+    output_path = tmp_path / "book_split.txt"
+    output_path.write_text("旧内容\n", encoding="utf-8")
+
+    def broken_chapters():
+        yield RenderChapter(title="第1章", content="正文")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        write_output(output_path, broken_chapters())
+    assert output_path.read_text(encoding="utf-8") == "旧内容\n"
+    assert [path.name for path in tmp_path.iterdir()] == ["book_split.txt"]
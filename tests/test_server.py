@@ -0,0 +1,237 @@
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import json
+import threading
+import time
+
+import pytest
+
+from chapter_splitter.config import AppConfig
+from chapter_splitter.pipeline import ChapterSplitterPipeline
+from chapter_splitter.server import SplitService, make_server
+
+
+@pytest.fixture
+def serve():
+    started = []
+
+    def start(workers=2, queue_size=4, max_body_bytes=0, config=None):
+        if config is None:
+            config = AppConfig()
+            config.splitter.target_chars = 30
+        service = SplitService(config, workers=workers, queue_size=queue_size, max_body_bytes=max_body_bytes)
+        server = make_server(service, port=0, quiet=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        started.append((server, service))
+        return server, service
+
+    yield start
+    for server, service in started:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+def _post(server, body: bytes):
+    connection = HTTPConnection(*server.server_address, timeout=10)
+    connection.request("POST", "/split", body=body)
+    response = connection.getresponse()
+    try:
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def test_serve_streams_back_same_output_as_cli(serve, tmp_path):
+    server, _ = serve()
+    source = Path("tests/fixtures/chinese_sample.txt")
+
+    config = AppConfig()
+    config.splitter.target_chars = 30
+    expected_path = tmp_path / "expected.txt"
+    ChapterSplitterPipeline(config).process(input_path=source, output_path=expected_path)
+
+    for _ in range(2):
+        status, headers, body = _post(server, source.read_bytes())
+        assert status == 200
+        assert body == expected_path.read_bytes()
+        summary = json.loads(headers["X-Split-Result"])
+        assert summary["language"] == "zh"
+        assert summary["input_chapter_count"] == 3
+
+
+def test_serve_rejects_jobs_when_queue_is_full(serve, monkeypatch):
+    server, service = serve(workers=1, queue_size=0)
+    release = threading.Event()
+    entered = threading.Event()
+    process = ChapterSplitterPipeline.process
+
+    def blocking_process(self, input_path, output_path):
+        entered.set()
+        release.wait(5)
+        return process(self, input_path, output_path)
+
+    monkeypatch.setattr(ChapterSplitterPipeline, "process", blocking_process)
+    body = Path("tests/fixtures/english_sample.txt").read_bytes()
+    first: list = []
+    worker = threading.Thread(target=lambda: first.append(_post(server, body)))
+    worker.start()
+    assert entered.wait(5)
+
+    status, headers, _ = _post(server, body)
+    assert status == 503
+    assert headers["Retry-After"] == "1"
+    assert headers["Connection"] == "close"
+
+    connection = HTTPConnection(*server.server_address, timeout=10)
+    connection.request("GET", "/health")
+    health = json.loads(connection.getresponse().read())
+    assert health["active_jobs"] == 1
+
+    release.set()
+    worker.join(5)
+    assert first[0][0] == 200
+
+
+def test_concurrent_jobs_report_their_own_counts(serve, monkeypatch):
+    server, service = serve(workers=2)
+    both_running = threading.Barrier(2, timeout=5)
+    pipelines = set()
+    process = ChapterSplitterPipeline.process
+
+    def overlapping_process(self, input_path, output_path):
+        pipelines.add(id(self))
+        both_running.wait()
+        return process(self, input_path, output_path)
+
+    monkeypatch.setattr(ChapterSplitterPipeline, "process", overlapping_process)
+    books = {
+        count: "".join(f"第{idx}章 标题{idx}\n第{idx}章的正文。\n\n" for idx in range(1, count + 1)).encode("utf-8")
+        for count in (2, 5)
+    }
+    responses: dict = {}
+    threads = [
+        threading.Thread(target=lambda count=count: responses.update({count: _post(server, books[count])}))
+        for count in books
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(pipelines) == 2
+    assert id(service.pipeline) not in pipelines
+    for count, (status, headers, _) in responses.items():
+        assert status == 200
+        summary = json.loads(headers["X-Split-Result"])
+        assert summary["input_chapter_count"] == summary["output_chapter_count"] == count
+
+
+def test_serve_rejects_oversized_bodies_without_reading_them(serve):
+    server, service = serve(max_body_bytes=100)
+    status, headers, body = _post(server, "正文。".encode("utf-8") * 100)
+    assert status == 413
+    assert headers["Connection"] == "close"
+    assert "100 bytes" in json.loads(body)["error"]
+    assert service.active_jobs == 0
+
+
+class _TitleLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(0.02)
+        system, user = (message["content"] for message in request["messages"])
+        if system == "You are a title formatter.":
+            items = json.loads(user.split("输入: ", 1)[1])
+            reply = {"formatted": [f"第{item['chapter_num']}章：LLM" for item in items]}
+        else:
+            reply = {"language": "zh", "confidence": 0.95}
+        message = {"role": "assistant", "content": json.dumps(reply, ensure_ascii=False)}
+        body = json.dumps(
+            {
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": request["model"],
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_concurrent_async_jobs_keep_llm_titles(serve, tmp_path):
+    llm_server = ThreadingHTTPServer(("127.0.0.1", 0), _TitleLLMHandler)
+    threading.Thread(target=llm_server.serve_forever, daemon=True).start()
+    config = AppConfig()
+    config.pipeline.async_mode = True
+    config.llm.api_key = "test-key"
+    config.llm.base_url = "http://{}:{}/v1".format(*llm_server.server_address)
+    # 独立的熔断策略，不和其它测试共用进程级调度器。
+    config.llm.circuit_breaker.failure_threshold = 3
+    config.llm.cache.enabled = False
+    config.llm.chapter_detection.library_path = str(tmp_path / "patterns.sqlite3")
+    config.llm.title_formatting.batch_size = 2
+    server, _ = serve(workers=2, config=config)
+
+    books = [
+        "".join(f"第{idx}章 标题{idx}\n第{idx}章的正文。\n\n" for idx in range(1, count + 1)).encode("utf-8")
+        for count in (6, 7, 8, 9)
+    ]
+    responses: list = [None] * len(books)
+
+    def post(index):
+        responses[index] = _post(server, books[index])
+
+    threads = [threading.Thread(target=post, args=(index,)) for index in range(len(books))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(20)
+    llm_server.shutdown()
+    llm_server.server_close()
+
+    for count, (status, _, body) in zip((6, 7, 8, 9), responses):
+        assert status == 200
+        headings = [line for line in body.decode("utf-8").splitlines() if line.startswith("===")]
+        assert headings == [f"===第{idx}章：LLM===" for idx in range(1, count + 1)]
+
+
+def test_serve_refuses_to_replace_a_regular_file(tmp_path, monkeypatch):
+    from click.testing import CliRunner
+
+    from chapter_splitter.main import main
+
+    book = tmp_path / "novel.txt"
+    book.write_text("正文", encoding="utf-8")
+    monkeypatch.setattr("chapter_splitter.server.SplitService.warm_up", lambda self: None)
+
+    result = CliRunner().invoke(main, ["serve", "--socket", str(book)])
+
+    assert result.exit_code != 0
+    assert "不是 Unix socket" in result.output
+    assert book.read_text(encoding="utf-8") == "正文"
+
+
+def test_make_server_replaces_a_stale_socket(tmp_path):
+    import socket
+
+    socket_path = str(tmp_path / "split.sock")
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(socket_path)
+    stale.close()
+
+    service = SplitService(AppConfig(), workers=1)
+    server = make_server(service, socket_path=socket_path, quiet=True)
+    server.server_close()
+    service.close()
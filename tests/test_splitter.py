@@ -1,9 +1,14 @@
+import random
+import re
+
 from chapter_splitter.parser import ParsedChapter
 from chapter_splitter.splitter import (
     calculate_split_count,
     find_split_point,
+    span_text,
     split_chapter,
     split_content,
+    split_content_spans,
 )
 
 
@@ -52,3 +57,66 @@ def test_split_chapter_multiple_parts():
     assert len(parts) >= 2
     assert parts[0].part == 1
     assert parts[-1].total == len(parts)
+
+
+def _reference_split_content(content, target_chars, min_ratio, max_ratio, split_search_range):
+    # 旧版按剩余文本切片的实现，作为下标切分的对照。
+    def reference_find(text, target_pos):
+        start = max(0, target_pos - split_search_range)
+        end = min(len(text), target_pos + split_search_range)
+        window = text[start:end]
+        for pattern, extend in ((r"\n\n+", False), (r"[。.!?！？]", True), (r"[,，]", True)):
+            if extend:
+                points = [start + match.end() for match in re.finditer(pattern, window)]
+            else:
+                points = [start + match.start() + 2 for match in re.finditer(pattern, window)]
+            if points:
+                point = min(points, key=lambda value: abs(value - target_pos))
+                while extend and point < len(text) and text[point] in CLOSING_PREFIXES:
+                    point += 1
+                return point
+        return max(1, min(len(text) - 1, target_pos)) if text else 0
+
+    normalized = content.strip()
+    if not normalized:
+        return [""]
+    count = calculate_split_count(len(normalized), target_chars, min_ratio, max_ratio)
+    pieces, remaining = [], normalized
+    while count > 1:
+        point = reference_find(remaining, max(1, len(remaining) // count))
+        left, right = remaining[:point].strip(), remaining[point:].strip()
+        if not left or not right:
+            point = max(1, len(remaining) // count)
+            left, right = remaining[:point].strip(), remaining[point:].strip()
+        cursor = 0
+        while cursor < len(right) and right[cursor] in CLOSING_PREFIXES:
+            cursor += 1
+        if cursor:
+            left, right = left + right[:cursor], right[cursor:].lstrip()
+        if not left or not right:
+            point = max(1, len(remaining) // count)
+            left, right = remaining[:point].strip(), remaining[point:].strip()
+        pieces.append(left)
+        remaining = right
+        count -= 1
+    pieces.append(remaining.strip())
+    return [piece for piece in pieces if piece]
+
+
+def test_split_content_matches_reference_on_random_text():
+    rng = random.Random(20260320)
+    atoms = ["字", "word ", " ", "\n", "\n\n", "\n\n\n", "。", ".", "！", ",", "，", "」", "”", ")", '"', "　"]
+    for _ in range(2000):
+        content = "".join(rng.choice(atoms) for _ in range(rng.randint(0, 160)))
+        target = rng.choice([2, 5, 10, 30, 80])
+        search_range = rng.choice([1, 5, 20, 200])
+        expected = _reference_split_content(content, target, 0.7, 1.3, search_range)
+        assert split_content(content, target, 0.7, 1.3, search_range) == expected
+
+
+def test_split_content_spans_point_into_original_content():
+    content = "\n  开头一句。」接着第二句，继续写下去。\n\n第三段的内容也要足够长才能切开。  \n"
+    spans = split_content_spans(content, target_chars=10, min_ratio=0.7, max_ratio=1.3, split_search_range=8)
+    pieces = split_content(content, target_chars=10, min_ratio=0.7, max_ratio=1.3, split_search_range=8)
+    assert [span_text(content, span) for span in spans] == pieces
+    assert len(pieces) >= 2
@@ -0,0 +1,62 @@
+from chapter_splitter import stats as stats_module
+from chapter_splitter.llm.client import LLMCallStats
+from chapter_splitter.stats import RunStats, stage, timed_iter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingClient:
+    def __init__(self):
+        self.stats = LLMCallStats()
+
+
+def test_nested_stages_record_exclusive_time_and_llm_deltas(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(stats_module.time, "perf_counter", clock)
+    client = CountingClient()
+    run = RunStats(llm_client=client)
+
+    with run.stage("write_output"):
+        clock.now += 1.0
+        with run.stage("format_titles"):
+            clock.now += 5.0
+            client.stats.calls += 2
+            client.stats.cache_hits += 1
+        clock.now += 0.5
+
+    assert run.stages["write_output"].seconds == 1.5
+    assert run.stages["format_titles"].seconds == 5.0
+    assert run.stages["format_titles"].llm_calls == 2
+    assert run.stages["format_titles"].cache_hits == 1
+    assert run.stages["write_output"].llm_calls == 0
+
+
+def test_timed_iter_charges_each_next_call(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(stats_module.time, "perf_counter", clock)
+    run = RunStats()
+
+    def produce():
+        for value in range(3):
+            clock.now += 2.0
+            yield value
+
+    with run.stage("write_output"):
+        for _ in timed_iter(run, "parse_chapters", produce()):
+            clock.now += 1.0
+
+    assert run.stages["parse_chapters"].seconds == 6.0
+    assert run.stages["write_output"].seconds == 3.0
+
+
+def test_disabled_stats_are_passthrough():
+    items = [1, 2, 3]
+    assert timed_iter(None, "parse_chapters", items) is items
+    with stage(None, "parse_chapters") as current:
+        assert current is None
@@ -0,0 +1,34 @@
+import pytest
+
+from chapter_splitter.parser import parse_chapters
+from chapter_splitter.table import build_chapter_table
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "前言\n第一章 开始\n　　正文一。\n  第2章 缩进  \n正文二。\n\nChapter 3 End\n尾声。\n",
+        "前言\r\n第一章 开始\r\n　　正文一。\r第2章 继续\n正文二。\x0c  Chapter 3 End 尾声。\n",
+        "一个人走了。\n第一章 甲\n一二三四五。\n第二章 乙",
+    ],
+)
+def test_chapter_table_matches_full_parse(text):
+    expected = parse_chapters(text, llm_client=None)
+    parsed = build_chapter_table(text)
+
+    assert parsed is not None
+    assert parsed.leading_text == expected.leading_text
+    assert [(chapter.original_title, chapter.content) for chapter in parsed.chapters] == [
+        (chapter.original_title, chapter.content) for chapter in expected.chapters
+    ]
+
+
+def test_chapter_table_keeps_offsets_instead_of_copies():
+    text = "第一章 甲\n正文一。\n第二章 乙\n正文二。\n"
+    parsed = build_chapter_table(text)
+
+    assert parsed.chapters.text is text
+    first, second = parsed.chapters
+    assert (first.start, first.end) == (len("第一章 甲\n"), len("第一章 甲\n正文一。"))
+    assert second.char_count == len("正文二。")
+    assert build_chapter_table("没有标题的正文。\n") is None
@@ -1,4 +1,11 @@
-from chapter_splitter.utils.text import split_by_sentence
+from chapter_splitter.utils.text import estimate_tokens, split_by_sentence
+
+
+def test_estimate_tokens_counts_cjk_per_char_and_ascii_per_four():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("第一章") == 3
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("第1章 ab") == 2 + 1
 
 
 def test_split_by_sentence_keeps_chinese_quote_boundary():
@@ -26,3 +33,16 @@ def test_split_by_sentence_keeps_multi_closing_marks_after_period():
     assert len(chunks) >= 2
     assert chunks[0].endswith('.")]}')
     assert not chunks[1].startswith('")]}')
+
+
+def test_split_by_sentence_drops_whitespace_between_sentences():
+    text = "第一句。  第二句！\n\n第三句？" + "长" * 250 + "。尾巴"
+    chunks = split_by_sentence(text, target_chars=200)
+    assert chunks == ["第一句。第二句！第三句？", "长" * 250 + "。", "尾巴"]
+
+
+def test_split_by_sentence_closing_mark_after_space_starts_next_sentence():
+    second_sentence = ") Second" + " x" * 120 + "."
+    text = "First one.  " + second_sentence + '\n\n"Third." ok'
+    chunks = split_by_sentence(text, target_chars=200)
+    assert chunks == ["First one.", second_sentence, '"Third."ok']